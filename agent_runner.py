@@ -2,66 +2,81 @@
 
 import os
 import sys
+import threading
 import argparse
-from models.llama3_runner import LlamaRunner
-from memory import Memory
-from tasks import TaskPlanner
-from jobs.job_manager import JobManager, JobStatus, StepStatus
-import time
-from typing import Optional
+import functools
+from tasks import TaskPlanner, StepGraph
+from jobs.job_manager import SqliteJobManager, JobStatus, StepStatus, TERMINAL_STEP_STATUSES, STOPPED_JOB_STATUSES
 from tools import get_registry
 
+# Maximum number of plan steps executing at once
+MAX_PARALLEL_STEPS = 8
+
+# Icons for step statuses in job details; pending steps show as paused
+STATUS_ICON = {
+    StepStatus.COMPLETED.value: "✅",
+    StepStatus.FAILED.value: "❌",
+    StepStatus.RUNNING.value: "⏳",
+}
+
+
+def _emit(text):
+    """Write step output with a single write and flush, instead of a print per line."""
+    sys.stdout.write(text)
+    sys.stdout.flush()
+
 class AgentRunner:
     def __init__(self):
         """Initialize the agent runner with all required components."""
         # Create necessary directories
         os.makedirs("workspace", exist_ok=True)
 
-        # Initialize components
-        self.llm = LlamaRunner(model_name="llama3:8b")
-        self.memory = Memory()
-        self.job_manager = JobManager()
+        # Initialize components. The LLM, memory and planner are created on first
+        # use, so job management commands don't pay for loading the model stack.
+        self._llm = None
+        self._memory = None
+        self._plan_cache = None
+        self._planner = None
+        self.job_manager = SqliteJobManager()
 
-        # Initialize the tools registry and task planner
+        # Initialize the tools registry
         self.tools = get_registry()
-        self.planner = TaskPlanner(self.llm)
+
+    @property
+    def llm(self):
+        if self._llm is None:
+            from models.llama3_runner import LlamaRunner
+            self._llm = LlamaRunner(model_name="llama3:8b")
+        return self._llm
+
+    @property
+    def memory(self):
+        if self._memory is None:
+            from memory import Memory
+            self._memory = Memory()
+        return self._memory
+
+    @property
+    def plan_cache(self):
+        if self._plan_cache is None:
+            from memory import SemanticPlanCache
+            self._plan_cache = SemanticPlanCache()
+        return self._plan_cache
+
+    @property
+    def planner(self):
+        if self._planner is None:
+            self._planner = TaskPlanner(self.llm)
+        return self._planner
+
+    def warmup(self):
+        """Load the model in the background while the user types the first task."""
+        threading.Thread(target=self.llm.warmup, daemon=True).start()
 
     def run_cli(self):
         """Run the agent in CLI mode."""
-        parser = argparse.ArgumentParser(description="LocalGenius - Local AI Development Agent")
-        subparsers = parser.add_subparsers(dest="command", help="Command to run")
-
-        # New task command
-        task_parser = subparsers.add_parser("task", help="Create and run a new task")
-        task_parser.add_argument("description", nargs="?", help="Task description")
-
-        # List jobs command
-        list_parser = subparsers.add_parser("list", help="List all jobs")
-        list_parser.add_argument("--limit", type=int, default=10, help="Maximum number of jobs to show")
-        list_parser.add_argument("--status", help="Filter by status (pending, running, completed, etc.)")
-
-        # Resume job command
-        resume_parser = subparsers.add_parser("resume", help="Resume a paused or incomplete job")
-        resume_parser.add_argument("job_id", help="ID of the job to resume")
-
-        # Show job details command
-        show_parser = subparsers.add_parser("show", help="Show details of a specific job")
-        show_parser.add_argument("job_id", help="ID of the job to show")
-
-        # Abort job command
-        abort_parser = subparsers.add_parser("abort", help="Abort a running job")
-        abort_parser.add_argument("job_id", help="ID of the job to abort")
-
-        # Retry step command
-        retry_parser = subparsers.add_parser("retry", help="Retry a specific step in a job")
-        retry_parser.add_argument("job_id", help="ID of the job")
-        retry_parser.add_argument("step_index", type=int, help="Index of the step to retry")
-
-        # List available tools command
-        tools_parser = subparsers.add_parser("tools", help="List all available tools")
-
         # Parse arguments
-        args = parser.parse_args()
+        args = self._build_parser().parse_args()
 
         # If no command is provided, enter interactive mode
         if not args.command:
@@ -70,6 +85,7 @@ class AgentRunner:
 
         # Handle commands
         if args.command == "task":
+            self.warmup()
             if not args.description:
                 description = input("Enter task description: ")
             else:
@@ -112,11 +128,61 @@ class AgentRunner:
         elif args.command == "tools":
             self._print_available_tools()
 
+    @staticmethod
+    @functools.lru_cache(maxsize=1)
+    def _build_parser():
+        """Build the CLI argument parser once and reuse it across calls."""
+        parser = argparse.ArgumentParser(description="LocalGenius - Local AI Development Agent")
+        subparsers = parser.add_subparsers(dest="command", help="Command to run")
+
+        # New task command
+        task_parser = subparsers.add_parser("task", help="Create and run a new task")
+        task_parser.add_argument("description", nargs="?", help="Task description")
+
+        # List jobs command
+        list_parser = subparsers.add_parser("list", help="List all jobs")
+        list_parser.add_argument("--limit", type=int, default=10, help="Maximum number of jobs to show")
+        list_parser.add_argument("--status", help="Filter by status (pending, running, completed, etc.)")
+
+        # Resume job command
+        resume_parser = subparsers.add_parser("resume", help="Resume a paused or incomplete job")
+        resume_parser.add_argument("job_id", help="ID of the job to resume")
+
+        # Show job details command
+        show_parser = subparsers.add_parser("show", help="Show details of a specific job")
+        show_parser.add_argument("job_id", help="ID of the job to show")
+
+        # Abort job command
+        abort_parser = subparsers.add_parser("abort", help="Abort a running job")
+        abort_parser.add_argument("job_id", help="ID of the job to abort")
+
+        # Retry step command
+        retry_parser = subparsers.add_parser("retry", help="Retry a specific step in a job")
+        retry_parser.add_argument("job_id", help="ID of the job")
+        retry_parser.add_argument("step_index", type=int, help="Index of the step to retry")
+
+        # List available tools command
+        tools_parser = subparsers.add_parser("tools", help="List all available tools")
+
+        return parser
+
     def interactive_mode(self):
         """Run the agent in interactive CLI mode."""
+        self.warmup()
         print("\n🧠 LLaMA Dev Agent Ready. Type a task (e.g., 'create a Flask app'). Type 'exit' to quit.\n")
         print("Special commands: list, show <job_id>, resume <job_id>, abort <job_id>, retry <job_id> <step_index>, tools")
 
+        # Special commands and their handlers; handlers get the remaining words
+        # and return False when the arguments don't fit so the input runs as a task
+        commands = {
+            "tools": self._cmd_tools,
+            "list": self._cmd_list,
+            "show": self._cmd_show,
+            "resume": self._cmd_resume,
+            "abort": self._cmd_abort,
+            "retry": self._cmd_retry,
+        }
+
         while True:
             user_input = input(">> ").strip()
 
@@ -124,69 +190,78 @@ class AgentRunner:
                 break
 
             # Handle special commands
-            if user_input.lower() == "tools":
-                self._print_available_tools()
-                continue
-
-            if user_input.startswith("list"):
-                limit = 10
-                if len(user_input.split()) > 1:
-                    try:
-                        limit = int(user_input.split()[1])
-                    except ValueError:
-                        pass
-                jobs = self.job_manager.list_jobs(limit)
-                self._print_job_list(jobs)
-                continue
-
-            if user_input.startswith("show "):
-                job_id = user_input.split("show ")[1].strip()
-                job = self.job_manager.get_job(job_id)
-                if job:
-                    self._print_job_details(job)
-                else:
-                    print(f"Job {job_id} not found")
-                continue
-
-            if user_input.startswith("resume "):
-                job_id = user_input.split("resume ")[1].strip()
-                success = self.resume_job(job_id)
-                if success:
-                    print(f"Successfully resumed job {job_id}")
-                else:
-                    print(f"Failed to resume job {job_id}")
-                continue
-
-            if user_input.startswith("abort "):
-                job_id = user_input.split("abort ")[1].strip()
-                success = self.job_manager.abort_job(job_id)
-                if success:
-                    print(f"Successfully aborted job {job_id}")
-                else:
-                    print(f"Failed to abort job {job_id}")
-                continue
-
-            if user_input.startswith("retry "):
-                parts = user_input.split("retry ")[1].strip().split()
-                if len(parts) == 2:
-                    job_id, step_index = parts
-                    try:
-                        step_index = int(step_index)
-                        success = self.retry_step(job_id, step_index)
-                        if success:
-                            print(f"Successfully retried step {step_index} of job {job_id}")
-                        else:
-                            print(f"Failed to retry step {step_index} of job {job_id}")
-                    except ValueError:
-                        print("Invalid step index. Please provide a number.")
-                else:
-                    print("Invalid command. Format: retry <job_id> <step_index>")
-                continue
+            words = user_input.split()
+            if words:
+                handler = commands.get(words[0].lower())
+                if handler and handler(words[1:]) is not False:
+                    continue
 
             # Execute a new task
             job_id = self.execute_task(user_input)
             print(f"\n✅ Task completed. Job ID: {job_id}")
 
+    def _cmd_tools(self, args):
+        if args:
+            return False
+        self._print_available_tools()
+
+    def _cmd_list(self, args):
+        limit = 10
+        if args:
+            try:
+                limit = int(args[0])
+            except ValueError:
+                pass
+        jobs = self.job_manager.list_jobs(limit)
+        self._print_job_list(jobs)
+
+    def _cmd_show(self, args):
+        if not args:
+            return False
+        job_id = args[0]
+        job = self.job_manager.get_job(job_id)
+        if job:
+            self._print_job_details(job)
+        else:
+            print(f"Job {job_id} not found")
+
+    def _cmd_resume(self, args):
+        if not args:
+            return False
+        job_id = args[0]
+        success = self.resume_job(job_id)
+        if success:
+            print(f"Successfully resumed job {job_id}")
+        else:
+            print(f"Failed to resume job {job_id}")
+
+    def _cmd_abort(self, args):
+        if not args:
+            return False
+        job_id = args[0]
+        success = self.job_manager.abort_job(job_id)
+        if success:
+            print(f"Successfully aborted job {job_id}")
+        else:
+            print(f"Failed to abort job {job_id}")
+
+    def _cmd_retry(self, args):
+        if not args:
+            return False
+        if len(args) == 2:
+            job_id, step_index = args
+            try:
+                step_index = int(step_index)
+                success = self.retry_step(job_id, step_index)
+                if success:
+                    print(f"Successfully retried step {step_index} of job {job_id}")
+                else:
+                    print(f"Failed to retry step {step_index} of job {job_id}")
+            except ValueError:
+                print("Invalid step index. Please provide a number.")
+        else:
+            print("Invalid command. Format: retry <job_id> <step_index>")
+
     def execute_task(self, task_description: str) -> str:
         """
         Execute a new task with the given description.
@@ -197,9 +272,6 @@ class AgentRunner:
         Returns:
             ID of the created job
         """
-        # Log task to memory
-        self.memory.log_task(task_description)
-
         # Create a new job
         job_id = self.job_manager.create_job(task_description)
         print(f"Created job with ID: {job_id}")
@@ -218,48 +290,102 @@ class AgentRunner:
             # Save memory context to job
             self.job_manager.set_memory_context(job_id, similar)
 
-        # Generate plan
-        print("\n🛠️  Planning task...\n")
-        plan = self.planner.plan_task(task_description, memory_context=similar)
+        # Reuse the plan of a near-duplicate task if one was cached, otherwise plan with the LLM
+        task_embedding = self.memory.embed(task_description)
+        cached = self.plan_cache.lookup(task_embedding)
 
-        # Log plan to memory
-        self.memory.log_plan(plan)
+        # Step results are embedded and stored in one batch once the plan has run
+        step_results = []
 
-        # Save plan to job
-        self.job_manager.set_job_plan(job_id, plan)
-
-        # Execute each step
-        for step_index, step in enumerate(plan):
+        def start_step(step_index, step):
             # Skip if job is aborted or paused
-            job = self.job_manager.get_job(job_id)
-            if job['status'] in [JobStatus.ABORTED.value, JobStatus.PAUSED.value]:
-                print(f"Job {job_id} is {job['status']}. Stopping execution.")
-                break
+            status = self.job_manager.peek_status(job_id)
+            if status in STOPPED_JOB_STATUSES:
+                print(f"Job {job_id} is {status}. Stopping execution.")
+                return False
 
-            print(f"➡️ Step {step_index + 1}: {step}")
+            _emit(f"➡️ Step {step_index + 1}: {step}\n")
 
             # Mark step as running
             self.job_manager.start_step(job_id, step_index)
+            return True
 
-            try:
-                # Execute the step
-                result = self.planner.execute_step(step, step_index)
+        def record(finished):
+            # Output for every step that finished is written in one go
+            output = []
+            for step_index, step, result, error in finished:
+                if error is None:
+                    step_results.append((step, result))
 
-                # Log result to memory
-                self.memory.log_result(step, result)
+                    # Mark step as completed
+                    self.job_manager.complete_step(job_id, step_index, result)
 
-                # Mark step as completed
-                self.job_manager.complete_step(job_id, step_index, result)
+                    output.append(f"✅ Result: {result}\n\n")
+                else:
+                    error_message = f"Error executing step: {str(error)}"
+                    output.append(f"❌ {error_message}\n")
 
-                print(f"✅ Result: {result}\n")
-            except Exception as e:
-                error_message = f"Error executing step: {str(e)}"
-                print(f"❌ {error_message}")
+                    # Mark step as failed
+                    self.job_manager.complete_step(job_id, step_index, error_message, StepStatus.FAILED)
+            if output:
+                _emit("".join(output))
 
-                # Mark step as failed
-                self.job_manager.complete_step(job_id, step_index, error_message, StepStatus.FAILED)
+        # Execute the steps, running independent ones concurrently
+        # and generating the code of steps still waiting on others in the meantime
+        graph = StepGraph(self.planner.execute_step, max_workers=MAX_PARALLEL_STEPS,
+                          on_start=start_step, prefetch=self.planner.generate_code)
+
+        if cached:
+            print(f"♻️  Reusing plan from similar task (job {cached['job_id']})\n")
+            plan, dependencies = cached['plan'], cached.get('dependencies')
+            self.job_manager.set_metadata(job_id, 'cached_plan_from', cached['job_id'])
+
+            # Log task to memory
+            self.memory.log_task(task_description)
+
+            # Save plan to job
+            self.job_manager.set_job_plan(job_id, plan, dependencies)
+
+            for step_index, step in enumerate(plan):
+                if dependencies:
+                    deps = dependencies[step_index]
+                else:
+                    deps = [step_index - 1] if step_index > 0 else []
+                graph.add(step_index, step, deps)
+        else:
+            print("\n🛠️  Planning task...\n")
+
+            # Log task to memory while the plan is generated
+            log_thread = threading.Thread(target=self.memory.log_task, args=(task_description,))
+            log_thread.start()
+
+            # Start each step as soon as the LLM has written it
+            plan, dependencies = [], []
+            for step, deps in self.planner.plan_task_stream(task_description, memory_context=similar):
+                self.job_manager.add_plan_step(job_id, step, deps)
+                graph.add(len(plan), step, deps)
+                plan.append(step)
+                dependencies.append(deps)
+                record(graph.results(block=False))
+
+            self.job_manager.finish_plan(job_id)
+            log_thread.join()
+
+        # Log plan to memory
+        self.memory.log_plan(plan)
+
+        record(graph.results())
+
+        # Log results to memory
+        self.memory.log_results_bulk(step_results)
+        self.memory.flush()
+
+        # Final job status is set automatically by the job manager based on steps.
+        # Only plans that ran successfully are worth reusing.
+        job = self.job_manager.get_job(job_id)
+        if not cached and plan and job and job['status'] == JobStatus.COMPLETED.value:
+            self.plan_cache.add(task_embedding, task_description, plan, job_id, dependencies)
 
-        # Final job status is set automatically by the job manager based on steps
         return job_id
 
     def resume_job(self, job_id: str) -> bool:
@@ -272,14 +398,20 @@ class AgentRunner:
         Returns:
             True if successful, False otherwise
         """
-        job = self.job_manager.get_job(job_id)
-        if not job:
+        status = self.job_manager.peek_status(job_id)
+        if status is None:
             print(f"Job {job_id} not found")
             return False
 
         # Can only resume paused or running jobs
-        if job['status'] not in [JobStatus.PAUSED.value, JobStatus.RUNNING.value]:
-            print(f"Cannot resume job with status {job['status']}")
+        if status not in [JobStatus.PAUSED.value, JobStatus.RUNNING.value]:
+            print(f"Cannot resume job with status {status}")
+            return False
+
+        # Find the incomplete steps
+        pending_steps = self.job_manager.get_pending_steps(job_id)
+        if not pending_steps:
+            print("No incomplete steps found. Job is already complete.")
             return False
 
         # Set job status to running
@@ -288,48 +420,41 @@ class AgentRunner:
         # Update the planner's current job ID
         self.planner.current_job_id = job_id
 
-        # Find the first incomplete step
-        for step_index, step in enumerate(job['steps']):
-            if step['status'] in [StepStatus.PENDING.value, StepStatus.RUNNING.value]:
-                print(f"Resuming from step {step_index + 1}: {step['description']}")
-
-                # Execute this step and all remaining steps
-                for i in range(step_index, len(job['steps'])):
-                    current_step = job['steps'][i]
-
-                    # Skip if job is aborted or paused
-                    current_job = self.job_manager.get_job(job_id)
-                    if current_job['status'] in [JobStatus.ABORTED.value, JobStatus.PAUSED.value]:
-                        print(f"Job {job_id} is {current_job['status']}. Stopping execution.")
-                        break
-
-                    print(f"➡️ Step {i + 1}: {current_step['description']}")
+        print(f"Resuming from step {pending_steps[0][0] + 1}: {pending_steps[0][1]}")
 
-                    # Mark step as running
-                    self.job_manager.start_step(job_id, i)
+        # Execute the remaining steps
+        step_results = []
+        for i, description in pending_steps:
+            # Skip if job is aborted or paused
+            status = self.job_manager.peek_status(job_id)
+            if status in STOPPED_JOB_STATUSES:
+                print(f"Job {job_id} is {status}. Stopping execution.")
+                break
 
-                    try:
-                        # Execute the step
-                        result = self.planner.execute_step(current_step['description'], i)
+            _emit(f"➡️ Step {i + 1}: {description}\n")
 
-                        # Log result to memory
-                        self.memory.log_result(current_step['description'], result)
+            # Mark step as running
+            self.job_manager.start_step(job_id, i)
 
-                        # Mark step as completed
-                        self.job_manager.complete_step(job_id, i, result)
+            try:
+                # Execute the step
+                result = self.planner.execute_step(description, i)
+                step_results.append((description, result))
 
-                        print(f"✅ Result: {result}\n")
-                    except Exception as e:
-                        error_message = f"Error executing step: {str(e)}"
-                        print(f"❌ {error_message}")
+                # Mark step as completed
+                self.job_manager.complete_step(job_id, i, result)
 
-                        # Mark step as failed
-                        self.job_manager.complete_step(job_id, i, error_message, StepStatus.FAILED)
+                _emit(f"✅ Result: {result}\n\n")
+            except Exception as e:
+                error_message = f"Error executing step: {str(e)}"
+                _emit(f"❌ {error_message}\n")
 
-                return True
+                # Mark step as failed
+                self.job_manager.complete_step(job_id, i, error_message, StepStatus.FAILED)
 
-        print("No incomplete steps found. Job is already complete.")
-        return False
+        # Log results to memory
+        self.memory.log_results_bulk(step_results)
+        return True
 
     def retry_step(self, job_id: str, step_index: int) -> bool:
         """
@@ -342,21 +467,19 @@ class AgentRunner:
         Returns:
             True if successful, False otherwise
         """
-        job = self.job_manager.get_job(job_id)
-        if not job:
+        if self.job_manager.peek_status(job_id) is None:
             print(f"Job {job_id} not found")
             return False
 
-        # Validate step index
-        if step_index < 0 or step_index >= len(job['steps']):
-            print(f"Invalid step index {step_index}. Job has {len(job['steps'])} steps.")
+        # Get the step to retry
+        step = self.job_manager.get_step(job_id, step_index)
+        if step is None:
+            print(f"Invalid step index {step_index} for job {job_id}.")
             return False
 
         # Update the planner's current job ID
         self.planner.current_job_id = job_id
 
-        # Get the step to retry
-        step = job['steps'][step_index]
         print(f"🔁 Retrying step {step_index + 1}: {step['description']}")
 
         # Mark step as running
@@ -364,7 +487,7 @@ class AgentRunner:
 
         try:
             # Execute the step
-            result = self.planner.execute_step(step['description'], step_index)
+            result = self.planner.execute_step(step['description'], step_index, fresh=True)
 
             # Log result to memory
             self.memory.log_result(step['description'], result)
@@ -412,38 +535,42 @@ class AgentRunner:
 
     def _print_job_details(self, job):
         """Print detailed information about a job."""
-        print("\n" + "=" * 80)
-        print(f"Job ID: {job['id']}")
-        print(f"Status: {job['status']}")
-        print(f"Task: {job['task']}")
-        print(f"Created: {job['created_at']}")
-        print(f"Updated: {job['updated_at']}")
-        print("=" * 80)
+        lines = [
+            "",
+            "=" * 80,
+            f"Job ID: {job['id']}",
+            f"Status: {job['status']}",
+            f"Task: {job['task']}",
+            f"Created: {job['created_at']}",
+            f"Updated: {job['updated_at']}",
+            "=" * 80,
+        ]
 
         # Print plan
-        print("\nPlan:")
+        lines.append("\nPlan:")
         for i, step_desc in enumerate(job['plan']):
-            print(f"{i+1}. {step_desc}")
+            lines.append(f"{i+1}. {step_desc}")
 
         # Print steps with results
-        print("\nExecution Steps:")
+        lines.append("\nExecution Steps:")
         for i, step in enumerate(job['steps']):
-            status_icon = "✅" if step['status'] == StepStatus.COMPLETED.value else "❌" if step['status'] == StepStatus.FAILED.value else "⏳" if step['status'] == StepStatus.RUNNING.value else "⏸️"
-            print(f"\n{status_icon} Step {i+1}: {step['description']}")
+            status = step['status']
+            lines.append(f"\n{STATUS_ICON.get(status, '⏸️')} Step {i+1}: {step['description']}")
 
-            if step['status'] in [StepStatus.COMPLETED.value, StepStatus.FAILED.value]:
-                print(f"   Result: {step['result']}")
+            if status in TERMINAL_STEP_STATUSES:
+                lines.append(f"   Result: {step['result']}")
 
                 if step['duration'] is not None:
-                    print(f"   Duration: {step['duration']:.2f} seconds")
+                    lines.append(f"   Duration: {step['duration']:.2f} seconds")
 
         # Print artifacts if any
         if job.get('artifacts'):
-            print("\nArtifacts:")
+            lines.append("\nArtifacts:")
             for artifact in job['artifacts']:
-                print(f"- {artifact['name']} ({artifact['type']}): {artifact['path']}")
+                lines.append(f"- {artifact['name']} ({artifact['type']}): {artifact['path']}")
 
-        print("\n" + "=" * 80)
+        lines.append("\n" + "=" * 80)
+        _emit("\n".join(lines) + "\n")
 
     def _print_available_tools(self):
         """Print all available tools and their descriptions."""
@@ -0,0 +1,110 @@
+# cache.py
+
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+
+PROMPT_CACHE_PATH = "workspace/prompt_cache.db"
+PROMPT_CACHE_SIZE = 512
+PROMPT_CACHE_TTL = 3600  # seconds an in-memory response stays fresh
+PROMPT_STORE_TTL = 7 * 24 * 3600  # seconds a response on disk stays fresh
+
+
+class PromptCache:
+    """
+    Two-tier cache of LLM responses keyed by model and prompt.
+
+    Lookups check an in-process LRU first and then a SQLite table, so
+    responses survive restarts. Entries past their TTL are treated as misses;
+    expired rows are pruned when the store is opened.
+    """
+
+    def __init__(self, path=PROMPT_CACHE_PATH, capacity=PROMPT_CACHE_SIZE,
+                 ttl=PROMPT_CACHE_TTL, store_ttl=PROMPT_STORE_TTL):
+        self.capacity = capacity
+        self.ttl = ttl
+        self.store_ttl = store_ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (stored_at, response)
+
+        self.conn = None
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self.conn = sqlite3.connect(path, check_same_thread=False)
+            with self.conn:
+                self.conn.execute(
+                    "CREATE TABLE IF NOT EXISTS prompt_cache (key TEXT PRIMARY KEY, response TEXT, ts REAL)"
+                )
+                self.conn.execute("DELETE FROM prompt_cache WHERE ts < ?", (time.time() - store_ttl,))
+        except Exception as e:
+            print(f"Prompt cache store disabled: {e}")
+            self.conn = None
+
+    @staticmethod
+    def key(model, prompt):
+        """Cache key of a prompt sent to a model."""
+        return hashlib.sha256(f"{model}|{prompt}".encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """
+        Look up a cached response.
+
+        Args:
+            key: Key from PromptCache.key()
+
+        Returns:
+            The cached response, or None on a miss
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if now - entry[0] <= self.ttl:
+                    self._entries.move_to_end(key)
+                    return entry[1]
+                del self._entries[key]
+
+            if self.conn is None:
+                return None
+            try:
+                row = self.conn.execute(
+                    "SELECT response, ts FROM prompt_cache WHERE key = ?", (key,)
+                ).fetchone()
+            except Exception as e:
+                print(f"Error reading prompt cache: {e}")
+                return None
+            if row is None or now - row[1] > self.store_ttl:
+                return None
+
+            self._remember(key, row[0], now)
+            return row[0]
+
+    def put(self, key, response):
+        """
+        Cache a response.
+
+        Args:
+            key: Key from PromptCache.key()
+            response: The LLM response text
+        """
+        now = time.time()
+        with self._lock:
+            self._remember(key, response, now)
+            if self.conn is None:
+                return
+            try:
+                with self.conn:
+                    self.conn.execute(
+                        "INSERT OR REPLACE INTO prompt_cache VALUES (?, ?, ?)", (key, response, now)
+                    )
+            except Exception as e:
+                print(f"Error writing prompt cache: {e}")
+
+    def _remember(self, key, response, stored_at):
+        self._entries[key] = (stored_at, response)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
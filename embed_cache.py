@@ -0,0 +1,295 @@
+# embed_cache.py
+
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+
+EMBED_CACHE_SIZE = 4096
+EMBED_CACHE_TTL = 3600  # seconds an embedding stays in the in-memory cache
+EMBED_CACHE_MAX_TEXT = 4096  # longer texts skip the in-memory embedding cache
+EMBED_STORE_PATH = "workspace/embeddings.db"
+
+# Set EMBED_BACKEND=onnx to embed memories in-process with OnnxEmbedder instead of
+# through Ollama; the two models' embeddings are not comparable, so each backend
+# keeps its own collection
+EMBED_BACKEND = os.environ.get("EMBED_BACKEND", "ollama")
+ONNX_MAX_TOKENS = 256  # MiniLM was trained on sequences up to this length
+ONNX_BATCH_SIZE = 32  # texts encoded per ONNX Runtime call
+
+
+class CachedEmbedder:
+    """
+    Wraps an embedder with an in-memory LRU and a persistent EmbeddingStore.
+
+    Lookups check the LRU (entries expire after ttl seconds), then the store,
+    and only then call the embedder; new embeddings are written to both.
+    Hit and miss counts are kept for stats().
+    """
+
+    def __init__(self, embedder, store_path=EMBED_STORE_PATH, capacity=EMBED_CACHE_SIZE, ttl=EMBED_CACHE_TTL):
+        """
+        Args:
+            embedder: Object with an embed_query(text) method and a model attribute
+            store_path: Path of the SQLite embedding store
+            capacity: Maximum number of embeddings kept in memory
+            ttl: Seconds an embedding stays in memory
+        """
+        self.embedder = embedder
+        self.capacity = capacity
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # text hash -> (stored_at, embedding)
+        self.store = EmbeddingStore(store_path, embedder.model)
+        self._counts = {"memory_hits": 0, "store_hits": 0, "misses": 0}
+
+    def embed(self, text):
+        """Return the embedding for a text, computing it only on a cache miss."""
+        embedding = self._lookup(text)
+        if embedding is not None:
+            return embedding
+
+        embedding = self.store.get_many([text]).get(text)
+        if embedding is None:
+            self._count("misses")
+            embedding = self.embedder.embed_query(text)
+            self.store.put_many({text: embedding})
+        else:
+            self._count("store_hits")
+        self._remember(text, embedding)
+        return embedding
+
+    def embed_many(self, texts, compute_many=None):
+        """
+        Return embeddings for several texts, computing the cache misses together.
+
+        Args:
+            texts: Texts to embed
+            compute_many: Optional callable (list of texts) -> dict of text -> embedding
+                          used for the misses; texts it leaves out are embedded one at a time
+
+        Returns:
+            List of embeddings in the order of texts
+        """
+        found = {}
+        missing = []
+        for text in dict.fromkeys(texts):
+            embedding = self._lookup(text)
+            if embedding is None:
+                missing.append(text)
+            else:
+                found[text] = embedding
+
+        if missing:
+            stored = self.store.get_many(missing)
+            for text, embedding in stored.items():
+                self._count("store_hits")
+                self._remember(text, embedding)
+            found.update(stored)
+            missing = [text for text in missing if text not in stored]
+
+        if missing and compute_many:
+            computed = compute_many(missing)
+            if computed:
+                self._count("misses", len(computed))
+                for text, embedding in computed.items():
+                    self._remember(text, embedding)
+                self.store.put_many(computed)
+                found.update(computed)
+
+        return [found[text] if text in found else self.embed(text) for text in texts]
+
+    def warmup(self, texts):
+        """Load (or compute) the embeddings of texts expected to be queried soon."""
+        self.embed_many(list(texts))
+
+    def stats(self):
+        """
+        Cache statistics.
+
+        Returns:
+            Dict with memory_hits, store_hits, misses, hit_rate and size
+        """
+        with self._lock:
+            counts = dict(self._counts)
+            counts["size"] = len(self._entries)
+        lookups = counts["memory_hits"] + counts["store_hits"] + counts["misses"]
+        counts["hit_rate"] = (counts["memory_hits"] + counts["store_hits"]) / lookups if lookups else 0.0
+        return counts
+
+    def _lookup(self, text):
+        key = _cache_key(text)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[0] > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            self._counts["memory_hits"] += 1
+            return entry[1]
+
+    def _remember(self, text, embedding):
+        # Long texts (mostly step results) are rarely embedded twice; leave them to the store
+        if len(text) > EMBED_CACHE_MAX_TEXT:
+            return
+        with self._lock:
+            self._entries[_cache_key(text)] = (time.monotonic(), embedding)
+            if len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+
+    def _count(self, name, n=1):
+        with self._lock:
+            self._counts[name] += n
+
+
+class OnnxEmbedder:
+    """
+    all-MiniLM-L6-v2 sentence embeddings computed in-process with ONNX Runtime.
+
+    Uses the ONNX export ChromaDB downloads for its default embedding function
+    (onnxruntime and tokenizers come with chromadb). On first use the weights
+    are dynamically quantized to int8 and saved next to the original as
+    model_int8.onnx, so matmuls run on ONNX Runtime's integer kernels (VNNI
+    where the CPU has it) at a quarter of the weight size. Embeddings are
+    mean-pooled over the attention mask and L2-normalized, like
+    sentence-transformers does.
+    """
+
+    model = "all-MiniLM-L6-v2-int8"
+
+    def __init__(self, model_dir=None):
+        """
+        Args:
+            model_dir: Directory holding model.onnx and tokenizer.json (defaults to
+                       ChromaDB's copy, downloaded if needed)
+        """
+        import onnxruntime
+        from tokenizers import Tokenizer
+
+        if model_dir is None:
+            from chromadb.utils.embedding_functions import ONNXMiniLM_L6_V2
+            # Calling the embedding function downloads and unpacks the model once
+            ONNXMiniLM_L6_V2()(["warmup"])
+            model_dir = os.path.join(ONNXMiniLM_L6_V2.DOWNLOAD_PATH, ONNXMiniLM_L6_V2.EXTRACTED_FOLDER_NAME)
+
+        quantized_path = os.path.join(model_dir, "model_int8.onnx")
+        if not os.path.exists(quantized_path):
+            from onnxruntime.quantization import quantize_dynamic, QuantType
+            tmp_path = f"{quantized_path}.tmp-{os.getpid()}"
+            quantize_dynamic(os.path.join(model_dir, "model.onnx"), tmp_path, weight_type=QuantType.QInt8)
+            os.replace(tmp_path, quantized_path)
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=ONNX_MAX_TOKENS)
+        self.tokenizer.enable_padding(pad_id=0, pad_token="[PAD]")
+        self.session = onnxruntime.InferenceSession(quantized_path, providers=["CPUExecutionProvider"])
+        self._input_names = {model_input.name for model_input in self.session.get_inputs()}
+
+    def embed_query(self, text):
+        """Return the embedding of one text."""
+        return self.embed_documents([text])[0]
+
+    def embed_documents(self, texts):
+        """Return the embeddings of several texts, encoded in batches."""
+        embeddings = []
+        for start in range(0, len(texts), ONNX_BATCH_SIZE):
+            encoded = self.tokenizer.encode_batch(texts[start:start + ONNX_BATCH_SIZE])
+            input_ids = np.array([e.ids for e in encoded], dtype=np.int64)
+            mask = np.array([e.attention_mask for e in encoded], dtype=np.int64)
+            inputs = {"input_ids": input_ids, "attention_mask": mask, "token_type_ids": np.zeros_like(input_ids)}
+            hidden = self.session.run(None, {name: value for name, value in inputs.items()
+                                             if name in self._input_names})[0]
+
+            pooled = (hidden * mask[..., None]).sum(axis=1) / np.maximum(mask.sum(axis=1, keepdims=True), 1)
+            pooled /= np.maximum(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12)
+            embeddings.extend(pooled.astype(np.float32).tolist())
+        return embeddings
+
+
+class EmbeddingStore:
+    """
+    SQLite table of text embeddings shared across sessions.
+
+    Rows are keyed by a SHA-256 hash of the model name and the exact text, so
+    switching the embedding model never returns stale vectors. Rows written by
+    other models (e.g. the other EMBED_BACKEND) are kept; prune() removes them.
+    """
+
+    def __init__(self, path, model):
+        self.model = model
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        with self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, model TEXT, embedding BLOB)"
+            )
+
+    def _key(self, text):
+        return hashlib.sha256(f"{self.model}:{text}".encode("utf-8")).hexdigest()
+
+    def get_many(self, texts):
+        """
+        Look up stored embeddings.
+
+        Args:
+            texts: Texts to look up
+
+        Returns:
+            Dict of text -> embedding (list of floats) for the texts that were found
+        """
+        keys = {self._key(text): text for text in texts}
+        key_list = list(keys)
+        found = {}
+        try:
+            with self._lock:
+                # Stay under SQLite's limit on bound parameters per statement
+                for start in range(0, len(key_list), 500):
+                    batch = key_list[start:start + 500]
+                    rows = self.conn.execute(
+                        f"SELECT key, embedding FROM embeddings WHERE key IN ({','.join('?' * len(batch))})",
+                        batch
+                    ).fetchall()
+                    for key, blob in rows:
+                        found[keys[key]] = np.frombuffer(blob, dtype=np.float32).tolist()
+        except Exception as e:
+            print(f"Error reading embedding store: {e}")
+        return found
+
+    def put_many(self, embeddings):
+        """
+        Store embeddings.
+
+        Args:
+            embeddings: Dict of text -> embedding
+        """
+        rows = [(self._key(text), self.model, np.asarray(embedding, dtype=np.float32).tobytes())
+                for text, embedding in embeddings.items()]
+        try:
+            with self._lock, self.conn:
+                self.conn.executemany("INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?)", rows)
+        except Exception as e:
+            print(f"Error writing embedding store: {e}")
+
+    def prune(self):
+        """
+        Delete the embeddings written by other models.
+
+        Returns:
+            Number of rows deleted
+        """
+        try:
+            with self._lock, self.conn:
+                return self.conn.execute("DELETE FROM embeddings WHERE model != ?", (self.model,)).rowcount
+        except Exception as e:
+            print(f"Error pruning embedding store: {e}")
+            return 0
+
+
+def _cache_key(text):
+    """Fixed-size key for the in-memory embedding cache."""
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
@@ -1,11 +1,20 @@
 # jobs/job_manager.py
 
 import os
-import json
+import orjson
 import uuid
+import bisect
+import time
+import atexit
+import sqlite3
+import threading
+import functools
+import itertools
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from enum import Enum
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterator
 
 class JobStatus(Enum):
     PENDING = "pending"        # Job created but not started
@@ -22,37 +31,319 @@ class StepStatus(Enum):
     COMPLETED = "completed"    # Step completed successfully
     FAILED = "failed"          # Step failed
 
+# Number of deserialized jobs kept in memory
+JOB_CACHE_SIZE = 128
+
+# Seconds between background flushes of changed jobs to disk
+FLUSH_INTERVAL = 0.2
+
+# Threads used to read job files when building the index at startup
+INDEX_LOAD_WORKERS = 16
+
+# File in the jobs directory holding the index fields of every job, so startup
+# and listing don't need to parse the job files themselves
+INDEX_FILE = '_index.json'
+
+# Suffix of the change log kept next to a job file. The background flush appends
+# each change to the log instead of rewriting the whole job; an explicit flush
+# folds the log back into the job file.
+LOG_SUFFIX = '.log'
+
+# Change records a job log may hold before the job file is rewritten instead
+LOG_COMPACT_RECORDS = 256
+
+# Columns of the jobs table that make up a job's index entry
+SUMMARY_COLUMNS = "id, task, status, created_at, updated_at"
+
+UPSERT_JOB_SQL = (
+    "INSERT OR REPLACE INTO jobs (id, task, status, created_at, updated_at, body) "
+    "VALUES (?, ?, ?, ?, ?, ?)"
+)
+
+# Status strings used on hot paths, looked up once instead of through the enums
+_STEP_PENDING = StepStatus.PENDING.value
+_STEP_RUNNING = StepStatus.RUNNING.value
+_STEP_COMPLETED = StepStatus.COMPLETED.value
+_STEP_FAILED = StepStatus.FAILED.value
+_JOB_PLANNING = JobStatus.PLANNING.value
+
+TERMINAL_STEP_STATUSES = frozenset({_STEP_COMPLETED, _STEP_FAILED})
+UNFINISHED_STEP_STATUSES = frozenset({_STEP_PENDING, _STEP_RUNNING})
+STOPPED_JOB_STATUSES = frozenset({JobStatus.ABORTED.value, JobStatus.PAUSED.value})
+
+# Fields of a step that hasn't run yet; copied for each new step
+_PENDING_STEP_TEMPLATE = {
+    'status': _STEP_PENDING,
+    'result': None,
+    'started_at': None,
+    'started_ts': None,
+    'completed_at': None,
+    'duration': None,
+}
+
+def _new_step(index: int, description: str, depends_on: List[int]) -> Dict[str, Any]:
+    step = _PENDING_STEP_TEMPLATE.copy()
+    step['index'] = index
+    step['description'] = description
+    step['depends_on'] = depends_on
+    return step
+
+def _apply_change(job_data: Dict[str, Any], change: Dict[str, Any]):
+    """
+    Apply one change record from a job log to a job dict.
+
+    A record can set top-level fields ('set'), put items into lists at a given
+    position ('put'), update the fields of one step ('step') and update
+    metadata ('metadata'). Every part is idempotent, so replaying a log that
+    was already folded into the job file changes nothing.
+    """
+    job_data.update(change.get('set', ()))
+    for key, (index, item) in change.get('put', {}).items():
+        items = job_data.setdefault(key, [])
+        items[index:index + 1] = [item]
+    if 'step' in change:
+        index, fields = change['step']
+        job_data['steps'][index].update(fields)
+    if 'metadata' in change:
+        job_data.setdefault('metadata', {}).update(change['metadata'])
+
+def _replay_log(job_data: Dict[str, Any], log_path: str) -> bool:
+    """
+    Apply the change records of a job log to a job dict.
+
+    Returns:
+        True if the log existed, False otherwise
+    """
+    try:
+        with open(log_path, 'rb') as f:
+            records = f.read().splitlines()
+    except FileNotFoundError:
+        return False
+
+    for record in records:
+        try:
+            change = orjson.loads(record)
+        except orjson.JSONDecodeError:
+            # A torn record from an interrupted append is always the last one
+            break
+        _apply_change(job_data, change)
+    return True
+
+def _file_stamp(job_path: str) -> Optional[tuple]:
+    """
+    Get the (inode, mtime, log size) of a job file, or None if it doesn't exist.
+
+    Job files are replaced rather than rewritten in place, so any write to the
+    file or its log changes the stamp.
+    """
+    try:
+        stat = os.stat(job_path)
+    except FileNotFoundError:
+        return None
+    try:
+        log_size = os.stat(job_path + LOG_SUFFIX).st_size
+    except FileNotFoundError:
+        log_size = None
+    return stat.st_ino, stat.st_mtime_ns, log_size
+
+def _synchronized(method):
+    """Run a JobManager method while holding the manager's lock."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+def _step_counters(job_data: Dict[str, Any]) -> Dict[str, int]:
+    """
+    Get the number of steps in each status for a job.
+
+    The counters are kept in the job dict and updated on every step status
+    change. Jobs saved before they existed get them counted from their steps.
+    """
+    counters = job_data.get('counters')
+    if counters is None:
+        counters = {status.value: 0 for status in StepStatus}
+        for step in job_data.get('steps', []):
+            counters[step['status']] += 1
+        job_data['counters'] = counters
+    return counters
+
+def _set_step_status(job_data: Dict[str, Any], step: Dict[str, Any], status: str):
+    """Change a step's status, keeping the job's step counters in sync."""
+    counters = _step_counters(job_data)
+    counters[step['status']] -= 1
+    counters[status] += 1
+    step['status'] = status
+
+def _advance_pending_cursor(job_data: Dict[str, Any]) -> int:
+    """
+    Move the job's next-pending cursor to its first pending step.
+
+    Steps never go back to pending, so the cursor only moves forward and
+    finding the next pending step is amortized O(1) over a run.
+
+    Returns:
+        Index of the first pending step, or the number of steps if none is pending
+    """
+    steps = job_data.get('steps', [])
+    cursor = job_data.get('next_pending_index', 0)
+    while cursor < len(steps) and steps[cursor]['status'] != _STEP_PENDING:
+        cursor += 1
+    job_data['next_pending_index'] = cursor
+    return cursor
+
 class JobManager:
     def __init__(self, jobs_dir="workspace/jobs"):
         """Initialize the JobManager with the specified jobs directory."""
         self.jobs_dir = jobs_dir
         os.makedirs(self.jobs_dir, exist_ok=True)
 
-        # Maintain an in-memory index of jobs
+        # Mutators read, modify and rewrite whole jobs, so steps completing on
+        # different threads must not interleave
+        self._lock = threading.RLock()
+
+        # Write-through LRU cache of full job dicts, so mutators don't re-read
+        # the job file before every change
+        self._job_cache = OrderedDict()
+
+        # Jobs changed since they were last written. Writes are coalesced and
+        # flushed in the background, so a run doesn't rewrite the job file for
+        # every step that starts or completes.
+        self._dirty = set()
+
+        # Encoded change records of each dirty job, waiting to be appended to its
+        # log; None when the whole job has to be written instead
+        self._changes = {}
+
+        # Number of records in each job log written by this manager
+        self._log_lengths = {}
+
+        # Status each job had in the store when this manager last read or wrote
+        # it, so a status changed by another process (an abort from the CLI or
+        # the UI) can be told apart from this manager's own changes
+        self._synced_status = {}
+
+        # (inode, mtime, log size) of each job file when this manager last read
+        # or wrote it; the file is only re-read when these change
+        self._store_stamps = {}
+
+        # Maintain an in-memory index of jobs, persisted to the index file
         self.jobs_index = {}
+        self._index_dirty = False
         self._load_jobs_index()
+        if self._index_dirty:
+            self.flush()
+
+        # (created_at, job_id) pairs in creation order, so listing the newest
+        # jobs doesn't sort the whole index; created_at never changes
+        self._created_order = sorted((entry.get('created_at') or '', job_id)
+                                     for job_id, entry in self.jobs_index.items())
+
+        self._closed = threading.Event()
+        self._flush_thread = threading.Thread(target=self._flush_loop, daemon=True)
+        self._flush_thread.start()
+        atexit.register(self.flush)
 
     def _load_jobs_index(self):
-        """Load all jobs from the jobs directory into the in-memory index."""
-        job_files = [f for f in os.listdir(self.jobs_dir) if f.endswith('.json')]
+        """
+        Load the in-memory index of jobs.
+
+        The index is read from the index file. Job files it doesn't know
+        about, or that changed since it was written (e.g. by another process),
+        are read to refresh their entries, and entries for deleted files are
+        dropped.
+        """
+        self._compact_logs()
 
-        for job_file in job_files:
+        saved = {}
+        try:
+            with open(os.path.join(self.jobs_dir, INDEX_FILE), 'rb') as f:
+                saved = orjson.loads(f.read())
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Error loading job index: {e}")
+
+        saved_by_file = {entry['file']: entry for entry in saved.values()}
+        stale_files = []
+        with os.scandir(self.jobs_dir) as entries:
+            for entry in entries:
+                if not entry.name.endswith('.json') or entry.name == INDEX_FILE or not entry.is_file():
+                    continue
+                summary = saved_by_file.get(entry.name)
+                if summary and summary.get('mtime') == entry.stat().st_mtime_ns:
+                    self.jobs_index[summary['id']] = summary
+                else:
+                    stale_files.append(entry)
+
+        if stale_files:
+            # File reads release the GIL, so reading on several threads overlaps the
+            # open/read latency that dominates on large job directories
+            with ThreadPoolExecutor(max_workers=min(INDEX_LOAD_WORKERS, len(stale_files))) as executor:
+                for summary in executor.map(self._read_summary, stale_files):
+                    if summary:
+                        self.jobs_index[summary['id']] = summary
+
+        if stale_files or len(self.jobs_index) != len(saved):
+            self._index_dirty = True
+
+    def _compact_logs(self):
+        """Fold the logs left by an earlier run into their job files."""
+        with os.scandir(self.jobs_dir) as entries:
+            log_paths = [entry.path for entry in entries if entry.name.endswith(LOG_SUFFIX)]
+
+        for log_path in log_paths:
+            job_path = log_path[:-len(LOG_SUFFIX)]
             try:
-                with open(os.path.join(self.jobs_dir, job_file), 'r') as f:
-                    job_data = json.load(f)
-                    job_id = job_data.get('id')
-                    if job_id:
-                        self.jobs_index[job_id] = {
-                            'id': job_id,
-                            'task': job_data.get('task'),
-                            'status': job_data.get('status'),
-                            'created_at': job_data.get('created_at'),
-                            'updated_at': job_data.get('updated_at'),
-                            'file': job_file
-                        }
+                with open(job_path, 'rb') as f:
+                    job_data = orjson.loads(f.read())
+            except FileNotFoundError:
+                # The job was deleted; its log is all that's left
+                os.remove(log_path)
+                continue
             except Exception as e:
-                print(f"Error loading job file {job_file}: {e}")
+                print(f"Error loading job file {os.path.basename(job_path)}: {e}")
+                continue
+
+            _replay_log(job_data, log_path)
+            if job_data.get('id'):
+                self._persist_job(job_data['id'], job_data)
+
+    def _read_summary(self, entry: os.DirEntry) -> Optional[Dict[str, Any]]:
+        """
+        Read the index fields of a job file.
+
+        Args:
+            entry: Directory entry of the job file
+
+        Returns:
+            The index entry for the job, or None if the file can't be read
+        """
+        job_file = entry.name
+        try:
+            with open(entry.path, 'rb') as f:
+                job_data = orjson.loads(f.read())
+                mtime = os.fstat(f.fileno()).st_mtime_ns
+        except Exception as e:
+            print(f"Error loading job file {job_file}: {e}")
+            return None
 
+        job_id = job_data.get('id')
+        if not job_id:
+            return None
+
+        return {
+            'id': job_id,
+            'task': job_data.get('task'),
+            'status': job_data.get('status'),
+            'created_at': job_data.get('created_at'),
+            'updated_at': job_data.get('updated_at'),
+            'file': job_file,
+            'mtime': mtime
+        }
+
+    @_synchronized
     def create_job(self, task: str) -> str:
         """
         Create a new job with the given task description.
@@ -74,6 +365,8 @@ class JobManager:
             'updated_at': timestamp,
             'plan': [],
             'steps': [],
+            'counters': {status.value: 0 for status in StepStatus},
+            'next_pending_index': 0,
             'memory_context': [],
             'artifacts': [],
             'metadata': {}
@@ -88,16 +381,21 @@ class JobManager:
             'updated_at': timestamp,
             'file': f"{job_id}.json"
         }
+        bisect.insort(self._created_order, (timestamp, job_id))
 
         # Save to file
         self._save_job(job_id, job_data)
 
         return job_id
 
+    @_synchronized
     def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
         """
         Get the full details of a specific job.
 
+        The returned dictionary is the cached copy the manager itself updates,
+        so callers must treat it as read-only.
+
         Args:
             job_id: The ID of the job to retrieve
 
@@ -107,14 +405,108 @@ class JobManager:
         if job_id not in self.jobs_index:
             return None
 
-        job_file = self.jobs_index[job_id]['file']
+        job_data = self._job_cache.get(job_id)
+        if job_data is not None:
+            self._job_cache.move_to_end(job_id)
+            return job_data
+
+        job_data = self._read_job(job_id)
+        if job_data is not None:
+            self._synced_status[job_id] = job_data.get('status')
+            self._cache_job(job_id, job_data)
+        return job_data
+
+    def _read_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Read a job from its file and log, or return None if it can't be read."""
+        job_path = os.path.join(self.jobs_dir, self.jobs_index[job_id]['file'])
         try:
-            with open(os.path.join(self.jobs_dir, job_file), 'r') as f:
-                return json.load(f)
+            with open(job_path, 'rb') as f:
+                job_data = orjson.loads(f.read())
+            _replay_log(job_data, job_path + LOG_SUFFIX)
+            return job_data
         except Exception as e:
             print(f"Error loading job {job_id}: {e}")
             return None
 
+    def _cache_job(self, job_id: str, job_data: Dict[str, Any]):
+        self._job_cache[job_id] = job_data
+        self._job_cache.move_to_end(job_id)
+        if len(self._job_cache) > JOB_CACHE_SIZE:
+            evicted_id, evicted_data = self._job_cache.popitem(last=False)
+            # Don't lose changes that haven't been flushed yet
+            if evicted_id in self._dirty:
+                self._dirty.discard(evicted_id)
+                self._merge_stored_status(evicted_id, evicted_data)
+                self._persist_job(evicted_id, evicted_data)
+
+    @_synchronized
+    def peek_status(self, job_id: str) -> Optional[str]:
+        """
+        Get the current status of a job from the store.
+
+        Cheap enough to poll between steps: the job file is only re-read when
+        another process changed it, and a status set there (e.g. by an abort)
+        replaces the one in this manager's copy of the job.
+
+        Args:
+            job_id: The ID of the job
+
+        Returns:
+            The status value, or None if the job is not found
+        """
+        entry = self.jobs_index.get(job_id)
+        if entry is None:
+            return None
+        self._merge_stored_status(job_id)
+        return entry['status']
+
+    def _merge_stored_status(self, job_id: str, job_data: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        Adopt a status another process stored for a job since this manager last read or wrote it.
+
+        Other processes only change a job's status behind a running manager, so
+        their status wins and everything else in this manager's copy is kept.
+
+        Args:
+            job_id: The ID of the job
+            job_data: This manager's copy of the job (defaults to the cached one)
+
+        Returns:
+            True if the stored status was adopted
+        """
+        stored = self._stored_status(job_id)
+        if stored is None or stored == self._synced_status.get(job_id):
+            return False
+
+        self._synced_status[job_id] = stored
+        if job_data is None:
+            job_data = self._job_cache.get(job_id)
+        if job_data is not None:
+            job_data['status'] = stored
+            # The store no longer matches what this manager's log was written against
+            self._record_change(job_id, None)
+        entry = self.jobs_index[job_id]
+        if entry['status'] != stored:
+            entry['status'] = stored
+            self._index_dirty = True
+        return True
+
+    def _stored_status(self, job_id: str) -> Optional[str]:
+        """Get a job's status from its file and log, or None if it has no file."""
+        job_path = os.path.join(self.jobs_dir, self.jobs_index[job_id]['file'])
+        stamp = _file_stamp(job_path)
+        if stamp is None:
+            return None
+        if stamp == self._store_stamps.get(job_id):
+            return self._synced_status.get(job_id)
+
+        job_data = self._read_job(job_id)
+        if job_data is None:
+            return None
+        self._store_stamps[job_id] = stamp
+        return job_data.get('status')
+
+    @_synchronized
     def list_jobs(self, limit: int = 20, status: Optional[JobStatus] = None) -> List[Dict[str, Any]]:
         """
         List jobs, optionally filtered by status.
@@ -126,18 +518,43 @@ class JobManager:
         Returns:
             List of job summary dictionaries
         """
-        jobs = list(self.jobs_index.values())
+        return list(itertools.islice(self.iter_jobs(status), limit))
 
-        # Apply status filter if provided
-        if status:
-            status_value = status.value if isinstance(status, JobStatus) else status
-            jobs = [job for job in jobs if job['status'] == status_value]
+    def iter_jobs(self, status: Optional[JobStatus] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Yield job summaries newest first, optionally filtered by status.
 
-        # Sort by creation time (newest first)
-        jobs.sort(key=lambda x: x.get('created_at', ''), reverse=True)
+        Jobs are produced lazily, so callers that stop early never touch the
+        rest of the index. The lock is only held while fetching each job, and
+        the walk resumes from the last job yielded, so jobs created or deleted
+        in between are handled.
 
-        return jobs[:limit]
+        Args:
+            status: Filter by status (optional)
+
+        Yields:
+            Job summary dictionaries
+        """
+        status_value = None
+        if status:
+            status_value = status.value if isinstance(status, JobStatus) else status
 
+        position = None
+        while True:
+            with self._lock:
+                if position is None:
+                    end = len(self._created_order)
+                else:
+                    end = bisect.bisect_left(self._created_order, position)
+                if end == 0:
+                    return
+                position = self._created_order[end - 1]
+                job = self.jobs_index.get(position[1])
+
+            if job and (status_value is None or job['status'] == status_value):
+                yield job
+
+    @_synchronized
     def update_job_status(self, job_id: str, status: JobStatus) -> bool:
         """
         Update the status of a job.
@@ -161,15 +578,20 @@ class JobManager:
             self.jobs_index[job_id]['status'] = status.value
             self.jobs_index[job_id]['updated_at'] = job_data['updated_at']
 
-        return self._save_job(job_id, job_data)
+        return self._save_job(job_id, job_data, {
+            'set': {'status': job_data['status'], 'updated_at': job_data['updated_at']}
+        })
 
-    def set_job_plan(self, job_id: str, plan: List[str]) -> bool:
+    @_synchronized
+    def set_job_plan(self, job_id: str, plan: List[str], dependencies: Optional[List[List[int]]] = None) -> bool:
         """
         Set the plan for a job.
 
         Args:
             job_id: The ID of the job to update
             plan: List of step descriptions
+            dependencies: Indices of the steps each step depends on (optional,
+                          defaults to each step depending on the previous one)
 
         Returns:
             True if successful, False otherwise
@@ -183,17 +605,12 @@ class JobManager:
 
         # Initialize steps with pending status
         job_data['steps'] = [
-            {
-                'index': i,
-                'description': step,
-                'status': StepStatus.PENDING.value,
-                'result': None,
-                'started_at': None,
-                'completed_at': None,
-                'duration': None
-            }
+            _new_step(i, step, dependencies[i] if dependencies else ([i - 1] if i > 0 else []))
             for i, step in enumerate(plan)
         ]
+        job_data['counters'] = {status.value: 0 for status in StepStatus}
+        job_data['counters'][_STEP_PENDING] = len(plan)
+        job_data['next_pending_index'] = 0
 
         # Update job status to reflect we now have a plan
         job_data['status'] = JobStatus.RUNNING.value
@@ -203,8 +620,89 @@ class JobManager:
             self.jobs_index[job_id]['status'] = job_data['status']
             self.jobs_index[job_id]['updated_at'] = job_data['updated_at']
 
-        return self._save_job(job_id, job_data)
+        fields = ('plan', 'steps', 'counters', 'next_pending_index', 'status', 'updated_at')
+        return self._save_job(job_id, job_data, {'set': {key: job_data[key] for key in fields}})
+
+    @_synchronized
+    def add_plan_step(self, job_id: str, step: str, depends_on: Optional[List[int]] = None) -> bool:
+        """
+        Append a step to the plan of a job that is still being planned.
+
+        Used when the plan is streamed in from the LLM so that early steps can
+        start before planning has finished. The job stays in the planning state
+        until finish_plan is called.
+
+        Args:
+            job_id: The ID of the job to update
+            step: Description of the step
+            depends_on: Indices of the steps this step depends on (optional,
+                        defaults to the previous step)
+
+        Returns:
+            True if successful, False otherwise
+        """
+        job_data = self.get_job(job_id)
+        if not job_data:
+            return False
+
+        index = len(job_data['steps'])
+        if depends_on is None:
+            depends_on = [index - 1] if index > 0 else []
+
+        counters = _step_counters(job_data)
+        new_step = _new_step(index, step, depends_on)
+        job_data['plan'].append(step)
+        job_data['steps'].append(new_step)
+        counters[_STEP_PENDING] += 1
+        job_data['updated_at'] = datetime.now().isoformat()
+
+        # Update in-memory index
+        if job_id in self.jobs_index:
+            self.jobs_index[job_id]['updated_at'] = job_data['updated_at']
+
+        return self._save_job(job_id, job_data, {
+            'set': {'counters': counters, 'updated_at': job_data['updated_at']},
+            'put': {'plan': (index, step), 'steps': (index, new_step)}
+        })
+
+    @_synchronized
+    def finish_plan(self, job_id: str) -> bool:
+        """
+        Mark the plan of a job built with add_plan_step as complete.
+
+        The job moves to running, or straight to its final status if every
+        step already finished while the plan was streaming in.
+
+        Args:
+            job_id: The ID of the job to update
+
+        Returns:
+            True if successful, False otherwise
+        """
+        job_data = self.get_job(job_id)
+        if not job_data:
+            return False
+
+        counters = _step_counters(job_data)
+        if job_data['status'] == _JOB_PLANNING:
+            unfinished = counters[_STEP_PENDING] + counters[_STEP_RUNNING]
+            if job_data['steps'] and unfinished == 0:
+                any_failed = counters[_STEP_FAILED] > 0
+                job_data['status'] = JobStatus.FAILED.value if any_failed else JobStatus.COMPLETED.value
+            else:
+                job_data['status'] = JobStatus.RUNNING.value
+        job_data['updated_at'] = datetime.now().isoformat()
+
+        # Update in-memory index
+        if job_id in self.jobs_index:
+            self.jobs_index[job_id]['status'] = job_data['status']
+            self.jobs_index[job_id]['updated_at'] = job_data['updated_at']
+
+        return self._save_job(job_id, job_data, {
+            'set': {'counters': counters, 'status': job_data['status'], 'updated_at': job_data['updated_at']}
+        })
 
+    @_synchronized
     def start_step(self, job_id: str, step_index: int) -> bool:
         """
         Mark a step as starting execution.
@@ -220,16 +718,31 @@ class JobManager:
         if not job_data or 'steps' not in job_data or step_index >= len(job_data['steps']):
             return False
 
-        job_data['steps'][step_index]['status'] = StepStatus.RUNNING.value
-        job_data['steps'][step_index]['started_at'] = datetime.now().isoformat()
-        job_data['updated_at'] = datetime.now().isoformat()
+        now = time.time()
+        timestamp = datetime.fromtimestamp(now).isoformat()
+
+        step = job_data['steps'][step_index]
+        _set_step_status(job_data, step, _STEP_RUNNING)
+        step['started_at'] = timestamp
+        step['started_ts'] = now
+        if step_index == job_data.get('next_pending_index', 0):
+            _advance_pending_cursor(job_data)
+        job_data['updated_at'] = timestamp
 
         # Update in-memory index
         if job_id in self.jobs_index:
             self.jobs_index[job_id]['updated_at'] = job_data['updated_at']
 
-        return self._save_job(job_id, job_data)
+        return self._save_job(job_id, job_data, {
+            'set': {
+                'counters': job_data['counters'],
+                'next_pending_index': job_data.get('next_pending_index', 0),
+                'updated_at': timestamp
+            },
+            'step': (step_index, {'status': _STEP_RUNNING, 'started_at': timestamp, 'started_ts': now})
+        })
 
+    @_synchronized
     def complete_step(self, job_id: str, step_index: int, result: str, status: StepStatus = StepStatus.COMPLETED) -> bool:
         """
         Mark a step as completed with results.
@@ -247,34 +760,37 @@ class JobManager:
         if not job_data or 'steps' not in job_data or step_index >= len(job_data['steps']):
             return False
 
-        timestamp = datetime.now().isoformat()
+        now = time.time()
+        timestamp = datetime.fromtimestamp(now).isoformat()
 
-        # Calculate duration
-        started_at = job_data['steps'][step_index].get('started_at')
-        if started_at:
-            started_time = datetime.fromisoformat(started_at)
-            completed_time = datetime.now()
-            duration_seconds = (completed_time - started_time).total_seconds()
+        # Calculate duration (steps started before started_ts existed only have the ISO time)
+        step = job_data['steps'][step_index]
+        if step.get('started_ts') is not None:
+            duration_seconds = now - step['started_ts']
+        elif step.get('started_at'):
+            duration_seconds = now - datetime.fromisoformat(step['started_at']).timestamp()
         else:
             duration_seconds = None
 
-        job_data['steps'][step_index].update({
-            'status': status.value,
+        _set_step_status(job_data, step, status.value)
+        step_fields = {
             'result': result,
             'completed_at': timestamp,
             'duration': duration_seconds
-        })
+        }
+        step.update(step_fields)
 
         job_data['updated_at'] = timestamp
 
         # Check if all steps are completed
-        all_completed = all(step['status'] in [StepStatus.COMPLETED.value, StepStatus.FAILED.value]
-                           for step in job_data['steps'])
+        counters = _step_counters(job_data)
+        all_completed = counters[_STEP_PENDING] + counters[_STEP_RUNNING] == 0
 
-        any_failed = any(step['status'] == StepStatus.FAILED.value for step in job_data['steps'])
+        any_failed = counters[_STEP_FAILED] > 0
 
-        # Update job status if needed
-        if all_completed:
+        # Update job status if needed (a plan still streaming in may get more steps)
+        finished = all_completed and job_data['status'] != _JOB_PLANNING
+        if finished:
             job_data['status'] = JobStatus.FAILED.value if any_failed else JobStatus.COMPLETED.value
 
             # Update in-memory index
@@ -285,8 +801,18 @@ class JobManager:
         if job_id in self.jobs_index:
             self.jobs_index[job_id]['updated_at'] = job_data['updated_at']
 
-        return self._save_job(job_id, job_data)
+        step_fields['status'] = status.value
+        success = self._save_job(job_id, job_data, {
+            'set': {'counters': counters, 'status': job_data['status'], 'updated_at': timestamp},
+            'step': (step_index, step_fields)
+        })
 
+        # Write finished jobs out right away
+        if finished:
+            return self.flush() and success
+        return success
+
+    @_synchronized
     def add_artifact(self, job_id: str, artifact_type: str, name: str, path: str, metadata: Dict = None) -> bool:
         """
         Add an artifact (file or output) to a job.
@@ -305,23 +831,29 @@ class JobManager:
         if not job_data:
             return False
 
+        timestamp = datetime.now().isoformat()
         artifact = {
             'type': artifact_type,
             'name': name,
             'path': path,
-            'created_at': datetime.now().isoformat(),
+            'created_at': timestamp,
             'metadata': metadata or {}
         }
 
+        index = len(job_data['artifacts'])
         job_data['artifacts'].append(artifact)
-        job_data['updated_at'] = datetime.now().isoformat()
+        job_data['updated_at'] = timestamp
 
         # Update in-memory index
         if job_id in self.jobs_index:
             self.jobs_index[job_id]['updated_at'] = job_data['updated_at']
 
-        return self._save_job(job_id, job_data)
+        return self._save_job(job_id, job_data, {
+            'set': {'updated_at': timestamp},
+            'put': {'artifacts': (index, artifact)}
+        })
 
+    @_synchronized
     def set_memory_context(self, job_id: str, memory_context: List[str]) -> bool:
         """
         Set the memory context used for a job.
@@ -344,7 +876,9 @@ class JobManager:
         if job_id in self.jobs_index:
             self.jobs_index[job_id]['updated_at'] = job_data['updated_at']
 
-        return self._save_job(job_id, job_data)
+        return self._save_job(job_id, job_data, {
+            'set': {'memory_context': memory_context, 'updated_at': job_data['updated_at']}
+        })
 
     def abort_job(self, job_id: str) -> bool:
         """
@@ -356,7 +890,8 @@ class JobManager:
         Returns:
             True if successful, False otherwise
         """
-        return self.update_job_status(job_id, JobStatus.ABORTED)
+        success = self.update_job_status(job_id, JobStatus.ABORTED)
+        return self.flush() and success
 
     def pause_job(self, job_id: str) -> bool:
         """
@@ -382,6 +917,7 @@ class JobManager:
         """
         return self.update_job_status(job_id, JobStatus.RUNNING)
 
+    @_synchronized
     def get_next_pending_step(self, job_id: str) -> Optional[Dict[str, Any]]:
         """
         Get the next pending step for a job.
@@ -396,12 +932,49 @@ class JobManager:
         if not job_data or 'steps' not in job_data:
             return None
 
-        for step in job_data['steps']:
-            if step['status'] == StepStatus.PENDING.value:
-                return step
+        cursor = _advance_pending_cursor(job_data)
+        if cursor < len(job_data['steps']):
+            return job_data['steps'][cursor]
 
         return None
 
+    def get_step(self, job_id: str, step_index: int) -> Optional[Dict[str, Any]]:
+        """
+        Get a single step of a job.
+
+        Args:
+            job_id: The ID of the job
+            step_index: The index of the step
+
+        Returns:
+            Dictionary with step details or None if the job or step doesn't exist
+        """
+        job_data = self.get_job(job_id)
+        if not job_data or step_index < 0 or step_index >= len(job_data.get('steps', [])):
+            return None
+
+        return job_data['steps'][step_index]
+
+    def get_pending_steps(self, job_id: str) -> List[tuple]:
+        """
+        Get the steps of a job that still need to run.
+
+        Steps left running by an interrupted run count as pending.
+
+        Args:
+            job_id: The ID of the job
+
+        Returns:
+            List of (step index, step description) tuples in plan order
+        """
+        job_data = self.get_job(job_id)
+        if not job_data:
+            return []
+
+        return [(step['index'], step['description']) for step in job_data.get('steps', [])
+                if step['status'] in UNFINISHED_STEP_STATUSES]
+
+    @_synchronized
     def set_metadata(self, job_id: str, key: str, value: Any) -> bool:
         """
         Set a metadata value for a job.
@@ -428,11 +1001,144 @@ class JobManager:
         if job_id in self.jobs_index:
             self.jobs_index[job_id]['updated_at'] = job_data['updated_at']
 
-        return self._save_job(job_id, job_data)
+        return self._save_job(job_id, job_data, {
+            'set': {'updated_at': job_data['updated_at']},
+            'metadata': {key: value}
+        })
+
+    def _save_job(self, job_id: str, job_data: Dict[str, Any], change: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        Save job data, writing it to file on the next flush.
+
+        Args:
+            job_id: The ID of the job
+            job_data: The job data to save
+            change: Record of what changed, for the job's log (optional; without
+                    one the whole job is written on the next flush)
+
+        Returns:
+            True if successful, False otherwise
+        """
+        # The cache always holds the latest version; disk catches up on flush
+        self._cache_job(job_id, job_data)
+        self._dirty.add(job_id)
+        self._record_change(job_id, change)
+        return True
+
+    def _record_change(self, job_id: str, change: Optional[Dict[str, Any]]):
+        """Queue a change record for the job's log, encoded now while it matches the job."""
+        if change is None:
+            self._changes[job_id] = None
+            return
+        records = self._changes.setdefault(job_id, [])
+        if records is not None:
+            records.append(orjson.dumps(change))
+
+    @_synchronized
+    def flush(self) -> bool:
+        """
+        Write every job changed since the last flush to its file.
 
-    def _save_job(self, job_id: str, job_data: Dict[str, Any]) -> bool:
+        Jobs with a log are rewritten as well and their logs removed, so after
+        a flush every job file is complete on its own. A status another process
+        stored in the meantime is kept rather than overwritten.
+
+        Returns:
+            True if all writes succeeded, False otherwise
         """
-        Save job data to file.
+        success = True
+        dirty, self._dirty = self._dirty, set()
+        for job_id in dirty | self._log_lengths.keys():
+            if job_id not in self.jobs_index:
+                continue
+            job_data = self._job_cache.get(job_id) or self._read_job(job_id)
+            if job_data is not None:
+                self._merge_stored_status(job_id, job_data)
+                success = self._persist_job(job_id, job_data) and success
+
+        if self._index_dirty:
+            success = self._write_index() and success
+        return success
+
+    @_synchronized
+    def _write_changes(self) -> bool:
+        """
+        Append the changes made since the last write to the logs of changed jobs.
+
+        This is what the background flush thread does, so a running job costs a
+        small append per step change rather than a rewrite of its file. Jobs
+        without a file yet, or whose log has grown past LOG_COMPACT_RECORDS,
+        are written whole instead.
+
+        Returns:
+            True if all writes succeeded, False otherwise
+        """
+        success = True
+        dirty, self._dirty = self._dirty, set()
+        for job_id in dirty:
+            job_data = self._job_cache.get(job_id)
+            if job_data is None or job_id not in self.jobs_index:
+                continue
+            self._merge_stored_status(job_id, job_data)
+            records = self._changes.pop(job_id, None)
+            if records is None or self._log_lengths.get(job_id, 0) + len(records) > LOG_COMPACT_RECORDS:
+                success = self._persist_job(job_id, job_data) and success
+            elif self._append_log(job_id, records):
+                self._synced_status[job_id] = job_data.get('status')
+            else:
+                success = False
+
+        if self._index_dirty:
+            success = self._write_index() and success
+        return success
+
+    def _append_log(self, job_id: str, records: List[bytes]) -> bool:
+        """Append encoded change records to a job's log."""
+        log_path = os.path.join(self.jobs_dir, self.jobs_index[job_id]['file'] + LOG_SUFFIX)
+        try:
+            with open(log_path, 'ab') as f:
+                f.write(b'\n'.join(records) + b'\n')
+                log_size = f.tell()
+            self._log_lengths[job_id] = self._log_lengths.get(job_id, 0) + len(records)
+            stamp = self._store_stamps.get(job_id)
+            if stamp is not None:
+                self._store_stamps[job_id] = stamp[:2] + (log_size,)
+            return True
+        except Exception as e:
+            print(f"Error writing log of job {job_id}: {e}")
+            # Write the whole job on the next flush instead
+            self._changes[job_id] = None
+            self._dirty.add(job_id)
+            return False
+
+    def _write_index(self) -> bool:
+        """Write the in-memory index to the index file, atomically replacing the old one."""
+        index_path = os.path.join(self.jobs_dir, INDEX_FILE)
+        tmp_path = f"{index_path}.tmp-{os.getpid()}"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(orjson.dumps(self.jobs_index))
+            os.replace(tmp_path, index_path)
+            self._index_dirty = False
+            return True
+        except Exception as e:
+            print(f"Error saving job index: {e}")
+            return False
+
+    def close(self):
+        """Flush pending changes and stop the background flush thread."""
+        self._closed.set()
+        self._flush_thread.join()
+        self.flush()
+
+    def _flush_loop(self):
+        while not self._closed.wait(FLUSH_INTERVAL):
+            if self._dirty:
+                self._write_changes()
+
+    def _persist_job(self, job_id: str, job_data: Dict[str, Any]) -> bool:
+        """
+        Write job data to file.
 
         Args:
             job_id: The ID of the job
@@ -444,19 +1150,36 @@ class JobManager:
         job_file = f"{job_id}.json"
         job_path = os.path.join(self.jobs_dir, job_file)
 
+        # Write to a temporary file and rename it over the job file, so a crash
+        # mid-write never leaves a truncated job behind
+        tmp_path = f"{job_path}.tmp-{os.getpid()}"
         try:
-            with open(job_path, 'w') as f:
-                json.dump(job_data, f, indent=2)
-
-            # Update file name in index if needed
-            if job_id in self.jobs_index and self.jobs_index[job_id]['file'] != job_file:
+            with open(tmp_path, 'wb') as f:
+                f.write(orjson.dumps(job_data))
+                f.flush()
+                stat = os.fstat(f.fileno())
+                mtime = stat.st_mtime_ns
+            os.replace(tmp_path, job_path)
+
+            # The file now holds every logged change
+            if self._log_lengths.pop(job_id, None) is not None or os.path.exists(job_path + LOG_SUFFIX):
+                os.remove(job_path + LOG_SUFFIX)
+            self._changes.pop(job_id, None)
+            self._store_stamps[job_id] = (stat.st_ino, mtime, None)
+            self._synced_status[job_id] = job_data.get('status')
+
+            # Update file name and modification time in index
+            if job_id in self.jobs_index:
                 self.jobs_index[job_id]['file'] = job_file
+                self.jobs_index[job_id]['mtime'] = mtime
+                self._index_dirty = True
 
             return True
         except Exception as e:
             print(f"Error saving job {job_id}: {e}")
             return False
 
+    @_synchronized
     def delete_job(self, job_id: str) -> bool:
         """
         Delete a job.
@@ -470,16 +1193,234 @@ class JobManager:
         if job_id not in self.jobs_index:
             return False
 
-        job_file = self.jobs_index[job_id]['file']
-        job_path = os.path.join(self.jobs_dir, job_file)
+        try:
+            self._remove_job(job_id)
+
+            # Remove from index and cache
+            entry = self.jobs_index.pop(job_id)
+            order_key = (entry.get('created_at') or '', job_id)
+            position = bisect.bisect_left(self._created_order, order_key)
+            if position < len(self._created_order) and self._created_order[position] == order_key:
+                del self._created_order[position]
+            self._job_cache.pop(job_id, None)
+            self._dirty.discard(job_id)
+            self._changes.pop(job_id, None)
+            self._log_lengths.pop(job_id, None)
+            self._synced_status.pop(job_id, None)
+            self._store_stamps.pop(job_id, None)
+            self._index_dirty = True
+            return True
+        except Exception as e:
+            print(f"Error deleting job {job_id}: {e}")
+            return False
+
+    def _remove_job(self, job_id: str):
+        """Remove a job's file and log."""
+        job_path = os.path.join(self.jobs_dir, self.jobs_index[job_id]['file'])
+        for path in (job_path, job_path + LOG_SUFFIX):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+class SqliteJobManager(JobManager):
+    """
+    JobManager that keeps every job in a single SQLite database.
+
+    Each job is one row holding its index fields as columns and the full job
+    as an orjson-encoded body, so a flush is one transaction instead of a file
+    rewrite per job, and listing jobs is an indexed query. Job files left by
+    the JSON-backed JobManager are imported the first time the database is
+    opened.
+    """
+
+    def __init__(self, jobs_dir="workspace/jobs", db_path=None):
+        """
+        Args:
+            jobs_dir: Directory holding the database (and any legacy job files)
+            db_path: Path of the database file (defaults to jobs.db in jobs_dir)
+        """
+        os.makedirs(jobs_dir, exist_ok=True)
+        self.db_path = db_path or os.path.join(jobs_dir, "jobs.db")
+
+        # Shared by the caller's threads and the flush thread; every use holds the manager's lock
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, task TEXT, status TEXT, "
+                "created_at TEXT, updated_at TEXT, body BLOB)"
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS jobs_created ON jobs (created_at)")
+
+        super().__init__(jobs_dir)
+
+    def _load_jobs_index(self):
+        """Load the index fields of every job from the database."""
+        if self.conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0] == 0:
+            self._import_json_jobs()
+
+        for row in self.conn.execute(f"SELECT {SUMMARY_COLUMNS} FROM jobs"):
+            self.jobs_index[row[0]] = self._summary(row)
+
+    def _import_json_jobs(self):
+        """Import job files written by the JSON-backed JobManager into an empty database."""
+        rows = []
+        with os.scandir(self.jobs_dir) as entries:
+            for entry in entries:
+                if not entry.name.endswith('.json') or entry.name == INDEX_FILE or not entry.is_file():
+                    continue
+                try:
+                    with open(entry.path, 'rb') as f:
+                        job_data = orjson.loads(f.read())
+                    _replay_log(job_data, entry.path + LOG_SUFFIX)
+                except Exception as e:
+                    print(f"Error importing job file {entry.name}: {e}")
+                    continue
+                if job_data.get('id'):
+                    rows.append(self._job_row(job_data['id'], job_data))
+
+        if rows:
+            with self.conn:
+                self.conn.executemany(UPSERT_JOB_SQL, rows)
+            print(f"Imported {len(rows)} jobs into {self.db_path}")
+
+    @_synchronized
+    def list_jobs(self, limit: int = 20, status: Optional[JobStatus] = None) -> List[Dict[str, Any]]:
+        """
+        List jobs, optionally filtered by status.
+
+        Args:
+            limit: Maximum number of jobs to return
+            status: Filter by status (optional)
+
+        Returns:
+            List of job summary dictionaries
+        """
+        # Make sure the table reflects changes still waiting for the flush thread
+        self.flush()
+
+        if status:
+            status_value = status.value if isinstance(status, JobStatus) else status
+            rows = self.conn.execute(
+                f"SELECT {SUMMARY_COLUMNS} FROM jobs WHERE status = ? ORDER BY created_at DESC LIMIT ?",
+                (status_value, limit)
+            ).fetchall()
+        else:
+            rows = self.conn.execute(
+                f"SELECT {SUMMARY_COLUMNS} FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+
+        # Other processes may have created or changed these jobs since the index was loaded
+        return [self._refresh_summary(row) for row in rows]
+
+    def _refresh_summary(self, row: tuple) -> Dict[str, Any]:
+        """Bring a job's index entry up to date with its row and return it."""
+        job_id, task, status, created_at, updated_at = row
+        entry = self.jobs_index.get(job_id)
+        if entry is None:
+            entry = self.jobs_index[job_id] = self._summary(row)
+            bisect.insort(self._created_order, (created_at or '', job_id))
+            return entry
+
+        if entry['status'] != status:
+            # Also updates the cached copy of the job
+            self._merge_stored_status(job_id)
+        entry.update(task=task, status=status, updated_at=updated_at)
+        return entry
+
+    @staticmethod
+    def _summary(row: tuple) -> Dict[str, Any]:
+        job_id, task, status, created_at, updated_at = row
+        return {
+            'id': job_id,
+            'task': task,
+            'status': status,
+            'created_at': created_at,
+            'updated_at': updated_at,
+            'file': f"{job_id}.json"
+        }
+
+    def _read_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Read a job's body from the database, or return None if it can't be read."""
+        try:
+            row = self.conn.execute("SELECT body FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            return orjson.loads(row[0]) if row else None
+        except Exception as e:
+            print(f"Error loading job {job_id}: {e}")
+            return None
 
+    def _stored_status(self, job_id: str) -> Optional[str]:
+        """Get a job's status column, or None if it has no row yet."""
         try:
-            if os.path.exists(job_path):
-                os.remove(job_path)
+            row = self.conn.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            return row[0] if row else None
+        except Exception as e:
+            print(f"Error loading status of job {job_id}: {e}")
+            return None
+
+    @_synchronized
+    def flush(self) -> bool:
+        """
+        Write every job changed since the last flush in a single transaction.
 
-            # Remove from index
-            del self.jobs_index[job_id]
+        A status another process stored in the meantime is kept rather than
+        overwritten.
+
+        Returns:
+            True if successful, False otherwise
+        """
+        dirty, self._dirty = self._dirty, set()
+        job_ids = [job_id for job_id in dirty if job_id in self._job_cache and job_id in self.jobs_index]
+        if not job_ids:
+            return True
+
+        try:
+            with self.conn:
+                # Hold the write lock from reading the stored statuses to writing the
+                # rows, so a status another process stores can't be overwritten
+                self.conn.execute("BEGIN IMMEDIATE")
+                for job_id in job_ids:
+                    self._merge_stored_status(job_id)
+                rows = [self._job_row(job_id, self._job_cache[job_id]) for job_id in job_ids]
+                self.conn.executemany(UPSERT_JOB_SQL, rows)
+            for row in rows:
+                self._synced_status[row[0]] = row[2]
             return True
         except Exception as e:
-            print(f"Error deleting job {job_id}: {e}")
+            print(f"Error saving jobs: {e}")
+            self._dirty.update(job_ids)
             return False
+
+    def _record_change(self, job_id: str, change: Optional[Dict[str, Any]]):
+        # Changed rows are rewritten in one transaction per flush; there is no log
+        pass
+
+    def _write_changes(self) -> bool:
+        return self.flush()
+
+    def _persist_job(self, job_id: str, job_data: Dict[str, Any]) -> bool:
+        try:
+            with self.conn:
+                self.conn.execute(UPSERT_JOB_SQL, self._job_row(job_id, job_data))
+            self._synced_status[job_id] = job_data.get('status')
+            return True
+        except Exception as e:
+            print(f"Error saving job {job_id}: {e}")
+            return False
+
+    def _remove_job(self, job_id: str):
+        with self.conn:
+            self.conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+
+    def close(self):
+        """Flush pending changes, stop the flush thread and close the database."""
+        super().close()
+        self.conn.close()
+
+    @staticmethod
+    def _job_row(job_id: str, job_data: Dict[str, Any]) -> tuple:
+        return (job_id, job_data.get('task'), job_data.get('status'), job_data.get('created_at'),
+                job_data.get('updated_at'), orjson.dumps(job_data))
@@ -1,61 +1,53 @@
 # llama_dev_agent.py
 
 import os
-import sys
 from models.llama3_runner import LlamaRunner
 from memory import Memory
 from tasks import TaskPlanner
-from tools.exec import run_code
-from tools.file_ops import write_file, read_file
-import json
+import orjson
 import argparse
 
-
-
 # Init components
 llm = LlamaRunner(model_name="llama3:8b")  # adjust if you have llama3:70b or others
 memory = Memory()
 planner = TaskPlanner(llm)
 
 PLAN_PATH = "workspace/plan.json"
-RESULTS_PATH = "workspace/results.json"
-
-# CLI loop
-# def main():
-#     print("\n🧠 LLaMA Dev Agent Ready. Type a task (e.g., 'create a Flask app'). Type 'exit' to quit.\n")
-#
-#     while True:
-#         user_input = input(">> ").strip()
-#         if user_input.lower() in ["exit", "quit"]:
-#             break
-#
-#         memory.log_task(user_input)
-#
-#         # similar = memory.search_memory(user_input)
-#         # if similar:
-#         #     print("🔍 I found similar tasks in memory:")
-#         #     for match in similar:
-#         #         print(f"- {match}")
-#         #     print()
-#         # print("\n🛠️  Planning task...\n")
-#         # plan = planner.plan_task(user_input)
-#         # memory.log_plan(plan)
-#         similar = memory.search_memory(user_input)
-#         if similar:
-#             print("🔍 Found similar tasks in memory:")
-#             for i, match in enumerate(similar, 1):
-#                 print(f"{i}. {match[:200]}{'...' if len(match) > 200 else ''}")
-#             print()
-#
-#         print("\n🛠️  Planning task...\n")
-#         plan = planner.plan_task(user_input, memory_context=similar)
-#         memory.log_plan(plan)
-#
-#         for step_num, step in enumerate(plan, 1):
-#             print(f"➡️ Step {step_num}: {step}")
-#             result = planner.execute_step(step)
-#             memory.log_result(step, result)
-#             print(f"✅ Result: {result}\n")
+RESULTS_PATH = "workspace/results.jsonl"
+RESULT_BATCH_SIZE = 16  # step results embedded and stored per memory batch
+
+
+def _log_result(memory, pending_results, step, result):
+    """Queue a step result for memory, logging the queue in one batch once it is full."""
+    pending_results.append((step, result))
+    if len(pending_results) >= RESULT_BATCH_SIZE:
+        memory.log_results_bulk(pending_results)
+        return []
+    return pending_results
+
+
+def _append_result(fp, step, result):
+    """Append one step result as a JSONL line and flush it to disk."""
+    fp.write(orjson.dumps({"step": step, "result": result}))
+    fp.write(b"\n")
+    fp.flush()
+
+
+def _read_completed_steps():
+    """Return the set of steps already recorded in the results file."""
+    completed = set()
+    if not os.path.exists(RESULTS_PATH):
+        return completed
+    with open(RESULTS_PATH, "rb") as f:
+        for line in f:
+            # A torn last line from an interrupted run is just re-executed
+            try:
+                completed.add(orjson.loads(line)["step"])
+            except (orjson.JSONDecodeError, KeyError, TypeError):
+                continue
+    return completed
+
+
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("--resume", action="store_true", help="Resume last unfinished task")
@@ -64,23 +56,21 @@ def main():
 
     if args.resume and os.path.exists(PLAN_PATH):
         print("🔄 Resuming previous task...\n")
-        with open(PLAN_PATH, "r") as f:
-            plan = json.load(f)
-        completed_steps = []
-        if os.path.exists(RESULTS_PATH):
-            with open(RESULTS_PATH, "r") as f:
-                completed_steps = json.load(f)
-
-        for step_num, step in enumerate(plan, 1):
-            if any(r["step"] == step for r in completed_steps):
-                continue
-            print(f"➡️ Step {step_num}: {step}")
-            result = planner.execute_step(step)
-            memory.log_result(step, result)
-            completed_steps.append({"step": step, "result": result})
-            with open(RESULTS_PATH, "w") as f:
-                json.dump(completed_steps, f, indent=2)
-            print(f"✅ Result: {result}\n")
+        with open(PLAN_PATH, "rb") as f:
+            plan = orjson.loads(f.read())
+        completed_steps = _read_completed_steps()
+
+        pending_results = []
+        with open(RESULTS_PATH, "ab") as results_fp:
+            for step_num, step in enumerate(plan, 1):
+                if step in completed_steps:
+                    continue
+                print(f"➡️ Step {step_num}: {step}")
+                result = planner.execute_step(step)
+                pending_results = _log_result(memory, pending_results, step, result)
+                _append_result(results_fp, step, result)
+                print(f"✅ Result: {result}\n")
+        memory.log_results_bulk(pending_results)
         return
 
     if args.retry is not None:
@@ -88,14 +78,14 @@ def main():
         if not os.path.exists(PLAN_PATH):
             print("❌ No plan to retry from.")
             return
-        with open(PLAN_PATH, "r") as f:
-            plan = json.load(f)
+        with open(PLAN_PATH, "rb") as f:
+            plan = orjson.loads(f.read())
         if step_idx >= len(plan):
             print("❌ Invalid step number.")
             return
         step = plan[step_idx]
         print(f"🔁 Retrying step {args.retry}: {step}")
-        result = planner.execute_step(step)
+        result = planner.execute_step(step, fresh=True)
         memory.log_result(step, result)
         return
 
@@ -119,18 +109,19 @@ def main():
         plan = planner.plan_task(user_input, memory_context=similar)
         memory.log_plan(plan)
 
-        with open(PLAN_PATH, "w") as f:
-            json.dump(plan, f, indent=2)
+        with open(PLAN_PATH, "wb") as f:
+            f.write(orjson.dumps(plan, option=orjson.OPT_INDENT_2))
 
-        results = []
+        pending_results = []
 
-        for step_num, step in enumerate(plan, 1):
-            print(f"➡️ Step {step_num}: {step}")
-            result = planner.execute_step(step)
-            memory.log_result(step, result)
-            results.append({"step": step, "result": result})
-            with open(RESULTS_PATH, "w") as f:
-                json.dump(results, f, indent=2)
-            print(f"✅ Result: {result}\n")
+        # A new plan starts a fresh results file
+        with open(RESULTS_PATH, "wb") as results_fp:
+            for step_num, step in enumerate(plan, 1):
+                print(f"➡️ Step {step_num}: {step}")
+                result = planner.execute_step(step)
+                pending_results = _log_result(memory, pending_results, step, result)
+                _append_result(results_fp, step, result)
+                print(f"✅ Result: {result}\n")
+        memory.log_results_bulk(pending_results)
 if __name__ == "__main__":
     main()
@@ -1,103 +1,974 @@
 # memory.py
 
 import os
+import re
+import json
+import sqlite3
+import queue
+import atexit
+import uuid
+import threading
+import time
 from datetime import datetime
+import httpx
+import numpy as np
 import chromadb
 from langchain_community.embeddings import OllamaEmbeddings
+from shared_cache import get_shared_cache, cache_key
+from embed_cache import CachedEmbedder, OnnxEmbedder, EMBED_BACKEND
 
 MEMORY_LOG = "workspace/memory_log.md"
+PLAN_CACHE_PATH = "workspace/plan_cache"
+MEMORY_INDEX_PATH = "workspace/memory_index"
+MEMORY_FTS_PATH = "workspace/memory_fts.db"
+MEMORY_INDEX_CAPACITY = 1024  # initial number of rows preallocated for memory embeddings
+EXACT_SEARCH_LIMIT = 10000  # memories searched by exact scan; larger ones use the HNSW index
+PLAN_CACHE_CAPACITY = 64  # initial number of rows preallocated for plan embeddings
+PCA_COMPONENTS = 64  # dimensions plan-cache searches are screened in once PCA is fitted
+PCA_REFIT_EVERY = 1000  # new plan-cache entries between PCA fits
+PCA_CANDIDATES = 32  # screened candidates re-scored against the full embeddings
+SEARCH_CACHE_SIZE = 256  # recent memory searches served again for near-duplicate queries
+SEARCH_CACHE_TTL = 300  # seconds before a cached search result goes stale
+SEARCH_CACHE_THRESHOLD = 0.95
+HYBRID_CANDIDATES = 50  # hits taken from each of the embedding and keyword searches
+KEYWORD_WEIGHT = 0.4  # share of the BM25 score in hybrid ranking; cosine similarity gets the rest
+LOG_BATCH_SIZE = 32  # memory log records written per write() call
+LOG_BUFFER_SIZE = 64 * 1024
+
+# ChromaDB indexes embeddings with hnswlib; these settings apply when the
+# collection is first created (existing collections keep their parameters).
+HNSW_SETTINGS = {
+    "hnsw:space": "cosine",
+    "hnsw:M": 16,
+    "hnsw:construction_ef": 200,
+    "hnsw:search_ef": 64,
+}
+
+WORD_PATTERN = re.compile(r"\w+")
 
 
 class Memory:
     def __init__(self):
         os.makedirs("workspace", exist_ok=True)
 
-        # Initialize the embedder
-        # Note: This will show a deprecation warning, but will still work for now
-        self.embedder = OllamaEmbeddings(model="llama3")
+        # Initialize the embedder; the local ONNX model keeps its memories apart
+        # since its embeddings have a different size from Ollama's
+        if EMBED_BACKEND == "onnx":
+            self.embedder = OnnxEmbedder()
+            suffix = "-minilm"
+        else:
+            # Note: This will show a deprecation warning, but will still work for now
+            self.embedder = OllamaEmbeddings(model="llama3")
+            suffix = ""
+        collection_name = f"agent-memory{suffix}"
 
         # Initialize the ChromaDB client
         self.client = chromadb.PersistentClient(path="workspace/chroma")
 
         # Try to get the collection if it exists, otherwise create it
         try:
-            self.collection = self.client.get_collection(name="agent-memory")
-            print("Found existing collection 'agent-memory'")
+            self.collection = self.client.get_collection(name=collection_name)
+            print(f"Found existing collection '{collection_name}'")
         except ValueError as e:
             # Collection doesn't exist, create it
             if "does not exist" in str(e):
-                print("Creating new collection 'agent-memory'")
-                self.collection = self.client.create_collection(name="agent-memory")
+                print(f"Creating new collection '{collection_name}'")
+                self.collection = self.client.create_collection(
+                    name=collection_name,
+                    metadata=HNSW_SETTINGS
+                )
             else:
                 raise  # Re-raise if it's a different ValueError
 
-        self.memory = []
+        # In-process copy of the collection's embeddings, searched exactly with one
+        # matrix-vector product instead of a ChromaDB query
+        self._index = VectorIndex(MEMORY_INDEX_PATH + suffix)
+        if not len(self._index) and self.collection.count():
+            self._index.rebuild(self.collection)
+
+        # BM25 keyword index over the same documents, mixed into search rankings
+        self._keywords = KeywordIndex(MEMORY_FTS_PATH + suffix)
+        if not len(self._keywords) and len(self._index):
+            self._keywords.add(self._index.ids, self._index.documents)
+
+        # Memory log entries are appended in batches on a background thread
+        self._writer = PersistenceWriter(MEMORY_LOG)
+
+        # Embeddings are cached in an LRU and persisted across sessions, so a task
+        # that is logged and then searched (or re-run) is only embedded once
+        self._embeddings = CachedEmbedder(self.embedder)
+
+        # Results of recent searches, reused for near-duplicate queries
+        self._search_cache = SearchCache()
+
+        # Exact-query results shared with other processes when REDIS_URL is set
+        self._shared_cache = get_shared_cache()
 
     def log_task(self, task):
         entry = f"### Task: {task}\nTime: {datetime.now()}\n"
         self._write(entry)
-        self.memory.append({"task": task})
         self._embed_and_store(task, metadata={"type": "task"})
 
     def log_plan(self, plan):
         entry = "\n**Plan:**\n" + "\n".join(f"- {step}" for step in plan) + "\n"
         self._write(entry)
-        self.memory[-1]["plan"] = plan
         self._embed_and_store(" ".join(plan), metadata={"type": "plan"})
 
     def log_result(self, step, result):
         entry = f"\n✅ Step: {step}\nResult:\n{result}\n"
         self._write(entry)
-        self.memory[-1].setdefault("results", []).append({"step": step, "result": result})
         self._embed_and_store(result, metadata={"type": "result", "step": step})
 
+    def log_results_bulk(self, steps_and_results):
+        """
+        Log several step results at once, embedding and storing them in one batch.
+
+        Args:
+            steps_and_results: List of (step, result) tuples
+        """
+        if not steps_and_results:
+            return
+
+        for step, result in steps_and_results:
+            entry = f"\n✅ Step: {step}\nResult:\n{result}\n"
+            self._write(entry)
+
+        self._embed_and_store_many(
+            [result for _, result in steps_and_results],
+            [{"type": "result", "step": step} for step, _ in steps_and_results]
+        )
+
+    def embed(self, text):
+        """Return the embedding vector for the given text, using the LRU cache and the persistent store."""
+        return self._embeddings.embed(text)
+
+    def embed_batch(self, texts):
+        """
+        Return embeddings for several texts, computing all cache misses in one request.
+
+        OllamaEmbeddings sends one HTTP request per text, so misses are sent to
+        Ollama's batch /api/embed endpoint instead. That endpoint returns
+        unit-length vectors, which only rank the same as embed_query() under
+        cosine distance; other collections fall back to one request per text.
+        The local ONNX embedder encodes the misses in batches itself.
+        """
+        if isinstance(self.embedder, OnnxEmbedder):
+            return self._embeddings.embed_many(
+                texts, lambda missing: dict(zip(missing, self.embedder.embed_documents(missing)))
+            )
+        if self.collection.metadata and self.collection.metadata.get("hnsw:space") == "cosine":
+            return self._embeddings.embed_many(texts, self._embed_remote_batch)
+        return self._embeddings.embed_many(texts)
+
+    def _embed_remote_batch(self, texts):
+        """Embed texts with one request to Ollama's /api/embed endpoint."""
+        try:
+            response = httpx.post(
+                f"{self.embedder.base_url}/api/embed",
+                json={
+                    "model": self.embedder.model,
+                    "input": [f"{self.embedder.query_instruction}{text}" for text in texts]
+                },
+                timeout=None
+            )
+            response.raise_for_status()
+            return dict(zip(texts, response.json()["embeddings"]))
+        except Exception as e:
+            print(f"Batch embedding failed, embedding one at a time: {e}")
+            return {}
+
+    def warmup_embeddings(self, texts):
+        """Load the embeddings of likely queries (e.g. recent tasks) into the cache ahead of use."""
+        self._embeddings.warmup(texts)
+
+    def embedding_stats(self):
+        """Hit and miss counts of the embedding cache."""
+        return self._embeddings.stats()
+
     def search_memory(self, query, top_k=3):
+        # Another process sharing the Redis cache may already have run this exact search
+        shared_key = f"search:{cache_key(self.embedder.model, query, top_k)}"
+        matches = self._shared_cache.get(shared_key)
+        if matches is not None:
+            return matches
+
+        matches = self._search(query, top_k)
+        if matches:
+            self._shared_cache.set(shared_key, matches, SEARCH_CACHE_TTL)
+        return matches
+
+    def _search(self, query, top_k):
         # Get embedding for query
-        query_embedding = self.embedder.embed_query(query)
+        query_embedding = self.embed(query)
+
+        # Rephrasings of a recent query reuse its results instead of querying ChromaDB
+        cached = self._search_cache.lookup(query_embedding, top_k)
+        if cached is not None:
+            return cached
+
+        # Small memories are scanned exactly in-process; past EXACT_SEARCH_LIMIT rows the
+        # scan grows linearly, so ChromaDB's HNSW graph answers instead
+        vector_hits = None
+        if len(self._index) <= EXACT_SEARCH_LIMIT:
+            vector_hits = self._index.search(query_embedding, HYBRID_CANDIDATES)
+        if vector_hits is None:
+            vector_hits = self._query_collection(query_embedding)
+            if vector_hits is None:
+                return []
 
-        # Convert to list for ChromaDB compatibility
-        query_embedding_list = list(query_embedding)
+        # Embedding neighbours are re-ranked together with BM25 keyword hits
+        matches = _hybrid_rank(vector_hits, self._keywords.search(query), top_k)
+        self._search_cache.add(query_embedding, top_k, matches)
+        return matches
 
+    def _query_collection(self, query_embedding):
+        """Nearest documents from ChromaDB as (document, similarity) pairs, or None on error."""
         try:
             # Check if collection is empty first
-            collection_data = self.collection.get()
-            if not collection_data['ids']:
+            count = self.collection.count()
+            if not count:
                 return []
 
-            # Query collection with embedding
+            # Query collection with embedding (as a list for ChromaDB compatibility)
             results = self.collection.query(
-                query_embeddings=[query_embedding_list],
-                n_results=min(top_k, len(collection_data['ids']))
+                query_embeddings=[list(query_embedding)],
+                n_results=min(HYBRID_CANDIDATES, count),
+                include=["documents", "distances"]
             )
-            matches = results.get("documents", [[]])[0]
         except Exception as e:
             print(f"Error during search: {e}")
-            matches = []
+            return None
 
-        return matches
+        # Cosine collections report 1 - similarity; older L2 ones only a distance
+        cosine = bool(self.collection.metadata) and self.collection.metadata.get("hnsw:space") == "cosine"
+        distances = results.get("distances", [[]])[0]
+        similarities = [1 - d if cosine else 1 / (1 + d) for d in distances]
+        return list(zip(results.get("documents", [[]])[0], similarities))
 
     def _embed_and_store(self, text, metadata):
+        self._embed_and_store_many([text], [metadata])
+
+    def _embed_and_store_many(self, texts, metadatas):
         try:
-            # Get embedding for the text
-            embedding = self.embedder.embed_query(text)
+            # Get embeddings for the texts
+            embeddings = self.embed_batch(texts) if len(texts) > 1 else [self.embed(texts[0])]
 
-            # Convert to list for ChromaDB compatibility
-            embedding_list = list(embedding)
+            # Convert to lists for ChromaDB compatibility
+            embedding_lists = [list(embedding) for embedding in embeddings]
 
-            # Create a unique ID
-            collection_data = self.collection.get()
-            next_id = str(len(collection_data['ids']) + 1)
+            # Create unique IDs without reading the existing ones
+            ids = [uuid.uuid4().hex for _ in texts]
 
-            # Add to collection with embedding
+            # Add to collection with embeddings
             self.collection.add(
-                documents=[text],
-                embeddings=[embedding_list],
-                ids=[next_id],
-                metadatas=[metadata]
+                documents=texts,
+                embeddings=embedding_lists,
+                ids=ids,
+                metadatas=metadatas
             )
         except Exception as e:
             print(f"Error storing in ChromaDB: {e}")
+            return
+
+        self._index.add(ids, embeddings, texts)
+        self._keywords.add(ids, texts)
 
     def _write(self, text):
-        with open(MEMORY_LOG, "a") as f:
-            f.write(text + "\n")
+        self._writer.write(text + "\n")
+
+    def flush(self):
+        """Block until every logged entry has been written to the memory log."""
+        self._writer.flush()
+
+
+class VectorIndex:
+    """
+    Exact cosine-similarity index over the memory collection's embeddings.
+
+    Rows are L2-normalized and int8-quantized with a per-row scale at
+    insertion, so a search is a single matrix-vector product over a matrix a
+    quarter the size of the float32 embeddings. The index is persisted
+    append-only: int8 codes in <path>.i8, float32 scales in <path>.scales,
+    one JSON line per row (id and document) in <path>.jsonl, and the
+    dimension in <path>.json.
+    """
+
+    def __init__(self, path=MEMORY_INDEX_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        # Preallocated buffers; rows beyond len(documents) are unused capacity
+        self._codes = None
+        self._scales = None
+        self.ids = []
+        self.documents = []
+        self._load()
+
+    def __len__(self):
+        return len(self.documents)
+
+    def search(self, embedding, k=3):
+        """
+        Find the stored documents most similar to an embedding.
+
+        Args:
+            embedding: Query embedding
+            k: Maximum number of documents to return
+
+        Returns:
+            List of (document, cosine similarity) pairs, most similar first, or
+            None if the index can't answer the query (it is empty or was built
+            with another model)
+        """
+        query = _normalize(np.asarray(embedding, dtype=np.float32))
+        with self._lock:
+            n = len(self.documents)
+            if not n or query is None or query.shape[0] != self._codes.shape[1]:
+                return None
+
+            # The query stays float32; only the stored rows are quantized
+            sims = (self._codes[:n] @ query) * self._scales[:n]
+            k = min(k, n)
+            top = np.argpartition(-sims, k - 1)[:k]
+            top = top[np.argsort(-sims[top])]
+            return [(self.documents[i], float(sims[i])) for i in top]
+
+    def add(self, ids, embeddings, documents):
+        """
+        Add rows to the index and append them to disk.
+
+        Args:
+            ids: Collection ids of the rows
+            embeddings: Embeddings of the documents
+            documents: Document texts
+        """
+        rows = np.asarray(embeddings, dtype=np.float32).reshape(len(documents), -1)
+        norms = np.linalg.norm(rows, axis=1, keepdims=True)
+        norms[norms == 0] = 1
+        codes, scales = _quantize((rows / norms).astype(np.float32))
+
+        with self._lock:
+            if self._codes is None or self._codes.shape[1] != codes.shape[1]:
+                # First rows, or a new embedding model: start a fresh index
+                self._allocate(MEMORY_INDEX_CAPACITY, codes.shape[1])
+                self.ids, self.documents = [], []
+                self._rewrite()
+
+            n = len(self.documents)
+            while n + len(codes) > self._codes.shape[0]:
+                self._grow()
+            self._codes[n:n + len(codes)] = codes
+            self._scales[n:n + len(codes)] = scales
+            self.ids.extend(ids)
+            self.documents.extend(documents)
+            self._append(codes, scales, ids, documents)
+
+    def rebuild(self, collection):
+        """Replace the index with every embedding stored in a ChromaDB collection."""
+        try:
+            data = collection.get(include=["embeddings", "documents"])
+        except Exception as e:
+            print(f"Error reading ChromaDB collection: {e}")
+            return
+        if not data["ids"]:
+            return
+
+        with self._lock:
+            self._codes = None
+            self.ids, self.documents = [], []
+        self.add(data["ids"], data["embeddings"], data["documents"])
+
+    def _allocate(self, rows, dim):
+        self._codes = np.zeros((rows, dim), dtype=np.int8)
+        self._scales = np.zeros(rows, dtype=np.float32)
+
+    def _grow(self):
+        # Double the capacity so appends stay amortized O(d) instead of copying on every add
+        codes, scales = self._codes, self._scales
+        self._allocate(codes.shape[0] * 2, codes.shape[1])
+        self._codes[:len(codes)] = codes
+        self._scales[:len(scales)] = scales
+
+    def _load(self):
+        try:
+            with open(f"{self.path}.json", "r") as f:
+                dim = json.load(f)["dim"]
+            codes = np.fromfile(f"{self.path}.i8", dtype=np.int8)
+            scales = np.fromfile(f"{self.path}.scales", dtype=np.float32)
+            entries = []
+            with open(f"{self.path}.jsonl", "rb") as f:
+                for line in f:
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        # Torn last line from an interrupted write
+                        break
+        except FileNotFoundError:
+            # Nothing saved yet, or an index from before quantization; it is
+            # rebuilt from the collection
+            return
+        except Exception as e:
+            print(f"Error loading memory index: {e}")
+            return
+
+        n = min(len(entries), len(codes) // dim, len(scales))
+        self._allocate(max(MEMORY_INDEX_CAPACITY, n), dim)
+        self._codes[:n] = codes[:n * dim].reshape(n, dim)
+        self._scales[:n] = scales[:n]
+        self.ids = [entry["id"] for entry in entries[:n]]
+        self.documents = [entry["document"] for entry in entries[:n]]
+        if not (n == len(entries) == len(scales) and n * dim == len(codes)):
+            # Drop the partial tail so later appends stay aligned
+            self._rewrite()
+
+    def _append(self, codes, scales, ids, documents):
+        try:
+            with open(f"{self.path}.i8", "ab") as f:
+                f.write(codes.tobytes())
+            with open(f"{self.path}.scales", "ab") as f:
+                f.write(scales.tobytes())
+            with open(f"{self.path}.jsonl", "a") as f:
+                f.writelines(json.dumps({"id": id_, "document": document}) + "\n"
+                             for id_, document in zip(ids, documents))
+        except Exception as e:
+            print(f"Error saving memory index: {e}")
+
+    def _rewrite(self):
+        try:
+            n = len(self.documents)
+            with open(f"{self.path}.json", "w") as f:
+                json.dump({"dim": self._codes.shape[1]}, f)
+            with open(f"{self.path}.i8", "wb") as f:
+                f.write(self._codes[:n].tobytes())
+            with open(f"{self.path}.scales", "wb") as f:
+                f.write(self._scales[:n].tobytes())
+            with open(f"{self.path}.jsonl", "w") as f:
+                f.writelines(json.dumps({"id": id_, "document": document}) + "\n"
+                             for id_, document in zip(self.ids, self.documents))
+        except Exception as e:
+            print(f"Error saving memory index: {e}")
+
+
+class KeywordIndex:
+    """
+    SQLite FTS5 index over the memory documents, ranked with BM25.
+
+    Complements the embedding search with exact term matches (names, error
+    messages, file paths) that embeddings tend to blur. Documents are stored
+    once in the memories table, keyed by their collection id, and indexed by
+    the external-content memories_fts table. If the store can't be opened, or
+    SQLite lacks FTS5, searches return no hits.
+    """
+
+    def __init__(self, path=MEMORY_FTS_PATH):
+        self._lock = threading.Lock()
+        self.conn = None
+        try:
+            self.conn = sqlite3.connect(path, check_same_thread=False)
+            with self.conn:
+                self.conn.execute(
+                    "CREATE TABLE IF NOT EXISTS memories (id INTEGER PRIMARY KEY, doc_id TEXT UNIQUE, text TEXT)"
+                )
+                self.conn.execute(
+                    "CREATE VIRTUAL TABLE IF NOT EXISTS memories_fts "
+                    "USING fts5(text, content='memories', content_rowid='id')"
+                )
+                self.conn.execute(
+                    "CREATE TRIGGER IF NOT EXISTS memories_ai AFTER INSERT ON memories BEGIN "
+                    "INSERT INTO memories_fts (rowid, text) VALUES (new.id, new.text); END"
+                )
+        except Exception as e:
+            print(f"Keyword index disabled: {e}")
+            self.conn = None
+
+    def __len__(self):
+        if self.conn is None:
+            return 0
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM memories").fetchone()[0]
+
+    def add(self, ids, documents):
+        """
+        Index documents.
+
+        Args:
+            ids: Collection ids of the documents
+            documents: Document texts
+        """
+        if self.conn is None:
+            return
+        try:
+            with self._lock, self.conn:
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO memories (doc_id, text) VALUES (?, ?)",
+                    zip(ids, documents)
+                )
+        except Exception as e:
+            print(f"Error updating keyword index: {e}")
+
+    def search(self, query, k=HYBRID_CANDIDATES):
+        """
+        Find the documents sharing the most relevant terms with a query.
+
+        Args:
+            query: Free-text query; any of its words may match
+            k: Maximum number of documents to return
+
+        Returns:
+            List of (document, BM25 score) pairs, best first; higher scores are better
+        """
+        words = dict.fromkeys(WORD_PATTERN.findall(query.lower()))
+        if self.conn is None or not words:
+            return []
+
+        # Quote every word so FTS5 doesn't read them as query syntax
+        match = " OR ".join(f'"{word}"' for word in words)
+        try:
+            with self._lock:
+                rows = self.conn.execute(
+                    "SELECT m.text, bm25(memories_fts) FROM memories_fts "
+                    "JOIN memories m ON m.id = memories_fts.rowid "
+                    "WHERE memories_fts MATCH ? ORDER BY bm25(memories_fts) LIMIT ?",
+                    (match, k)
+                ).fetchall()
+        except Exception as e:
+            print(f"Error during keyword search: {e}")
+            return []
+
+        # SQLite's bm25() is negative, more negative meaning more relevant
+        return [(text, -score) for text, score in rows]
+
+
+class PersistenceWriter:
+    """
+    Appends text records to a file from a background thread.
+
+    write() only enqueues the record, so callers never wait on disk. The
+    writer thread keeps one buffered append handle open, drains up to
+    batch_size queued records at a time into it, and flushes the buffer
+    whenever the queue runs empty. Pending records are flushed at exit.
+    """
+
+    def __init__(self, path, batch_size=LOG_BATCH_SIZE):
+        self.path = path
+        self.batch_size = batch_size
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        atexit.register(self.flush)
+
+    def write(self, text):
+        """Queue a record to be appended to the file."""
+        self._queue.put(text)
+
+    def flush(self):
+        """Block until every queued record has been written."""
+        self._queue.join()
+
+    def _run(self):
+        f = None
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            try:
+                if f is None:
+                    f = open(self.path, "ab", buffering=LOG_BUFFER_SIZE)
+                f.write("".join(batch).encode("utf-8"))
+                if self._queue.empty():
+                    f.flush()
+            except Exception as e:
+                print(f"Error writing to {self.path}: {e}")
+                f = None
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+
+class SearchCache:
+    """
+    Recent memory search results keyed by query embedding.
+
+    A lookup returns the results of the most similar cached query when its
+    cosine similarity reaches the threshold. Entries expire after ttl seconds
+    so newly logged memories show up in results again, and the oldest entry
+    is dropped once the cache is full.
+    """
+
+    def __init__(self, size=SEARCH_CACHE_SIZE, ttl=SEARCH_CACHE_TTL, threshold=SEARCH_CACHE_THRESHOLD):
+        self.size = size
+        self.ttl = ttl
+        self.threshold = threshold
+        # Parallel lists of normalized query embeddings and (expires_at, top_k, matches)
+        self._vectors = []
+        self._entries = []
+
+    def lookup(self, embedding, top_k):
+        """
+        Find cached results for a query embedding.
+
+        Args:
+            embedding: Embedding of the search query
+            top_k: Number of results the caller asked for
+
+        Returns:
+            List of matching documents, or None on a miss
+        """
+        self._expire()
+        query = _normalize(np.asarray(embedding, dtype=np.float32))
+        if query is None or not self._vectors or query.shape[0] != self._vectors[0].shape[0]:
+            return None
+
+        sims = np.stack(self._vectors) @ query
+        for i in np.argsort(-sims):
+            if sims[i] < self.threshold:
+                break
+            _, cached_k, matches = self._entries[i]
+            if cached_k == top_k:
+                return list(matches)
+        return None
+
+    def add(self, embedding, top_k, matches):
+        """
+        Cache the results of a search.
+
+        Args:
+            embedding: Embedding of the search query
+            top_k: Number of results that were asked for
+            matches: Documents returned by the search
+        """
+        query = _normalize(np.asarray(embedding, dtype=np.float32))
+        if query is None:
+            return
+        if self._vectors and query.shape[0] != self._vectors[0].shape[0]:
+            # The embedding model changed; older queries can't be compared
+            self.clear()
+        self._vectors.append(query)
+        self._entries.append((time.monotonic() + self.ttl, top_k, list(matches)))
+        if len(self._vectors) > self.size:
+            del self._vectors[0], self._entries[0]
+
+    def clear(self):
+        self._vectors = []
+        self._entries = []
+
+    def _expire(self):
+        # Entries are appended in time order, so expired ones are always at the front
+        now = time.monotonic()
+        stale = 0
+        while stale < len(self._entries) and self._entries[stale][0] <= now:
+            stale += 1
+        if stale:
+            del self._vectors[:stale], self._entries[:stale]
+
+
+class SemanticPlanCache:
+    """
+    Cache of previously executed plans keyed by task embedding.
+
+    A lookup returns the cached entry of the most similar prior task when its
+    cosine similarity reaches the threshold, so the caller can reuse that plan
+    instead of asking the LLM to plan again.
+
+    Once the cache is large, a PCA projection is refitted on a background
+    thread every PCA_REFIT_EVERY entries. Lookups then screen every row in the
+    projected space (int8 codes of PCA_COMPONENTS dimensions) and score only
+    the best candidates against the full int8 embeddings, so the threshold
+    still applies to the true cosine similarity.
+    """
+
+    def __init__(self, path=PLAN_CACHE_PATH, threshold=0.92):
+        self.path = path
+        self.threshold = threshold
+        # Preallocated buffers of int8-quantized, L2-normalized rows and their per-row
+        # scales; rows beyond len(entries) are unused capacity
+        self._codes = None
+        self._scales = None
+        self.entries = []
+
+        # PCA projection (mean, components) fitted once the cache is large, and the
+        # normalized projected rows (int8 codes and scales, like the full rows) used
+        # to screen candidates before exact scoring
+        self._pca = None
+        self._projected = None
+        self._projected_scales = None
+        self._pca_fitted_at = 0
+
+        # Held by lookups, adds and the background PCA fit while they touch the rows
+        self._lock = threading.Lock()
+        self._fitting = False
+        self._generation = 0  # bumped when the cache starts over, so a fit in progress is dropped
+        self._load()
+
+    @property
+    def embeddings(self):
+        """Dequantized float32 matrix with one L2-normalized row per cached task."""
+        if self._codes is None:
+            return None
+        n = len(self.entries)
+        return self._codes[:n] * self._scales[:n, None]
+
+    def lookup(self, embedding):
+        """
+        Find a cached plan for a task embedding.
+
+        Args:
+            embedding: Embedding of the new task description
+
+        Returns:
+            The cached entry dict ({'task', 'plan', 'job_id', 'dependencies'}) or None on a miss
+        """
+        matches = self.nearest(embedding, k=1)
+        if matches and matches[0][1] >= self.threshold:
+            return matches[0][0]
+        return None
+
+    def nearest(self, embedding, k=5):
+        """
+        Find the cached tasks most similar to an embedding.
+
+        Args:
+            embedding: Embedding of a task description
+            k: Maximum number of matches to return
+
+        Returns:
+            List of (entry, cosine similarity) tuples, most similar first
+        """
+        query = _normalize(np.asarray(embedding, dtype=np.float32))
+        with self._lock:
+            if not self.entries:
+                return []
+            if query is None or query.shape[0] != self._codes.shape[1]:
+                # Empty query, or the embedding model changed since the cache was built
+                return []
+
+            n = len(self.entries)
+            if self._pca is not None and n > max(k, PCA_CANDIDATES):
+                # Screen in the low-dimensional PCA space, then score the candidates exactly
+                screen = (self._projected[:n] @ self._project(query.reshape(1, -1))[0]) * self._projected_scales[:n]
+                candidates = np.argpartition(-screen, PCA_CANDIDATES - 1)[:PCA_CANDIDATES]
+            else:
+                candidates = np.arange(n)
+
+            # Rows are normalized at insertion, so cosine similarity is a single
+            # matrix-vector product over the int8 codes, rescaled per row
+            sims = (self._codes[candidates] @ query) * self._scales[candidates]
+            k = min(k, len(candidates))
+            top = np.argpartition(-sims, k - 1)[:k]
+            top = top[np.argsort(-sims[top])]
+            return [(self.entries[candidates[i]], float(sims[i])) for i in top]
+
+    def add(self, embedding, task, plan, job_id, dependencies=None):
+        """
+        Add a successfully executed plan to the cache.
+
+        Args:
+            embedding: Embedding of the task description
+            task: The task description
+            plan: List of step descriptions
+            job_id: ID of the job that executed the plan
+            dependencies: Dependency index lists for the plan's steps (optional)
+        """
+        vector = _normalize(np.asarray(embedding, dtype=np.float32).ravel())
+        if vector is None:
+            return
+
+        with self._lock:
+            if self._codes is None or self._codes.shape[1] != vector.shape[0]:
+                # First entry, or a new embedding model: start a fresh cache
+                self._allocate(PLAN_CACHE_CAPACITY, vector.shape[0])
+                self.entries = []
+                self._pca = None
+                self._pca_fitted_at = 0
+                self._generation += 1
+            elif len(self.entries) == self._codes.shape[0]:
+                self._grow()
+
+            row = len(self.entries)
+            self._codes[row:row + 1], self._scales[row:row + 1] = _quantize(vector.reshape(1, -1))
+            if self._pca is not None:
+                self._projected[row:row + 1], self._projected_scales[row:row + 1] = \
+                    _quantize(self._project(vector.reshape(1, -1)))
+            self.entries.append({'task': task, 'plan': list(plan), 'job_id': job_id,
+                                 'dependencies': dependencies})
+
+            # The SVD takes a while on a large cache; run it off the caller's thread
+            refit = (not self._fitting and self._codes.shape[1] > PCA_COMPONENTS
+                     and len(self.entries) - self._pca_fitted_at >= PCA_REFIT_EVERY)
+            if refit:
+                self._fitting = True
+            self._save()
+
+        if refit:
+            threading.Thread(target=self._fit_pca, daemon=True).start()
+
+    def _fit_pca(self):
+        """Fit the PCA projection on the cached embeddings with an SVD and project every row."""
+        try:
+            with self._lock:
+                generation = self._generation
+                embeddings = self.embeddings
+            components = min(PCA_COMPONENTS, *embeddings.shape)
+            if components >= embeddings.shape[1]:
+                # Embeddings are already small; screening would not save anything
+                return
+
+            mean = embeddings.mean(axis=0)
+            _, _, vt = np.linalg.svd(embeddings - mean, full_matrices=False)
+
+            with self._lock:
+                if generation != self._generation:
+                    return
+                self._pca = (mean.astype(np.float32), vt[:components].T.astype(np.float32))
+                self._pca_fitted_at = len(embeddings)
+                # Rows added during the fit are projected here too
+                self._project_all()
+                self._save_pca()
+        except Exception as e:
+            print(f"Error fitting plan cache PCA: {e}")
+        finally:
+            self._fitting = False
+
+    def _project(self, matrix):
+        """Project rows into the PCA space and L2-normalize them."""
+        mean, components = self._pca
+        projected = (matrix - mean) @ components
+        norms = np.linalg.norm(projected, axis=1, keepdims=True)
+        norms[norms == 0] = 1
+        return (projected / norms).astype(np.float32)
+
+    def _project_all(self):
+        n = len(self.entries)
+        self._projected = np.zeros((self._codes.shape[0], self._pca[1].shape[1]), dtype=np.int8)
+        self._projected_scales = np.zeros(self._codes.shape[0], dtype=np.float32)
+        self._projected[:n], self._projected_scales[:n] = _quantize(self._project(self.embeddings))
+
+    def _load(self):
+        try:
+            with open(f"{self.path}.json", "r") as f:
+                entries = json.load(f)
+            codes = np.load(f"{self.path}.npy")
+            if codes.dtype == np.int8:
+                scales = np.load(f"{self.path}.scales.npy")
+            else:
+                # Cache written before quantization: normalize and quantize the float rows
+                norms = np.linalg.norm(codes, axis=1, keepdims=True)
+                norms[norms == 0] = 1
+                codes, scales = _quantize((codes / norms).astype(np.float32))
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            print(f"Error loading plan cache: {e}")
+            return
+
+        if not (len(entries) == len(codes) == len(scales)):
+            print("Plan cache is inconsistent, ignoring it")
+            return
+
+        self._allocate(max(PLAN_CACHE_CAPACITY, len(entries)), codes.shape[1])
+        self._codes[:len(entries)] = codes
+        self._scales[:len(entries)] = scales
+        self.entries = entries
+
+        try:
+            pca = np.load(f"{self.path}.pca.npz")
+            if pca['mean'].shape[0] == codes.shape[1]:
+                self._pca = (pca['mean'], pca['components'])
+                self._pca_fitted_at = int(pca['fitted_at'])
+                self._project_all()
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Error loading plan cache PCA: {e}")
+
+    def _allocate(self, rows, dim):
+        self._codes = np.zeros((rows, dim), dtype=np.int8)
+        self._scales = np.zeros(rows, dtype=np.float32)
+
+    def _grow(self):
+        # Double the capacity so appends stay amortized O(d) instead of copying on every add
+        codes, scales = self._codes, self._scales
+        projected, projected_scales = self._projected, self._projected_scales
+        self._allocate(codes.shape[0] * 2, codes.shape[1])
+        self._codes[:len(codes)] = codes
+        self._scales[:len(scales)] = scales
+        if self._pca is not None:
+            self._projected = np.zeros((self._codes.shape[0], projected.shape[1]), dtype=np.int8)
+            self._projected[:len(projected)] = projected
+            self._projected_scales = np.zeros(self._codes.shape[0], dtype=np.float32)
+            self._projected_scales[:len(projected_scales)] = projected_scales
+
+    def _save(self):
+        try:
+            n = len(self.entries)
+            np.save(f"{self.path}.npy", self._codes[:n])
+            np.save(f"{self.path}.scales.npy", self._scales[:n])
+            with open(f"{self.path}.json", "w") as f:
+                json.dump(self.entries, f)
+        except Exception as e:
+            print(f"Error saving plan cache: {e}")
+
+    def _save_pca(self):
+        try:
+            np.savez(f"{self.path}.pca.npz", mean=self._pca[0], components=self._pca[1],
+                     fitted_at=self._pca_fitted_at)
+        except Exception as e:
+            print(f"Error saving plan cache PCA: {e}")
+
+
+def _hybrid_rank(vector_hits, keyword_hits, top_k):
+    """
+    Merge embedding and keyword hits into one ranking.
+
+    BM25 scores are scaled to [0, 1] by the best keyword hit and blended with
+    cosine similarity as KEYWORD_WEIGHT * bm25 + (1 - KEYWORD_WEIGHT) * cosine.
+    A document missing from one list scores 0 there.
+
+    Args:
+        vector_hits: (document, cosine similarity) pairs
+        keyword_hits: (document, BM25 score) pairs, higher is better
+        top_k: Number of documents to return
+
+    Returns:
+        List of documents, best first
+    """
+    scores = {}
+    for document, similarity in vector_hits:
+        scores[document] = max(scores.get(document, 0.0), (1 - KEYWORD_WEIGHT) * similarity)
+
+    best = max((score for _, score in keyword_hits), default=0)
+    if best > 0:
+        seen = set()
+        for document, score in keyword_hits:
+            if document not in seen:
+                seen.add(document)
+                scores[document] = scores.get(document, 0.0) + KEYWORD_WEIGHT * score / best
+
+    return sorted(scores, key=scores.get, reverse=True)[:top_k]
+
+
+def _quantize(matrix):
+    """
+    Symmetric per-row int8 quantization.
+
+    Args:
+        matrix: float32 matrix to quantize
+
+    Returns:
+        Tuple of (int8 codes, float32 per-row scales) with matrix ~= codes * scales[:, None]
+    """
+    scales = np.abs(matrix).max(axis=1) / 127
+    scales[scales == 0] = 1
+    codes = np.clip(np.rint(matrix / scales[:, None]), -127, 127).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+def _normalize(vector):
+    """Return a float32 vector scaled to unit length, or None for a zero vector."""
+    norm = np.linalg.norm(vector)
+    if norm == 0:
+        return None
+    return (vector / norm).astype(np.float32)
@@ -1,25 +1,66 @@
 # models/llama3_runner.py
 
-import subprocess
 import json
+import httpx
+
+OLLAMA_URL = "http://localhost:11434"
+KEEP_ALIVE = -1  # keep the model loaded in Ollama for the life of the server
 
 class LlamaRunner:
-    def __init__(self, model_name="llama3"):
+    def __init__(self, model_name="llama3", base_url=OLLAMA_URL):
         self.model = model_name
 
+        # Keep-alive connection pool shared by every call (and every thread) of this runner
+        self.client = httpx.Client(base_url=base_url, timeout=None)
+
+    def warmup(self):
+        """
+        Load the model into Ollama ahead of the first real prompt.
+
+        An empty prompt makes Ollama load the weights without generating, and
+        keep_alive keeps them resident between tasks.
+
+        Returns:
+            True if the model was loaded, False otherwise
+        """
+        try:
+            response = self.client.post(
+                "/api/generate",
+                json={"model": self.model, "prompt": "", "keep_alive": KEEP_ALIVE}
+            )
+            response.raise_for_status()
+            return True
+        except Exception as e:
+            print(f"[LLaMA Warmup Error] {str(e)}")
+            return False
+
     def run(self, prompt):
-        command = ["ollama", "run", self.model]
+        """Run a prompt through the Ollama HTTP API over the runner's persistent connection."""
         try:
-            proc = subprocess.Popen(
-                command,
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
+            response = self.client.post(
+                "/api/generate",
+                json={"model": self.model, "prompt": prompt, "stream": False, "keep_alive": KEEP_ALIVE}
             )
-            stdout, stderr = proc.communicate(prompt)
-            if stderr:
-                print(f"[LLaMA Error] {stderr}")
-            return stdout.strip()
+            response.raise_for_status()
+            return response.json()["response"].strip()
         except Exception as e:
             return f"[Runner Error] {str(e)}"
+
+    def run_stream(self, prompt):
+        """Run a prompt through the Ollama HTTP API, yielding text as it is generated."""
+        try:
+            with self.client.stream(
+                "POST",
+                "/api/generate",
+                json={"model": self.model, "prompt": prompt, "stream": True, "keep_alive": KEEP_ALIVE}
+            ) as response:
+                response.raise_for_status()
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    data = json.loads(line)
+                    yield data.get("response", "")
+                    if data.get("done"):
+                        break
+        except Exception as e:
+            yield f"[Runner Error] {str(e)}"
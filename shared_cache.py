@@ -0,0 +1,108 @@
+# shared_cache.py
+
+import os
+import hashlib
+import orjson
+
+# Set REDIS_URL (e.g. redis://localhost:6379/0) to share cached reads between
+# processes, such as several Streamlit workers; without it every call is a no-op
+REDIS_URL = os.environ.get("REDIS_URL")
+KEY_PREFIX = "localgenius:"
+
+
+class SharedCache:
+    """
+    Optional Redis-backed cache of JSON-serializable values with a TTL.
+
+    redis is only imported when a URL is configured, so it is not a
+    dependency otherwise. Connection and server errors are reported once and
+    then treated as misses, so a missing Redis only disables sharing.
+    """
+
+    def __init__(self, url=REDIS_URL):
+        self.client = None
+        if not url:
+            return
+        try:
+            import redis
+            self.client = redis.Redis.from_url(url)
+        except Exception as e:
+            print(f"Shared cache disabled: {e}")
+
+    @property
+    def enabled(self):
+        return self.client is not None
+
+    def get(self, key):
+        """
+        Look up a cached value.
+
+        Args:
+            key: Cache key (without the shared prefix)
+
+        Returns:
+            The cached value, or None on a miss or when the cache is disabled
+        """
+        if not self.client:
+            return None
+        try:
+            value = self.client.get(KEY_PREFIX + key)
+            return orjson.loads(value) if value is not None else None
+        except Exception as e:
+            self._disable(e)
+            return None
+
+    def set(self, key, value, ttl):
+        """
+        Cache a value.
+
+        Args:
+            key: Cache key (without the shared prefix)
+            value: JSON-serializable value
+            ttl: Seconds until the value expires
+        """
+        if not self.client:
+            return
+        try:
+            self.client.set(KEY_PREFIX + key, orjson.dumps(value), ex=max(1, int(ttl)))
+        except Exception as e:
+            self._disable(e)
+
+    def version(self, namespace):
+        """Current version counter of a namespace, for building keys that bump() invalidates."""
+        if not self.client:
+            return 0
+        try:
+            return int(self.client.get(f"{KEY_PREFIX}{namespace}:version") or 0)
+        except Exception as e:
+            self._disable(e)
+            return 0
+
+    def bump(self, namespace):
+        """Invalidate every key built from a namespace's current version."""
+        if not self.client:
+            return
+        try:
+            self.client.incr(f"{KEY_PREFIX}{namespace}:version")
+        except Exception as e:
+            self._disable(e)
+
+    def _disable(self, error):
+        print(f"Shared cache disabled: {error}")
+        self.client = None
+
+
+def cache_key(*parts):
+    """Fixed-size key for arbitrary JSON-serializable arguments."""
+    return hashlib.blake2b(orjson.dumps(parts), digest_size=16).hexdigest()
+
+
+_shared_cache = None
+
+
+def get_shared_cache():
+    """Get the process-wide shared cache."""
+    global _shared_cache
+    if _shared_cache is None:
+        _shared_cache = SharedCache()
+    return _shared_cache
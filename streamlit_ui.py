@@ -1,23 +1,16 @@
 # streamlit_ui.py
 
 import streamlit as st
-from models.llama3_runner import LlamaRunner
-from memory import Memory
-from tasks import TaskPlanner
-from jobs.job_manager import JobManager, JobStatus, StepStatus
+from tasks import StepGraph
+from jobs.job_manager import SqliteJobManager, JobStatus, StepStatus
 from tools import get_registry
-import json
+from shared_cache import get_shared_cache
 import traceback
+import asyncio
+import threading
 import os
-import time
 from datetime import datetime
-
-# Initialize components
-llm = LlamaRunner(model_name="llama3")
-memory = Memory()
-job_manager = JobManager()
-tools = get_registry()
-planner = TaskPlanner(llm)
+from functools import lru_cache
 
 # Page Configuration
 st.set_page_config(
@@ -27,6 +20,157 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Initialize components once per process; Streamlit reruns this script on every interaction.
+# The LLM, memory and planner (and their model and vector-store imports) are only
+# built by the tabs that use them.
+@st.cache_resource
+def get_llm():
+    from models.llama3_runner import LlamaRunner
+    return LlamaRunner(model_name="llama3")
+
+@st.cache_resource
+def get_memory():
+    from memory import Memory
+    memory = Memory()
+    # Recent tasks are the likeliest queries; load their embeddings in the background
+    recent_tasks = [job['task'] for job in get_job_manager().list_jobs(limit=20)]
+    threading.Thread(target=memory.warmup_embeddings, args=(recent_tasks,), daemon=True).start()
+    return memory
+
+@st.cache_resource
+def get_job_manager():
+    return SqliteJobManager()
+
+@st.cache_resource
+def get_tools():
+    return get_registry()
+
+@st.cache_resource
+def get_planner():
+    from tasks import TaskPlanner
+    return TaskPlanner(get_llm())
+
+job_manager = get_job_manager()
+tools = get_tools()
+shared_cache = get_shared_cache()
+
+# Read-only job queries are cached briefly; every write path calls _invalidate_jobs().
+# Listings are read from the database, so jobs the CLI creates or finishes show up
+# once the cache expires.
+@st.cache_data(ttl=5)
+def _list_jobs(limit, status=None):
+    # Other workers' reads are reused through Redis when REDIS_URL is set
+    key = f"jobs:{shared_cache.version('jobs')}:{limit}:{status}"
+    jobs = shared_cache.get(key)
+    if jobs is None:
+        jobs = job_manager.list_jobs(limit=limit, status=status)
+        shared_cache.set(key, jobs, ttl=5)
+    return jobs
+
+@st.cache_data(ttl=2)
+def _get_job(job_id):
+    # The manager lives as long as the process; pick up a status the CLI set since
+    job_manager.peek_status(job_id)
+    return job_manager.get_job(job_id)
+
+# Keyed on the file's mtime and size, so unchanged files are not read again on reruns
+@st.cache_data(max_entries=32, ttl=60)
+def _read_file(path, mtime, size):
+    with open(path, "r") as f:
+        content = f.read(FILE_PREVIEW_CHARS + 1)
+    truncated = len(content) > FILE_PREVIEW_CHARS
+    return content[:FILE_PREVIEW_CHARS], truncated
+
+# Keyed on the registered tool names, so the grouping is rebuilt only if the registry changes
+@st.cache_data
+def _grouped_tools(tool_names):
+    tool_list = tools.list_tools()
+    tool_categories = {}
+    for name, description in tool_list.items():
+        # Extract category from tool name
+        category = name.split("_")[0] if "_" in name else "general"
+        tool_categories.setdefault(category, []).append({
+            "name": name,
+            "description": description
+        })
+    return tool_list, tool_categories
+
+def recent_jobs(limit, status=None):
+    """Newest jobs, sliced and filtered from one shared cached query where possible"""
+    jobs = _list_jobs(limit=max(RECENT_JOBS_LIMIT, limit))
+    if status is None:
+        return jobs[:limit]
+    matching = [job for job in jobs if job['status'] == status]
+    if len(matching) < limit and len(jobs) == max(RECENT_JOBS_LIMIT, limit):
+        # Older jobs with this status may exist beyond the shared window
+        return _list_jobs(limit=limit, status=status)
+    return matching[:limit]
+
+def infer_tool_params(name):
+    """Guess a tool's test-form parameters from its name, as (param, widget, label, default) tuples"""
+    specs = []
+
+    # Special case for list_files which expects 'directory' instead of 'path'
+    if name == "list_files":
+        specs.append(("directory", "text_input", "Directory Path", "."))
+    # File path parameter for most file operations
+    elif "file" in name or "read" in name or "write" in name:
+        specs.append(("path", "text_input", "File Path", "workspace/"))
+
+    # Content parameter for write operations
+    if "write" in name:
+        specs.append(("content", "text_area", "Content", ""))
+
+    # Query parameter for database operations
+    if "query" in name:
+        specs.append(("query", "text_area", "SQL Query", ""))
+        specs.append(("db_path", "text_input", "Database Path", "workspace/database.db"))
+
+    # Keyword query for memory search
+    if "search" in name:
+        specs.append(("query", "text_input", "Search Query", ""))
+
+    # URL parameter for web tools
+    if "url" in name or "fetch" in name or "download" in name:
+        specs.append(("url", "text_input", "URL", ""))
+
+    # Command parameter for shell operations
+    if "shell" in name:
+        specs.append(("command", "text_input", "Shell Command", ""))
+
+    # Code parameter for code execution
+    if "code" in name:
+        specs.append(("code", "text_area", "Code", ""))
+
+    return specs
+
+# Built once per set of registered tools, so selecting a tool is a dict lookup
+@st.cache_data
+def _tool_param_specs(tool_names):
+    return {name: infer_tool_params(name) for name in tool_names}
+
+def _invalidate_jobs():
+    """Drop cached job reads after the job store changes"""
+    _list_jobs.clear()
+    _get_job.clear()
+    shared_cache.bump("jobs")
+
+FILE_PREVIEW_CHARS = 1024 * 1024  # larger workspace files are shown truncated
+RECENT_JOBS_LIMIT = 50  # one cached query serves both the sidebar and the Jobs list
+
+# Status display lookups
+STATUS_ICON = {
+    JobStatus.COMPLETED.value: "✅",
+    JobStatus.FAILED.value: "❌",
+    JobStatus.RUNNING.value: "⏳",
+    JobStatus.PAUSED.value: "⏸️",
+}
+STEP_STATUS_ICON = {
+    StepStatus.COMPLETED.value: "✅",
+    StepStatus.FAILED.value: "❌",
+    StepStatus.RUNNING.value: "⏳",
+}
+
 # Initialize session state
 if "active_tab" not in st.session_state:
     st.session_state.active_tab = "Tasks"
@@ -35,11 +179,13 @@ if "current_job_id" not in st.session_state:
 if "debug_mode" not in st.session_state:
     st.session_state.debug_mode = False
 if "file_list" not in st.session_state:
-    st.session_state.file_list = []
+    st.session_state.file_list = None  # loaded on the first visit to the Files tab
 if "selected_file" not in st.session_state:
     st.session_state.selected_file = None
 if "expanded_jobs" not in st.session_state:
     st.session_state.expanded_jobs = set()
+if "pending_confirm" not in st.session_state:
+    st.session_state.pending_confirm = None  # destructive action waiting for confirmation
 if "_switch_to_tab" not in st.session_state:
     st.session_state._switch_to_tab = None
 
@@ -55,18 +201,64 @@ def refresh_file_list():
     if not os.path.exists(workspace_dir):
         os.makedirs(workspace_dir)
 
-    files = [f for f in os.listdir(workspace_dir) if os.path.isfile(os.path.join(workspace_dir, f))]
-    st.session_state.file_list = sorted(files)
+    # DirEntry.is_file() uses the type from the directory listing instead of a stat per file
+    with os.scandir(workspace_dir) as entries:
+        st.session_state.file_list = sorted(entry.name for entry in entries if entry.is_file())
+
+# Streamlit re-executes this script on every rerun, which would also recreate a plain
+# lru_cache; building the memoized function inside cache_resource keeps one per process
+@st.cache_resource
+def _time_formatter():
+    @lru_cache(maxsize=2048)
+    def format_time(iso_time):
+        """Format ISO timestamp to a readable format"""
+        if not iso_time:
+            return ""
+        try:
+            dt = datetime.fromisoformat(iso_time)
+            return dt.strftime("%Y-%m-%d %H:%M:%S")
+        except:
+            return iso_time
+    return format_time
+
+format_time = _time_formatter()
+
+def truncate(text, length):
+    """Shorten text to length characters, marking the cut with an ellipsis"""
+    return text if len(text) <= length else text[:length] + "..."
+
+def run_step_streamed(planner, step, step_index, fresh=False):
+    """Execute a step, showing its code as the LLM writes it instead of waiting for the whole reply"""
+    code_area = st.empty()
+    response = ""
+    for chunk in planner.generate_code_stream(step, fresh=fresh):
+        response += chunk
+        code_area.code(response, language="python")
+    return planner.execute_step(step, step_index, code=planner.clean_code(response))
+
+def confirm_action(action, message, confirm_label):
+    """Show the confirmation prompt for a pending action; return True once it is confirmed"""
+    if st.session_state.pending_confirm != action:
+        return False
+
+    st.warning(message, icon="⚠️")
+    if st.button(confirm_label, key=f"confirm_{action}"):
+        st.session_state.pending_confirm = None
+        return True
+    if st.button("Cancel", key=f"cancel_{action}"):
+        st.session_state.pending_confirm = None
+        st.rerun()
+    return False
+
+def sync_debug_mode():
+    """Copy the Settings tab toggle into the shared debug_mode flag"""
+    st.session_state.debug_mode = st.session_state.debug_mode_toggle
 
-def format_time(iso_time):
-    """Format ISO timestamp to a readable format"""
-    if not iso_time:
-        return ""
-    try:
-        dt = datetime.fromisoformat(iso_time)
-        return dt.strftime("%Y-%m-%d %H:%M:%S")
-    except:
-        return iso_time
+def select_job_row():
+    """Open the job whose row was selected in the Jobs table"""
+    selected_rows = st.session_state.jobs_table.selection.rows
+    if selected_rows:
+        st.session_state.current_job_id = st.session_state.jobs_table_ids[selected_rows[0]]
 
 def toggle_expand_job(job_id):
     """Toggle the expanded state of a job in the sidebar"""
@@ -75,6 +267,42 @@ def toggle_expand_job(job_id):
     else:
         st.session_state.expanded_jobs.add(job_id)
 
+# Fragments rerun on their own (on a timer, or when their own widgets change), so
+# refreshing these lists doesn't re-execute the rest of the page
+@st.fragment(run_every="10s")
+def recent_jobs_list():
+    """Sidebar list of the newest jobs, refreshed every 10 seconds"""
+    jobs = recent_jobs(5)
+    if not jobs:
+        st.info("No jobs found")
+    else:
+        for job in jobs:
+            status_icon = STATUS_ICON.get(job['status'], "⏸️")
+            col1, col2 = st.columns([4, 1])
+            with col1:
+                st.markdown(f"{status_icon} {truncate(job['task'], 30)}")
+            with col2:
+                if st.button("View", key=f"sidebar_{job['id']}"):
+                    st.session_state.current_job_id = job['id']
+                    # Use the switch_to_tab variable instead of directly modifying active_tab
+                    st.session_state._switch_to_tab = "Jobs"
+                    st.rerun()
+
+@st.fragment
+def workspace_file_list():
+    """Files tab list of workspace files; selecting a file reruns the whole page"""
+    if st.button("Refresh Files"):
+        refresh_file_list()
+
+    if not st.session_state.file_list:
+        st.info("No files found in workspace directory")
+    else:
+        for file in st.session_state.file_list:
+            file_btn_key = f"file_{file}"  # Make key unique
+            if st.button(file, key=file_btn_key):
+                st.session_state.selected_file = file
+                st.rerun()
+
 # Sidebar content
 with st.sidebar:
     st.title("🧠 LocalGenius")
@@ -90,28 +318,12 @@ with st.sidebar:
     st.markdown("---")
     st.subheader("Recent Jobs")
 
-    jobs = job_manager.list_jobs(limit=5)
-    if not jobs:
-        st.info("No jobs found")
-    else:
-        for job in jobs:
-            status_icon = "✅" if job['status'] == JobStatus.COMPLETED.value else "❌" if job['status'] == JobStatus.FAILED.value else "⏳" if job['status'] == JobStatus.RUNNING.value else "⏸️"
-            col1, col2 = st.columns([4, 1])
-            with col1:
-                st.markdown(f"{status_icon} {job['task'][:30]}{'...' if len(job['task']) > 30 else ''}")
-            with col2:
-                if st.button("View", key=f"sidebar_{job['id']}"):
-                    st.session_state.current_job_id = job['id']
-                    # Use the switch_to_tab variable instead of directly modifying active_tab
-                    st.session_state._switch_to_tab = "Jobs"
-                    st.rerun()
+    recent_jobs_list()
 
     # Debug mode toggle in sidebar
     st.markdown("---")
-    debug_toggle = st.checkbox("Debug Mode", value=st.session_state.debug_mode)
-    if debug_toggle != st.session_state.debug_mode:
-        st.session_state.debug_mode = debug_toggle
-        st.rerun()
+    # Bound to session state, so a click takes effect in the rerun Streamlit already schedules
+    st.checkbox("Debug Mode", key="debug_mode")
 
 # Main content
 if st.session_state.active_tab == "Tasks":
@@ -124,9 +336,19 @@ if st.session_state.active_tab == "Tasks":
             height=100
         )
 
+        max_parallel_steps = st.slider(
+            "Parallel steps",
+            min_value=1,
+            max_value=8,
+            value=2,
+            help="Maximum number of independent plan steps executed at once"
+        )
+
         submit_button = st.form_submit_button("Submit Task")
 
     if submit_button and user_input:
+        memory = get_memory()
+        planner = get_planner()
         with st.status("Processing task...") as status:
             status.update(label="Logging task to memory")
             memory.log_task(user_input)
@@ -137,7 +359,7 @@ if st.session_state.active_tab == "Tasks":
             if similar:
                 st.subheader("🔍 Similar Tasks in Memory")
                 for i, match in enumerate(similar, 1):
-                    st.markdown(f"{i}. {match[:200]}{'...' if len(match) > 200 else ''}")
+                    st.markdown(f"{i}. {truncate(match, 200)}")
 
             try:
                 # Create a new job
@@ -151,47 +373,69 @@ if st.session_state.active_tab == "Tasks":
                 if similar:
                     job_manager.set_memory_context(job_id, similar)
 
-                status.update(label="Planning task with LLaMA")
-                plan = planner.plan_task(user_input, memory_context=similar)
-
-                if not plan or len(plan) == 0:
-                    st.error("❌ Could not generate a plan. Try a simpler task or check logs.")
-                    if st.session_state.debug_mode:
-                        st.error("Debug: LLM didn't return a parsable plan format")
-                else:
-                    memory.log_plan(plan)
-
-                    # Save plan to job
-                    job_manager.set_job_plan(job_id, plan)
+                # All step output goes into one element, rendered once per finished step;
+                # the plan above it lists the steps still in flight
+                plan_area = st.empty()
+                steps_area = st.empty()
+                step_lines = {}
 
-                    # Display the plan
-                    st.subheader("🧠 Generated Plan")
-                    for i, step in enumerate(plan, 1):
-                        step_placeholder = st.empty()
-                        step_placeholder.markdown(f"**Step {i}:** {step}")
+                def start_step(index, step):
+                    status.update(label=f"Executing step {index + 1}: {step}")
+                    # Mark step as running
+                    job_manager.start_step(job_id, index)
 
-                        status.update(label=f"Executing step {i}: {step}")
-
-                        # Mark step as running
-                        job_manager.start_step(job_id, i-1)
-
-                        try:
-                            result = planner.execute_step(step, i-1)
+                def show_results(results):
+                    for index, step, result, step_error in results:
+                        if step_error is None:
                             memory.log_result(step, result)
 
                             # Mark step as completed
-                            job_manager.complete_step(job_id, i-1, result)
+                            job_manager.complete_step(job_id, index, result)
 
-                            step_placeholder.markdown(f"**Step {i}:** {step}\n\n✅ **Result:** {result}")
-                        except Exception as step_error:
+                            step_lines[index] = f"**Step {index + 1}:** {step}\n\n✅ **Result:** {result}"
+                        else:
                             error_msg = f"Error executing step: {str(step_error)}"
-                            step_placeholder.markdown(f"**Step {i}:** {step}\n\n⚠️ **Error:** {error_msg}")
+                            step_lines[index] = f"**Step {index + 1}:** {step}\n\n⚠️ **Error:** {error_msg}"
 
                             # Mark step as failed
-                            job_manager.complete_step(job_id, i-1, error_msg, StepStatus.FAILED)
+                            job_manager.complete_step(job_id, index, error_msg, StepStatus.FAILED)
 
                             if st.session_state.debug_mode:
-                                st.code(traceback.format_exc(), language="python")
+                                st.code("".join(traceback.format_exception(type(step_error), step_error, step_error.__traceback__)), language="python")
+
+                        steps_area.markdown("\n\n".join(step_lines[i] for i in sorted(step_lines)))
+
+                # Steps run on worker threads as soon as their dependencies finish, with
+                # the code of waiting steps generated in the meantime; job updates and
+                # rendering stay on the script thread
+                graph = StepGraph(planner.execute_step, max_workers=max_parallel_steps,
+                                  on_start=start_step, prefetch=planner.generate_code)
+
+                # Show each step and start it as soon as the LLM has written it,
+                # rather than waiting for the whole plan
+                status.update(label="Planning task with LLaMA")
+                plan, dependencies = [], []
+                for step, deps in planner.plan_task_stream(user_input, memory_context=similar):
+                    job_manager.add_plan_step(job_id, step, deps)
+                    graph.add(len(plan), step, deps)
+                    plan.append(step)
+                    dependencies.append(deps)
+
+                    with plan_area.container():
+                        st.subheader("🧠 Generated Plan")
+                        st.markdown("\n".join(f"{i}. {step}" for i, step in enumerate(plan, 1)))
+                    show_results(graph.results(block=False))
+                job_manager.finish_plan(job_id)
+
+                if not plan or len(plan) == 0:
+                    st.error("❌ Could not generate a plan. Try a simpler task or check logs.")
+                    if st.session_state.debug_mode:
+                        st.error("Debug: LLM didn't return a parsable plan format")
+                else:
+                    memory.log_plan(plan)
+
+                    with st.spinner(f"Executing {len(plan)} steps..."):
+                        show_results(graph.results())
 
                     status.update(label="Task completed", state="complete")
 
@@ -204,6 +448,15 @@ if st.session_state.active_tab == "Tasks":
                 if st.session_state.debug_mode:
                     st.code(traceback.format_exc(), language="python")
                 status.update(label="Task failed", state="error")
+            finally:
+                _invalidate_jobs()
+
+        if st.session_state.debug_mode:
+            stats = memory.embedding_stats()
+            st.caption(
+                f"Embedding cache: {stats['hit_rate']:.0%} hit rate "
+                f"({stats['memory_hits']} memory hits, {stats['store_hits']} store hits, {stats['misses']} misses)"
+            )
 
 elif st.session_state.active_tab == "Jobs":
     st.title("Job Management")
@@ -222,41 +475,40 @@ elif st.session_state.active_tab == "Jobs":
         limit = st.slider("Number of jobs to show", min_value=5, max_value=50, value=20, step=5)
 
         if st.button("Refresh Jobs"):
+            _invalidate_jobs()
             st.rerun()
 
         # Get jobs
         filtered_status = None if status_filter == "All" else status_filter
-        jobs = job_manager.list_jobs(limit=limit, status=filtered_status)
+        jobs = recent_jobs(limit, status=filtered_status)
 
         if not jobs:
             st.info("No jobs found matching the criteria.")
         else:
-            # Create a dataframe-like display
-            for job in jobs:
-                col_job, col_status, col_date, col_actions = st.columns([3, 1, 2, 1])
-
-                with col_job:
-                    st.markdown(f"**{job['task'][:50]}{'...' if len(job['task']) > 50 else ''}**")
-
-                with col_status:
-                    status_color = "green" if job['status'] == JobStatus.COMPLETED.value else "red" if job['status'] == JobStatus.FAILED.value else "blue"
-                    st.markdown(f"<span style='color:{status_color}'>{job['status']}</span>", unsafe_allow_html=True)
-
-                with col_date:
-                    st.text(format_time(job.get('created_at', '')))
-
-                with col_actions:
-                    if st.button("View", key=f"view_job_{job['id']}"):
-                        st.session_state.current_job_id = job['id']
-                        st.rerun()
-
-                st.markdown("---")
+            # One dataframe element for the whole list; selecting a row opens the job
+            st.session_state.jobs_table_ids = [job['id'] for job in jobs]
+            rows = [
+                {
+                    "Task": truncate(job['task'], 50),
+                    "Status": f"{STATUS_ICON.get(job['status'], '⏸️')} {job['status']}",
+                    "Created": format_time(job.get('created_at', '')),
+                }
+                for job in jobs
+            ]
+            st.dataframe(
+                rows,
+                hide_index=True,
+                use_container_width=True,
+                key="jobs_table",
+                on_select=select_job_row,
+                selection_mode="single-row"
+            )
 
     with col2:
         st.subheader("Job Details")
 
         if st.session_state.current_job_id:
-            job = job_manager.get_job(st.session_state.current_job_id)
+            job = _get_job(st.session_state.current_job_id)
             if job:
                 st.markdown(f"**ID:** {job['id']}")
                 st.markdown(f"**Status:** {job['status']}")
@@ -270,8 +522,10 @@ elif st.session_state.active_tab == "Jobs":
                     if job['status'] in [JobStatus.PAUSED.value, JobStatus.RUNNING.value]:
                         if st.button("Resume Job"):
                             st.info("Resuming job...")
+                            planner = get_planner()
                             planner.current_job_id = job['id']
                             job_manager.update_job_status(job['id'], JobStatus.RUNNING)
+                            _invalidate_jobs()
 
                             # Find the first incomplete step
                             for step_index, step in enumerate(job['steps']):
@@ -279,14 +533,16 @@ elif st.session_state.active_tab == "Jobs":
                                     # Execute the step
                                     try:
                                         job_manager.start_step(job['id'], step_index)
-                                        result = planner.execute_step(step['description'], step_index)
+                                        result = run_step_streamed(planner, step['description'], step_index)
                                         job_manager.complete_step(job['id'], step_index, result)
 
                                         # Refresh job details
+                                        _invalidate_jobs()
                                         st.rerun()
                                     except Exception as e:
                                         st.error(f"Error executing step: {str(e)}")
                                         job_manager.complete_step(job['id'], step_index, str(e), StepStatus.FAILED)
+                                        _invalidate_jobs()
                                         st.rerun()
                                     break
 
@@ -294,6 +550,7 @@ elif st.session_state.active_tab == "Jobs":
                     if job['status'] == JobStatus.RUNNING.value:
                         if st.button("Abort Job"):
                             job_manager.abort_job(job['id'])
+                            _invalidate_jobs()
                             st.rerun()
 
                 # Plan
@@ -304,7 +561,7 @@ elif st.session_state.active_tab == "Jobs":
                 # Steps with results
                 with st.expander("Execution Steps", expanded=True):
                     for i, step in enumerate(job.get('steps', []), 1):
-                        status_icon = "✅" if step['status'] == StepStatus.COMPLETED.value else "❌" if step['status'] == StepStatus.FAILED.value else "⏳" if step['status'] == StepStatus.RUNNING.value else "⏸️"
+                        status_icon = STEP_STATUS_ICON.get(step['status'], "⏸️")
                         st.markdown(f"{status_icon} **Step {i}:** {step['description']}")
 
                         if step['status'] in [StepStatus.COMPLETED.value, StepStatus.FAILED.value]:
@@ -319,14 +576,17 @@ elif st.session_state.active_tab == "Jobs":
                             if st.button(f"Retry Step {i}", key=retry_btn_key):
                                 try:
                                     st.info(f"Retrying step {i}...")
+                                    planner = get_planner()
                                     planner.current_job_id = job['id']
                                     job_manager.start_step(job['id'], step['index'])
-                                    result = planner.execute_step(step['description'], step['index'])
+                                    result = run_step_streamed(planner, step['description'], step['index'], fresh=True)
                                     job_manager.complete_step(job['id'], step['index'], result)
+                                    _invalidate_jobs()
                                     st.rerun()
                                 except Exception as e:
                                     st.error(f"Error retrying step: {str(e)}")
                                     job_manager.complete_step(job['id'], step['index'], str(e), StepStatus.FAILED)
+                                    _invalidate_jobs()
                                     st.rerun()
 
                 # Memory context
@@ -367,22 +627,15 @@ elif st.session_state.active_tab == "Files":
         except Exception as e:
             st.error(f"Error uploading file: {str(e)}")
 
-    # Refresh file list
-    refresh_file_list()
+    # Load the file list once; file operations refresh it when they change the workspace
+    if st.session_state.file_list is None:
+        refresh_file_list()
 
     col1, col2 = st.columns([1, 2])
 
     with col1:
         st.subheader("Files")
-
-        if not st.session_state.file_list:
-            st.info("No files found in workspace directory")
-        else:
-            for file in st.session_state.file_list:
-                file_btn_key = f"file_{file}"  # Make key unique
-                if st.button(file, key=file_btn_key):
-                    st.session_state.selected_file = file
-                    st.rerun()
+        workspace_file_list()
 
     with col2:
         st.subheader("File Content")
@@ -394,8 +647,11 @@ elif st.session_state.active_tab == "Files":
             file_ext = os.path.splitext(st.session_state.selected_file)[1].lower()
 
             try:
-                with open(file_path, "r") as f:
-                    content = f.read()
+                stat = os.stat(file_path)
+                content, truncated = _read_file(file_path, stat.st_mtime, stat.st_size)
+
+                if truncated:
+                    st.warning(f"File is {stat.st_size:,} bytes; showing the first {FILE_PREVIEW_CHARS:,} characters.")
 
                 # Display file content with appropriate highlighting
                 if file_ext in [".py", ".js", ".html", ".css", ".json"]:
@@ -407,7 +663,8 @@ elif st.session_state.active_tab == "Files":
                 col_a, col_b = st.columns(2)
                 with col_a:
                     edit_key = f"edit_{st.session_state.selected_file}"
-                    if st.button("Edit", key=edit_key):
+                    # Saving a truncated preview would cut the file short, so only whole files are editable
+                    if st.button("Edit", key=edit_key, disabled=truncated):
                         # Enable editing in a text area
                         edited_content = st.text_area(
                             "Edit file content",
@@ -427,19 +684,17 @@ elif st.session_state.active_tab == "Files":
                 with col_b:
                     delete_key = f"delete_{st.session_state.selected_file}"
                     if st.button("Delete", key=delete_key):
-                        warning_key = f"warning_{st.session_state.selected_file}"
-                        st.warning(f"Are you sure you want to delete {st.session_state.selected_file}?", icon="⚠️")
+                        st.session_state.pending_confirm = delete_key
 
-                        confirm_key = f"confirm_{st.session_state.selected_file}"
-                        if st.button("Confirm Delete", key=confirm_key):
-                            try:
-                                os.remove(file_path)
-                                st.success(f"File deleted: {file_path}")
-                                st.session_state.selected_file = None
-                                refresh_file_list()
-                                st.rerun()
-                            except Exception as e:
-                                st.error(f"Error deleting file: {str(e)}")
+                    if confirm_action(delete_key, f"Are you sure you want to delete {st.session_state.selected_file}?", "Confirm Delete"):
+                        try:
+                            os.remove(file_path)
+                            st.success(f"File deleted: {file_path}")
+                            st.session_state.selected_file = None
+                            refresh_file_list()
+                            st.rerun()
+                        except Exception as e:
+                            st.error(f"Error deleting file: {str(e)}")
             except Exception as e:
                 st.error(f"Error reading file: {str(e)}")
         else:
@@ -448,25 +703,10 @@ elif st.session_state.active_tab == "Files":
 elif st.session_state.active_tab == "Tools":
     st.title("Tools Registry")
 
-    # Get all available tools
-    tool_list = tools.list_tools()
-
-    # Group tools by category
-    tool_categories = {}
-    for name, description in tool_list.items():
-        # Extract category from tool name
-        if "_" in name:
-            category = name.split("_")[0]
-        else:
-            category = "general"
-
-        if category not in tool_categories:
-            tool_categories[category] = []
-
-        tool_categories[category].append({
-            "name": name,
-            "description": description
-        })
+    # Get all available tools, grouped by category, and their test-form parameters
+    tool_names = tuple(tools.tools)
+    tool_list, tool_categories = _grouped_tools(tool_names)
+    tool_param_specs = _tool_param_specs(tool_names)
 
     # Display tools by category
     for category, tools_list in tool_categories.items():
@@ -486,34 +726,9 @@ elif st.session_state.active_tab == "Tools":
         # Dynamic form based on tool name patterns
         with st.form(key="tool_test_form"):
             params = {}
-
-            # Special case for list_files which expects 'directory' instead of 'path'
-            if selected_tool == "list_files":
-                params["directory"] = st.text_input("Directory Path", value=".")
-            # File path parameter for most file operations
-            elif "file" in selected_tool or "read" in selected_tool or "write" in selected_tool:
-                params["path"] = st.text_input("File Path", value="workspace/")
-
-            # Content parameter for write operations
-            if "write" in selected_tool:
-                params["content"] = st.text_area("Content")
-
-            # Query parameter for database operations
-            if "query" in selected_tool or selected_tool == "execute_query":
-                params["query"] = st.text_area("SQL Query")
-                params["db_path"] = st.text_input("Database Path", value="workspace/database.db")
-
-            # URL parameter for web tools
-            if "url" in selected_tool or "fetch" in selected_tool or "download" in selected_tool:
-                params["url"] = st.text_input("URL")
-
-            # Command parameter for shell operations
-            if "shell" in selected_tool or selected_tool == "run_shell":
-                params["command"] = st.text_input("Shell Command")
-
-            # Code parameter for code execution
-            if "code" in selected_tool or selected_tool == "run_code":
-                params["code"] = st.text_area("Code")
+            for param, widget, label, default in tool_param_specs[selected_tool]:
+                input_widget = st.text_area if widget == "text_area" else st.text_input
+                params[param] = input_widget(label, value=default)
 
             # Submit button
             submit_test = st.form_submit_button("Run Tool")
@@ -523,6 +738,8 @@ elif st.session_state.active_tab == "Tools":
                 try:
                     # Execute the tool with parameters
                     result = tools.execute(selected_tool, **params)
+                    if asyncio.iscoroutine(result):
+                        result = asyncio.run(result)
 
                     # Display result
                     st.subheader("Result")
@@ -552,11 +769,10 @@ elif st.session_state.active_tab == "Settings":
 
     # Debug Mode
     st.subheader("Debug Options")
-    debug_toggle = st.toggle("Debug Mode", st.session_state.debug_mode,
-                         help="Enable detailed error messages and execution logs")
-    if debug_toggle != st.session_state.debug_mode:
-        st.session_state.debug_mode = debug_toggle
-        st.rerun()
+    # The sidebar checkbox owns the debug_mode key; this toggle mirrors it and writes back on change
+    st.session_state.debug_mode_toggle = st.session_state.debug_mode
+    st.toggle("Debug Mode", key="debug_mode_toggle", on_change=sync_debug_mode,
+              help="Enable detailed error messages and execution logs")
 
     # LLM Options
     st.subheader("LLM Configuration")
@@ -578,13 +794,13 @@ elif st.session_state.active_tab == "Settings":
 
     with col1:
         if st.button("Clear Memory Cache"):
+            st.session_state.pending_confirm = "clear_memory"
+
+        if confirm_action("clear_memory", "This will delete all stored memories. Are you sure?", "Confirm Clear Memory"):
             # This would clear the vector database in a real implementation
-            st.warning("This will delete all stored memories. Are you sure?")
-            confirm_clear = st.button("Confirm Clear Memory", key="confirm_clear_memory")
-            if confirm_clear:
-                st.info("Clearing memory cache...")
-                # memory.clear_cache()  # You would need to implement this
-                st.success("Memory cache cleared")
+            st.info("Clearing memory cache...")
+            # memory.clear_cache()  # You would need to implement this
+            st.success("Memory cache cleared")
 
     with col2:
         if st.button("Export Memory"):
@@ -609,22 +825,22 @@ elif st.session_state.active_tab == "Settings":
     )
 
     if st.button("Clean Up Jobs"):
-        st.warning("This will delete completed jobs. Are you sure?")
-        confirm_cleanup = st.button("Confirm Cleanup", key="confirm_job_cleanup")
-        if confirm_cleanup:
-            # This would delete old jobs in a real implementation
-            st.info("Cleaning up old jobs...")
-            # job_manager.cleanup_jobs(days=job_retention)
-            st.success("Old jobs cleaned up")
+        st.session_state.pending_confirm = "job_cleanup"
+
+    if confirm_action("job_cleanup", "This will delete completed jobs. Are you sure?", "Confirm Cleanup"):
+        # This would delete old jobs in a real implementation
+        st.info("Cleaning up old jobs...")
+        # job_manager.cleanup_jobs(days=job_retention)
+        st.success("Old jobs cleaned up")
 
     # Workspace Management
     st.subheader("Workspace Management")
 
     if st.button("Clean Workspace"):
-        st.warning("This will delete temporary files from the workspace. Are you sure?")
-        confirm_workspace = st.button("Confirm Workspace Cleanup", key="confirm_workspace_cleanup")
-        if confirm_workspace:
-            # This would clean up temporary files in a real implementation
-            st.info("Cleaning up workspace...")
-            # Implement workspace cleanup logic
-            st.success("Workspace cleaned")
+        st.session_state.pending_confirm = "workspace_cleanup"
+
+    if confirm_action("workspace_cleanup", "This will delete temporary files from the workspace. Are you sure?", "Confirm Workspace Cleanup"):
+        # This would clean up temporary files in a real implementation
+        st.info("Cleaning up workspace...")
+        # Implement workspace cleanup logic
+        st.success("Workspace cleaned")
@@ -2,17 +2,314 @@
 
 from tools.exec import run_code
 from tools.file_ops import write_file
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from cache import PromptCache
 import re
+import string
+
+# Optional suffix on a planned step naming the earlier steps it needs, e.g. "(depends on: 1, 3)"
+DEPENDS_ON_PATTERN = re.compile(r"\s*\(depends on:?\s*([^)]*)\)\s*$", re.IGNORECASE)
+
+# Patterns used on every LLM response, compiled once
+NUMBERED_STEP_PATTERN = re.compile(r"^\d+\.\s*(\S.*)")  # "1. Step description"
+STEP_LABEL_PATTERN = re.compile(r"step\s*\d+[:\)]\s*(.*)", re.IGNORECASE)  # "Step 1: Description"
+CODE_BLOCK_PATTERN = re.compile(r"```(?:python)?\n(.*?)```", re.DOTALL)
+OPENING_FENCE_PATTERN = re.compile(r"```[ \t]*\w")  # a fence with a language tag
+NUMBER_PATTERN = re.compile(r"\d+")
+
+# Maps punctuation to spaces, so a step's words for its file name come from a plain split()
+FILENAME_TABLE = str.maketrans(dict.fromkeys(string.punctuation, " "))
+
+# Keyword scans done in one pass each instead of one substring search per keyword
+WRITE_KEYWORDS_PATTERN = re.compile(r"create|write|implement|develop", re.IGNORECASE)  # steps whose code is saved
+NOT_A_STEP_PATTERN = re.compile(r"reason|explanation|note:", re.IGNORECASE)
+EXAMPLE_COMMENT_PATTERN = re.compile(r"Sample|Usage|Example")
+
+# Responses the runner returns on failure; these are never cached
+RUNNER_ERROR_PREFIX = "[Runner Error]"
+
+# Limits on the memory context put into the planning prompt, to keep it short
+MAX_CONTEXT_ENTRIES = 3
+MAX_CONTEXT_CHARS = 1000
+
+
+def parse_dependencies(step, index):
+    """
+    Strip the dependency annotation from a single planned step.
+
+    Args:
+        step: Step description as parsed from the LLM output
+        index: Zero-based position of the step in the plan
+
+    Returns:
+        Tuple of (step description, list of dependency indices)
+    """
+    match = DEPENDS_ON_PATTERN.search(step)
+    if not match:
+        return step, [index - 1] if index > 0 else []
+    refs = {int(n) - 1 for n in NUMBER_PATTERN.findall(match.group(1))}
+    return step[:match.start()].rstrip(), sorted(ref for ref in refs if 0 <= ref < index)
+
+
+def split_dependencies(steps):
+    """
+    Strip dependency annotations from planned steps.
+
+    A step annotated "(depends on: none)" depends on no earlier step, and
+    "(depends on: 1, 3)" on steps 1 and 3. Steps without an annotation depend
+    on the step before them, so unannotated plans still run in order.
+
+    Args:
+        steps: Step descriptions as parsed from the LLM output
+
+    Returns:
+        Tuple of (step descriptions, list of dependency index lists)
+    """
+    clean_steps = []
+    dependencies = []
+    for i, step in enumerate(steps):
+        step, deps = parse_dependencies(step, i)
+        clean_steps.append(step)
+        dependencies.append(deps)
+    return clean_steps, dependencies
+
+
+def _opens_code_block(prompt):
+    """Whether a prompt ends inside a code block it opened, so its completion starts with code."""
+    return prompt.count("```") % 2 == 1
+
+
+def _closed_code_block(response, prefilled=False, final=False):
+    """
+    Return the code of a completion once its code block has been closed.
+
+    Without prefill the code is the contents of the first complete block. When
+    the prompt opened the block, the first fence in the response normally
+    closes it, but models often open a block of their own instead, e.g. after a
+    "Here is the code:" preamble. A fence opens a block when it has a language
+    tag, when only whitespace comes before it, or when the text before it ends
+    with a colon.
+
+    Args:
+        response: The completion so far
+        prefilled: Whether the prompt ends inside a code block it opened
+        final: Whether the completion is complete; until it is, a fence with
+               nothing after it yet could still turn out to be either kind
+
+    Returns:
+        The code, or None while no block has been closed
+    """
+    start = 0
+    if prefilled:
+        start = response.find("```")
+        if start < 0:
+            return None
+        if not final and not response[start + 3:].strip(" \t"):
+            return None
+
+        before = response[:start].rstrip()
+        opens = not before or before.endswith(":") or OPENING_FENCE_PATTERN.match(response, start)
+        if not opens:
+            return response[:start]
+
+    match = CODE_BLOCK_PATTERN.search(response, start)
+    return match.group(1) if match else None
+
+
+class StepGraph:
+    """
+    Executes plan steps on a thread pool, starting each step as soon as the
+    steps it depends on have finished. Failed steps count as finished, the same
+    way a sequential run carries on after a failure.
+    """
+
+    def __init__(self, execute, max_workers=4, on_start=None, prefetch=None):
+        """
+        Args:
+            execute: Callable (step, index) -> result run on a worker thread
+            max_workers: Maximum number of steps executing at once
+            on_start: Optional callable (index, step) called on the calling thread
+                      before a step is submitted; returning False stops the run
+            prefetch: Optional callable (step) run on a background thread while a
+                      step waits for its dependencies, e.g. to generate its code
+                      ahead of time; the step itself runs after the prefetch ends
+        """
+        self.execute = execute
+        self.on_start = on_start
+        self.prefetch = prefetch
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers))
+        self._prefetcher = ThreadPoolExecutor(max_workers=1) if prefetch else None
+        self._waiting = {}   # index -> (step, unfinished dependency indices)
+        self._running = {}   # future -> (index, step)
+        self._prefetched = {}  # index -> prefetch future
+        self._finished = set()
+        self._stopped = False
+
+    def add(self, index, step, deps=()):
+        """Add a step, submitting it right away if its dependencies are met."""
+        if self._stopped:
+            return
+        self._waiting[index] = (step, set(deps) - self._finished)
+        if self._prefetcher and self._waiting[index][1]:
+            self._prefetched[index] = self._prefetcher.submit(self.prefetch, step)
+        self._schedule()
+
+    def stop(self):
+        """Stop submitting steps; steps already running are still reported."""
+        self._stopped = True
+        self._waiting.clear()
+        for future in self._prefetched.values():
+            future.cancel()
+        self._prefetched.clear()
+
+    def results(self, block=True):
+        """
+        Yield (index, step, result, error) for each step as it finishes.
+
+        Args:
+            block: Wait until every step has run. When False, yield only the
+                   steps that have already finished and return.
+        """
+        while self._running:
+            done, _ = wait(list(self._running), timeout=None if block else 0,
+                           return_when=FIRST_COMPLETED)
+            if not done:
+                return
+
+            finished = sorted((self._running.pop(future), future) for future in done)
+            for (index, step), future in finished:
+                self._finished.add(index)
+                for _, deps in self._waiting.values():
+                    deps.discard(index)
+
+                error = future.exception()
+                yield index, step, None if error else future.result(), error
+
+            self._schedule()
+
+        if block:
+            self._executor.shutdown(wait=False)
+            if self._prefetcher:
+                self._prefetcher.shutdown(wait=False)
+
+    def _schedule(self):
+        ready = sorted(index for index, (_, deps) in self._waiting.items() if not deps)
+        for index in ready:
+            if self._stopped:
+                break
+            step, _ = self._waiting.pop(index)
+            if self.on_start and self.on_start(index, step) is False:
+                self.stop()
+                break
+            future = self._executor.submit(self._run, step, index, self._prefetched.pop(index, None))
+            self._running[future] = (index, step)
+
+    def _run(self, step, index, prefetched):
+        # Let an in-flight prefetch finish so the step reuses its work;
+        # a failed prefetch only means the step does that work itself
+        if prefetched is not None:
+            wait([prefetched])
+        return self.execute(step, index)
+
 
 class TaskPlanner:
-    def __init__(self, llm):
+    def __init__(self, llm, prompt_cache=None):
         self.llm = llm
         from tools import get_registry
         self.tools = get_registry()
         self.current_job_id = None
 
+        # Identical planning and step prompts reuse the earlier response instead of
+        # another LLM round-trip
+        self.prompt_cache = prompt_cache or PromptCache()
+
     def plan_task(self, task_desc, memory_context=None):
-        context = "\n".join(memory_context or [])
+        steps, _ = self.plan_task_graph(task_desc, memory_context)
+        return steps
+
+    def plan_task_graph(self, task_desc, memory_context=None):
+        """
+        Plan a task and return its steps together with their dependencies.
+
+        Returns:
+            Tuple of (step descriptions, list of dependency index lists)
+        """
+        output = self._cached_run(self._planning_prompt(task_desc, memory_context))
+        return self._plan_from_output(output)
+
+    def plan_task_stream(self, task_desc, memory_context=None):
+        """
+        Plan a task, yielding each step as soon as the LLM has finished it.
+
+        Steps are parsed from the token stream line by line, so the caller can
+        start executing early steps while later ones are still being generated.
+        If no numbered steps appear in the stream, the full output is parsed the
+        same way plan_task_graph does once generation ends.
+
+        Yields:
+            Tuples of (step description, list of dependency indices)
+        """
+        prompt = self._planning_prompt(task_desc, memory_context)
+        output = []
+        pending = ""
+        count = 0
+
+        for chunk in self._cached_stream(prompt):
+            output.append(chunk)
+            pending += chunk
+            *lines, pending = pending.split("\n")
+            for line in lines:
+                step = self._parse_step_line(line)
+                if step:
+                    yield parse_dependencies(step, count)
+                    count += 1
+
+        step = self._parse_step_line(pending)
+        if step:
+            yield parse_dependencies(step, count)
+            count += 1
+
+        if not count:
+            yield from zip(*self._plan_from_output("".join(output)))
+
+    def _cached_run(self, prompt):
+        """Run a prompt, returning the cached response for an identical earlier prompt."""
+        key = self.prompt_cache.key(self.llm.model, prompt)
+        response = self.prompt_cache.get(key)
+        if response is None:
+            response = self.llm.run(prompt)
+            if not response.startswith(RUNNER_ERROR_PREFIX):
+                self.prompt_cache.put(key, response)
+        return response
+
+    def _cached_stream(self, prompt):
+        """
+        Stream a prompt's response, or yield the cached response as one chunk.
+
+        A streamed response is cached only once the stream has been read to the end.
+        """
+        key = self.prompt_cache.key(self.llm.model, prompt)
+        cached = self.prompt_cache.get(key)
+        if cached is not None:
+            yield cached
+            return
+
+        chunks = []
+        for chunk in self.llm.run_stream(prompt):
+            chunks.append(chunk)
+            yield chunk
+        response = "".join(chunks)
+        if response and RUNNER_ERROR_PREFIX not in response:
+            self.prompt_cache.put(key, response)
+
+    @staticmethod
+    def _parse_step_line(line):
+        """Return the step text of a numbered plan line, or None."""
+        match = NUMBERED_STEP_PATTERN.match(line.strip())
+        return match.group(1).strip() if match else None
+
+    def _planning_prompt(self, task_desc, memory_context=None):
+        context = "\n".join(self._prune_context(memory_context))
         prompt = f"""
 You are a helpful developer assistant that writes Python code to accomplish tasks.
 
@@ -28,18 +325,33 @@ Your response MUST follow this format, with each step on a new line starting wit
 2. Second coding step (e.g., "Implement a function that...")
 3. Third coding step (e.g., "Create a loop to...")
 
+If a step does not need the output of any earlier step, end it with "(depends on: none)".
+If it only needs specific earlier steps, end it with their numbers, e.g. "(depends on: 1, 2)".
+
 Task: {task_desc}
 Steps:
 1.
 """
-        output = self.llm.run(prompt)
+        return prompt
+
+    @staticmethod
+    def _prune_context(memory_context):
+        """Drop duplicate memory entries and cap their number and length for the prompt."""
+        entries = []
+        for entry in dict.fromkeys(memory_context or []):
+            entries.append(entry[:MAX_CONTEXT_CHARS])
+            if len(entries) == MAX_CONTEXT_ENTRIES:
+                break
+        return entries
+
+    def _plan_from_output(self, output):
         print(f"LLM Raw Response for planning: {output[:100]}...")  # Debug logging
 
         steps = self._parse_steps(output)
         if not steps:
             print("Warning: Could not parse steps from LLM output. Raw output:")
             print(output)
-        return steps
+        return split_dependencies(steps)
 
     def _parse_steps(self, raw):
         if not raw or not raw.strip():
@@ -49,14 +361,14 @@ Steps:
         steps = []
 
         # Try standard numbered format (e.g., "1. Step description")
-        numbered_steps = [line.split(".", 1)[1].strip() for line in lines
-                         if re.match(r"^\d+\.", line) and "." in line]
+        numbered_steps = [match.group(1).strip() for line in lines
+                          if (match := NUMBERED_STEP_PATTERN.match(line))]
         if numbered_steps:
             return numbered_steps
 
         # Try alternate formats (e.g., "Step 1: Description")
         for line in lines:
-            match = re.search(r"step\s*\d+[:\)]\s*(.*)", line, re.IGNORECASE)
+            match = STEP_LABEL_PATTERN.search(line)
             if match:
                 steps.append(match.group(1).strip())
 
@@ -67,7 +379,7 @@ Steps:
                 # Skip short lines or headers
                 if len(line.strip()) > 10 and not line.strip().endswith(':') and not line.strip().startswith('#'):
                     # Skip lines that are clearly not steps
-                    if not any(word in line.lower() for word in ['reason', 'explanation', 'note:']):
+                    if not NOT_A_STEP_PATTERN.search(line):
                         steps.append(line.strip())
 
             # Limit to at most 5 steps
@@ -75,7 +387,20 @@ Steps:
 
         return steps
 
-    def execute_step(self, step, step_index=None):
+    def generate_code_stream(self, step, fresh=False):
+        """
+        Stream the LLM's code for one plan step as it is generated.
+
+        Generation stops as soon as the code block is closed, and the response
+        is cached for generate_code. A cached response is yielded as one chunk.
+
+        Args:
+            step: Step description
+            fresh: Ask the LLM for new code even if this step's prompt is cached
+
+        Yields:
+            Chunks of the raw response text
+        """
         prompt = f"""
 You are a Python developer tasked with implementing code for the following step:
 "{step}"
@@ -90,17 +415,58 @@ CODE:
 ```python
 """
 
-        code_response = self.llm.run(prompt)
+        key = self.prompt_cache.key(self.llm.model, prompt)
+        cached = None if fresh else self.prompt_cache.get(key)
+        if cached is not None:
+            yield cached
+            return
 
-        # Clean up code - extract from markdown blocks if present
-        if "```" in code_response:
-            code_blocks = re.findall(r"```(?:python)?\n(.*?)```", code_response, re.DOTALL)
-            if code_blocks:
-                code = code_blocks[0]
-            else:
-                code = code_response
-        else:
-            code = code_response
+        # Stop as soon as the code block is closed, instead of waiting for
+        # any explanation the model adds after it
+        prefilled = _opens_code_block(prompt)
+        code_response = ""
+        for chunk in self.llm.run_stream(prompt):
+            code_response += chunk
+            yield chunk
+            if _closed_code_block(code_response, prefilled) is not None:
+                break
+        if code_response and RUNNER_ERROR_PREFIX not in code_response:
+            self.prompt_cache.put(key, code_response)
+
+    def generate_code(self, step, fresh=False):
+        """
+        Get the code for one plan step from the LLM, or from the prompt cache.
+
+        The prompt only depends on the step description, so this can run while
+        the steps it depends on are still executing.
+
+        Args:
+            step: Step description
+            fresh: Ask the LLM for new code even if this step's prompt is cached
+
+        Returns:
+            The cleaned-up code
+        """
+        return self.clean_code("".join(self.generate_code_stream(step, fresh=fresh)))
+
+    @staticmethod
+    def clean_code(code_response):
+        """
+        Extract the code from a response of generate_code_stream.
+
+        Args:
+            code_response: The full response text
+
+        Returns:
+            The cleaned-up code
+        """
+        # The step prompt ends inside the ```python block it opens
+        code = _closed_code_block(code_response, prefilled=True, final=True)
+
+        # The block never closed - extract from markdown blocks if present
+        if code is None:
+            code_blocks = CODE_BLOCK_PATTERN.findall(code_response)
+            code = code_blocks[0] if code_blocks else code_response
 
         # Additional cleaning to fix common syntax issues
         # Remove lines that are comments with problematic content
@@ -109,16 +475,34 @@ CODE:
         for line in code_lines:
             line_stripped = line.strip()
             # Skip problematic comment lines
-            if line_stripped.startswith('#') and any(word in line_stripped for word in ["Sample", "Usage", "Example"]):
+            if line_stripped.startswith('#') and EXAMPLE_COMMENT_PATTERN.search(line_stripped):
                 continue
             cleaned_lines.append(line)
 
-        code = '\n'.join(cleaned_lines)
+        return '\n'.join(cleaned_lines)
+
+    def execute_step(self, step, step_index=None, fresh=False, code=None):
+        """
+        Generate and run the code for one plan step.
+
+        Args:
+            step: Step description
+            step_index: Index of the step in its plan (optional)
+            fresh: Ask the LLM for new code even if this step's prompt is cached,
+                   e.g. when retrying a step whose cached code failed
+            code: Code already generated for the step, e.g. shown to the user
+                  while it streamed in from generate_code_stream (optional)
+
+        Returns:
+            Description of what was written and the execution output
+        """
+        if code is None:
+            code = self.generate_code(step, fresh=fresh)
 
         # Determine if we should write to file or execute directly
-        if any(keyword in step.lower() for keyword in ["create", "write", "implement", "develop"]):
+        if WRITE_KEYWORDS_PATTERN.search(step):
             # Generate a descriptive filename
-            words = re.findall(r'\w+', step.lower())
+            words = step.lower().translate(FILENAME_TABLE).split(maxsplit=5)
             filename = '_'.join(words[:5])  # First 5 words for filename
             file_name = f"workspace/{filename}.py"
 
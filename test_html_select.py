@@ -0,0 +1,164 @@
+# test_html_select.py
+
+import unittest
+from tools.html_select import SelectorParser, parse_selector, select
+
+DOCUMENT = """<html><body>
+<div id="main" class="a b">
+<h2>T &amp; x</h2>
+<div class="inner"><p>one<img src=x.png/><br>two<p>three</div>
+<ul>
+<li class="item first">A <a href="/q">l</a>
+<li class=item><a href="https://e.com/x.pdf">pdf</a>
+</ul>
+<span data-k="v1" lang="en-US">s</span>
+<section><p>sec</p></section>
+<!-- c -->
+</div>
+</body></html>"""
+
+class TestHtmlSelect(unittest.TestCase):
+    """Test cases for CSS selector matching in tools.html_select."""
+
+    def test_type_selector(self):
+        """Test matching elements by tag name, case-insensitively."""
+        self.assertEqual(select(DOCUMENT, "h2"), ["<h2>T &amp; x</h2>"])
+        self.assertEqual(select(DOCUMENT, "H2"), ["<h2>T &amp; x</h2>"])
+        self.assertEqual(select(DOCUMENT, "table"), [])
+
+    def test_universal_selector(self):
+        """Test that * matches every element, in document order."""
+        matches = select("<div><p>a</p><br></div>", "*")
+        self.assertEqual(matches, ["<div><p>a</p><br></div>", "<p>a</p>", "<br>"])
+
+    def test_id_selector(self):
+        """Test matching an element by id."""
+        matches = select(DOCUMENT, "#main")
+        self.assertEqual(len(matches), 1)
+        self.assertTrue(matches[0].startswith('<div id="main" class="a b">'))
+        self.assertTrue(matches[0].endswith("</div>"))
+        self.assertEqual(select(DOCUMENT, "#missing"), [])
+
+    def test_class_selector(self):
+        """Test matching elements by class."""
+        self.assertEqual(select(DOCUMENT, ".inner"),
+                         ['<div class="inner"><p>one<img src=x.png/><br>two<p>three</div>'])
+        self.assertEqual(len(select(DOCUMENT, ".item")), 2)
+        self.assertEqual(select(DOCUMENT, ".ite"), [])
+
+    def test_attribute_selectors(self):
+        """Test attribute presence and each attribute operator."""
+        span = '<span data-k="v1" lang="en-US">s</span>'
+        local = '<a href="/q">l</a>'
+        pdf = '<a href="https://e.com/x.pdf">pdf</a>'
+        self.assertEqual(select(DOCUMENT, "[lang]"), [span])
+        self.assertEqual(select(DOCUMENT, "[data-k=v1]"), [span])
+        self.assertEqual(select(DOCUMENT, "[data-k='v1']"), [span])
+        self.assertEqual(select(DOCUMENT, "[data-k=v]"), [])
+        self.assertEqual(select(DOCUMENT, "[class~=first]"), ['<li class="item first">A <a href="/q">l</a>\n'])
+        self.assertEqual(select(DOCUMENT, "[class~=fir]"), [])
+        self.assertEqual(select(DOCUMENT, '[href^="/"]'), [local])
+        self.assertEqual(select(DOCUMENT, '[href$=".pdf"]'), [pdf])
+        self.assertEqual(select(DOCUMENT, "[href*=e.com]"), [pdf])
+        # Empty values never match the substring operators
+        self.assertEqual(select(DOCUMENT, '[href^=""]'), [])
+
+    def test_compound_selector(self):
+        """Test that every part of a compound selector must match."""
+        self.assertEqual(select(DOCUMENT, "li.item.first"), ['<li class="item first">A <a href="/q">l</a>\n'])
+        self.assertEqual(select(DOCUMENT, "div#main.a.b > h2"), ["<h2>T &amp; x</h2>"])
+        self.assertEqual(select(DOCUMENT, "span.item"), [])
+
+    def test_descendant_combinator(self):
+        """Test matching elements at any depth below an ancestor."""
+        self.assertEqual(select(DOCUMENT, "ul li a"), ['<a href="/q">l</a>', '<a href="https://e.com/x.pdf">pdf</a>'])
+        self.assertEqual(select(DOCUMENT, "section p"), ["<p>sec</p>"])
+        self.assertEqual(select(DOCUMENT, "section a"), [])
+
+    def test_child_combinator(self):
+        """Test that > only matches direct children."""
+        self.assertEqual(select(DOCUMENT, "#main > p"), [])
+        self.assertEqual(select(DOCUMENT, "#main > div > p"), ["<p>one<img src=x.png/><br>two", "<p>three"])
+        self.assertEqual(select(DOCUMENT, "*[class~=b] > div"),
+                         ['<div class="inner"><p>one<img src=x.png/><br>two<p>three</div>'])
+
+    def test_selector_group(self):
+        """Test that a comma-separated group returns the matches of each selector in document order."""
+        self.assertEqual(select(DOCUMENT, "span, h2"), ["<h2>T &amp; x</h2>", '<span data-k="v1" lang="en-US">s</span>'])
+        self.assertEqual(select(DOCUMENT, "div span[data-k=v1], section p"),
+                         ['<span data-k="v1" lang="en-US">s</span>', "<p>sec</p>"])
+        # An element matching several selectors is returned once
+        self.assertEqual(select(DOCUMENT, "h2, #main > h2"), ["<h2>T &amp; x</h2>"])
+
+    def test_implied_end_tags(self):
+        """Test that unclosed <p>, <li> and table cells end where a browser would end them."""
+        self.assertEqual(select("<p>x<p>y", "p"), ["<p>x", "<p>y"])
+        self.assertEqual(select("<ul><li>1<li>2</ul>", "li"), ["<li>1", "<li>2"])
+        self.assertEqual(select("<dl><dt>a<dd>b<dt>c</dl>", "dd"), ["<dd>b"])
+        self.assertEqual(select("<table><tr><td>a<td>b<tr><td>c</table>", "tr > td"), ["<td>a", "<td>b", "<td>c"])
+        self.assertEqual(
+            select("<ul><li>one<li class=x>two<table><tr><td>a<td>b<tr><td>c</table></ul><p>x<p>y", "li"),
+            ["<li>one", "<li class=x>two<table><tr><td>a<td>b<tr><td>c</table>"]
+        )
+        # The end tag of an ancestor ends its unclosed children
+        self.assertEqual(select("<div><p>a</div><p>b", "div p"), ["<p>a"])
+
+    def test_implied_end_tags_past_inline_elements(self):
+        """Test that an implied end tag also ends inline elements left open inside the element."""
+        self.assertEqual(select("<div><p>a<b>bold<p>c</div>", "p"), ["<p>a<b>bold", "<p>c"])
+        self.assertEqual(select("<ul><li><a>1<li>2</ul>", "li"), ["<li><a>1", "<li>2"])
+        self.assertEqual(select("<ul><li><a>1<li>2</ul>", "a"), ["<a>1"])
+        # Block elements still nest
+        self.assertEqual(select("<ul><li>1<ul><li>2</ul></ul>", "li li"), ["<li>2"])
+
+    def test_void_elements(self):
+        """Test that void elements match on their own and don't swallow what follows."""
+        self.assertEqual(select(DOCUMENT, "img"), ["<img src=x.png/>"])
+        self.assertEqual(select(DOCUMENT, "p img"), ["<img src=x.png/>"])
+        self.assertEqual(select("<br/><br>text", "br"), ["<br/>", "<br>"])
+        self.assertEqual(select("<a href=x><img src=y> after</a>", "a"), ["<a href=x><img src=y> after</a>"])
+        self.assertEqual(select("<div><br><span>s</span></div>", "br span"), [])
+
+    def test_malformed_markup(self):
+        """Test that broken markup is matched without errors."""
+        # Stray end tags are ignored
+        self.assertEqual(select("<p>a</i></p>", "p"), ["<p>a</p>"])
+        # Misnested end tags end the element they name
+        self.assertEqual(select("<div><span>x</div></span><p>y", "span"), ["<span>x"])
+        # Elements open at the end of the document end there
+        self.assertEqual(select("<div><p>a", "div"), ["<div><p>a"])
+        # Entities, character references and comments are kept as written
+        self.assertEqual(select("<p>&lt;a&gt; &#38; &x;<!-- c --></p>", "p"), ["<p>&lt;a&gt; &#38; &x;<!-- c --></p>"])
+        self.assertEqual(select("", "p"), [])
+        self.assertEqual(select("just text", "*"), [])
+
+    def test_incremental_feed(self):
+        """Test that feeding the document in pieces gives the same matches as one feed."""
+        selector = "div p, li.item > a, img"
+        parser = SelectorParser(selector)
+        for start in range(0, len(DOCUMENT), 7):
+            parser.feed(DOCUMENT[start:start + 7])
+        parser.close()
+        self.assertEqual(parser.matches, select(DOCUMENT, selector))
+
+    def test_parse_selector(self):
+        """Test the structure parse_selector returns."""
+        selectors = parse_selector("ul > li.x a[href^='/'], p")
+        self.assertEqual(len(selectors), 2)
+        self.assertEqual([combinator for combinator, _ in selectors[0]], [None, ">", " "])
+
+        _, compound = selectors[0][1]
+        self.assertEqual(compound.tag, "li")
+        self.assertEqual(compound.classes, ["x"])
+        _, compound = selectors[0][2]
+        self.assertEqual(compound.attributes, [("href", "^=", "/")])
+
+    def test_invalid_selectors(self):
+        """Test that unsupported or incomplete selectors raise ValueError."""
+        for selector in ["", "div >", ">", "div,", "a::before", "a:hover", "[href", "div span:not(.a)", "p*"]:
+            with self.subTest(selector=selector):
+                with self.assertRaises(ValueError):
+                    select(DOCUMENT, selector)
+
+if __name__ == "__main__":
+    unittest.main()
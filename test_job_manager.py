@@ -3,21 +3,24 @@
 import os
 import shutil
 import unittest
-from jobs.job_manager import JobManager, JobStatus, StepStatus
+from jobs.job_manager import JobManager, SqliteJobManager, JobStatus, StepStatus
 
 class TestJobManager(unittest.TestCase):
     """Test cases for the JobManager class."""
 
+    manager_class = JobManager
+
     def setUp(self):
         """Set up a test environment before each test."""
         self.test_dir = "test_jobs"
         if os.path.exists(self.test_dir):
             shutil.rmtree(self.test_dir)
         os.makedirs(self.test_dir)
-        self.job_manager = JobManager(jobs_dir=self.test_dir)
+        self.job_manager = self.manager_class(jobs_dir=self.test_dir)
 
     def tearDown(self):
         """Clean up after each test."""
+        self.job_manager.close()
         if os.path.exists(self.test_dir):
             shutil.rmtree(self.test_dir)
 
@@ -67,6 +70,44 @@ class TestJobManager(unittest.TestCase):
         all_completed = all(step["status"] == StepStatus.COMPLETED.value for step in job["steps"])
         self.assertTrue(all_completed)
 
+    def test_plan_dependencies(self):
+        """Test that step dependencies are stored with the plan."""
+        job_id = self.job_manager.create_job("Test dependencies")
+
+        # Default: each step depends on the previous one
+        self.job_manager.set_job_plan(job_id, ["Step 1", "Step 2"])
+        job = self.job_manager.get_job(job_id)
+        self.assertEqual([step["depends_on"] for step in job["steps"]], [[], [0]])
+
+        # Explicit dependencies
+        self.job_manager.set_job_plan(job_id, ["Step 1", "Step 2", "Step 3"], [[], [], [0, 1]])
+        job = self.job_manager.get_job(job_id)
+        self.assertEqual([step["depends_on"] for step in job["steps"]], [[], [], [0, 1]])
+
+    def test_streamed_plan(self):
+        """Test building a plan step by step while earlier steps run."""
+        job_id = self.job_manager.create_job("Test streamed plan")
+        self.job_manager.update_job_status(job_id, JobStatus.PLANNING)
+
+        self.job_manager.add_plan_step(job_id, "Step 1")
+        self.job_manager.start_step(job_id, 0)
+        self.job_manager.complete_step(job_id, 0, "Result of step 1")
+
+        # The job must not be finalized while more steps may arrive
+        self.assertEqual(self.job_manager.peek_status(job_id), JobStatus.PLANNING.value)
+
+        self.job_manager.add_plan_step(job_id, "Step 2", [])
+        self.job_manager.finish_plan(job_id)
+        self.assertEqual(self.job_manager.peek_status(job_id), JobStatus.RUNNING.value)
+
+        self.job_manager.start_step(job_id, 1)
+        self.job_manager.complete_step(job_id, 1, "Result of step 2")
+
+        job = self.job_manager.get_job(job_id)
+        self.assertEqual(job["plan"], ["Step 1", "Step 2"])
+        self.assertEqual([step["depends_on"] for step in job["steps"]], [[], []])
+        self.assertEqual(job["status"], JobStatus.COMPLETED.value)
+
     def test_job_with_failure(self):
         """Test a job with a failed step."""
         # Create job
@@ -92,6 +133,52 @@ class TestJobManager(unittest.TestCase):
         job = self.job_manager.get_job(job_id)
         self.assertEqual(job["status"], JobStatus.FAILED.value)
 
+    def test_get_step_and_pending_steps(self):
+        """Test reading single steps and the steps left to run."""
+        job_id = self.job_manager.create_job("Test step lookups")
+        self.job_manager.set_job_plan(job_id, ["Step 1", "Step 2", "Step 3"])
+        self.job_manager.start_step(job_id, 0)
+        self.job_manager.complete_step(job_id, 0, "Result of step 1")
+        self.job_manager.start_step(job_id, 1)
+
+        step = self.job_manager.get_step(job_id, 0)
+        self.assertEqual(step["description"], "Step 1")
+        self.assertEqual(step["result"], "Result of step 1")
+        self.assertIsNone(self.job_manager.get_step(job_id, 3))
+        self.assertIsNone(self.job_manager.get_step("non-existent-id", 0))
+
+        self.assertEqual(self.job_manager.get_pending_steps(job_id), [(1, "Step 2"), (2, "Step 3")])
+
+    def test_step_counters(self):
+        """Test that step counters follow step status changes, including retries."""
+        job_id = self.job_manager.create_job("Test counters")
+        self.job_manager.set_job_plan(job_id, ["Step 1", "Step 2"])
+        self.job_manager.start_step(job_id, 0)
+        self.job_manager.complete_step(job_id, 0, "Error", StepStatus.FAILED)
+
+        # Retry the failed step
+        self.job_manager.start_step(job_id, 0)
+        self.job_manager.complete_step(job_id, 0, "Result of step 1")
+
+        job = self.job_manager.get_job(job_id)
+        self.assertEqual(job["counters"], {"pending": 1, "running": 0, "completed": 1, "failed": 0})
+        self.assertEqual(job["status"], JobStatus.RUNNING.value)
+
+    def test_next_pending_step(self):
+        """Test finding the next pending step as steps start out of order."""
+        job_id = self.job_manager.create_job("Test next pending step")
+        self.job_manager.set_job_plan(job_id, ["Step 1", "Step 2", "Step 3"], [[], [], []])
+        self.assertEqual(self.job_manager.get_next_pending_step(job_id)["index"], 0)
+
+        self.job_manager.start_step(job_id, 1)
+        self.assertEqual(self.job_manager.get_next_pending_step(job_id)["index"], 0)
+
+        self.job_manager.start_step(job_id, 0)
+        self.assertEqual(self.job_manager.get_next_pending_step(job_id)["index"], 2)
+
+        self.job_manager.start_step(job_id, 2)
+        self.assertIsNone(self.job_manager.get_next_pending_step(job_id))
+
     def test_list_jobs(self):
         """Test listing jobs."""
         # Create several jobs
@@ -104,9 +191,14 @@ class TestJobManager(unittest.TestCase):
         jobs = self.job_manager.list_jobs()
         self.assertEqual(len(jobs), 5)
 
-        # Test with limit
+        # Test with limit (newest first)
         jobs = self.job_manager.list_jobs(limit=3)
-        self.assertEqual(len(jobs), 3)
+        self.assertEqual([job["id"] for job in jobs], job_ids[:1:-1])
+
+        # Deleted jobs drop out of the listing
+        self.job_manager.delete_job(job_ids[4])
+        jobs = self.job_manager.list_jobs(limit=1)
+        self.assertEqual([job["id"] for job in jobs], [job_ids[3]])
 
         # Update status of some jobs
         self.job_manager.update_job_status(job_ids[0], JobStatus.RUNNING)
@@ -117,6 +209,22 @@ class TestJobManager(unittest.TestCase):
         self.assertEqual(len(running_jobs), 1)
         self.assertEqual(running_jobs[0]["id"], job_ids[0])
 
+    def test_iter_jobs(self):
+        """Test iterating jobs lazily while the store changes."""
+        job_ids = [self.job_manager.create_job(f"Test task {i}") for i in range(4)]
+        self.job_manager.update_job_status(job_ids[1], JobStatus.COMPLETED)
+
+        jobs = self.job_manager.iter_jobs()
+        self.assertEqual(next(jobs)["id"], job_ids[3])
+
+        # Jobs deleted or created mid-walk don't derail the remaining iteration
+        self.job_manager.delete_job(job_ids[2])
+        self.job_manager.create_job("Newer task")
+        self.assertEqual([job["id"] for job in jobs], [job_ids[1], job_ids[0]])
+
+        completed = self.job_manager.iter_jobs(status=JobStatus.COMPLETED)
+        self.assertEqual([job["id"] for job in completed], [job_ids[1]])
+
     def test_artifacts(self):
         """Test adding artifacts to a job."""
         job_id = self.job_manager.create_job("Test artifacts")
@@ -137,6 +245,124 @@ class TestJobManager(unittest.TestCase):
         self.assertEqual(job["artifacts"][0]["name"], "test.py")
         self.assertEqual(job["artifacts"][0]["metadata"]["size"], 1024)
 
+    def test_peek_status(self):
+        """Test reading a job's status."""
+        job_id = self.job_manager.create_job("Test peek status")
+        self.assertEqual(self.job_manager.peek_status(job_id), JobStatus.PENDING.value)
+
+        self.job_manager.abort_job(job_id)
+        self.assertEqual(self.job_manager.peek_status(job_id), JobStatus.ABORTED.value)
+
+        self.assertIsNone(self.job_manager.peek_status("missing"))
+
+    def test_peek_status_sees_other_manager(self):
+        """Test that a job aborted by another manager is seen between steps."""
+        job_id = self.job_manager.create_job("Test abort from elsewhere")
+        self.job_manager.set_job_plan(job_id, ["Step 1", "Step 2"])
+        self.job_manager.flush()
+        self.assertEqual(self.job_manager.peek_status(job_id), JobStatus.RUNNING.value)
+
+        # E.g. the abort CLI or the UI's abort button, in another process
+        other = self.manager_class(jobs_dir=self.test_dir)
+        other.abort_job(job_id)
+        other.close()
+
+        self.assertEqual(self.job_manager.peek_status(job_id), JobStatus.ABORTED.value)
+        self.assertEqual(self.job_manager.get_job(job_id)["status"], JobStatus.ABORTED.value)
+
+    def test_flush_keeps_status_from_other_manager(self):
+        """Test that flushing a stale copy of a job doesn't undo an abort stored elsewhere."""
+        job_id = self.job_manager.create_job("Test stale flush")
+        self.job_manager.set_job_plan(job_id, ["Step 1", "Step 2", "Step 3"])
+        self.job_manager.flush()
+
+        other = self.manager_class(jobs_dir=self.test_dir)
+        other.abort_job(job_id)
+        other.close()
+
+        # This manager carries on with its cached, still running copy
+        self.job_manager.start_step(job_id, 0)
+        self.job_manager.complete_step(job_id, 0, "Result of step 1")
+        self.job_manager._write_changes()
+        self.job_manager.start_step(job_id, 1)
+        self.job_manager.complete_step(job_id, 1, "Result of step 2")
+        self.assertTrue(self.job_manager.flush())
+
+        reloaded = self.manager_class(jobs_dir=self.test_dir)
+        job = reloaded.get_job(job_id)
+        self.assertEqual(job["status"], JobStatus.ABORTED.value)
+        self.assertEqual(job["steps"][1]["result"], "Result of step 2")
+        reloaded.close()
+
+    def test_changes_persist(self):
+        """Test that cached job changes are written through to disk."""
+        job_id = self.job_manager.create_job("Test persistence")
+        self.job_manager.set_job_plan(job_id, ["Step 1"])
+        self.job_manager.start_step(job_id, 0)
+        self.job_manager.complete_step(job_id, 0, "Result of step 1")
+
+        # Finishing the job flushes it to disk without waiting for the flush thread
+        reloaded = self.manager_class(jobs_dir=self.test_dir).get_job(job_id)
+        self.assertEqual(reloaded, self.job_manager.get_job(job_id))
+        self.assertEqual(reloaded["status"], JobStatus.COMPLETED.value)
+
+    def test_flush(self):
+        """Test that pending changes are written on flush."""
+        job_id = self.job_manager.create_job("Test flush")
+        self.job_manager.set_metadata(job_id, "key", "value")
+        self.assertTrue(self.job_manager.flush())
+
+        reloaded = self.manager_class(jobs_dir=self.test_dir).get_job(job_id)
+        self.assertEqual(reloaded["metadata"], {"key": "value"})
+
+    def test_index_file(self):
+        """Test that the job index is saved and refreshed from changed job files."""
+        job_id = self.job_manager.create_job("Test index")
+        other_id = self.job_manager.create_job("Test index refresh")
+        self.job_manager.flush()
+        self.assertTrue(os.path.exists(os.path.join(self.test_dir, "_index.json")))
+
+        # Another manager changes one job behind this manager's index
+        other = self.manager_class(jobs_dir=self.test_dir)
+        other.abort_job(other_id)
+        other.close()
+
+        reloaded = self.manager_class(jobs_dir=self.test_dir)
+        self.assertEqual(reloaded.peek_status(job_id), JobStatus.PENDING.value)
+        self.assertEqual(reloaded.peek_status(other_id), JobStatus.ABORTED.value)
+        reloaded.close()
+
+    def test_change_log(self):
+        """Test that background writes go to the job's log and are folded back in."""
+        job_id = self.job_manager.create_job("Test change log")
+        self.job_manager.flush()
+
+        self.job_manager.set_job_plan(job_id, ["Step 1", "Step 2"])
+        self.job_manager.start_step(job_id, 0)
+        self.job_manager.complete_step(job_id, 0, "Result of step 1")
+        self.job_manager.add_artifact(job_id, "file", "out.txt", "workspace/out.txt")
+        self.job_manager.set_metadata(job_id, "key", "value")
+        self.job_manager._write_changes()
+
+        log_path = os.path.join(self.test_dir, f"{job_id}.json.log")
+        self.assertTrue(os.path.exists(log_path))
+
+        # Another manager replays the log on top of the job file
+        reloaded = self.manager_class(jobs_dir=self.test_dir)
+        self.assertEqual(reloaded.get_job(job_id), self.job_manager.get_job(job_id))
+        reloaded.close()
+
+        # A flush writes the whole job and drops its log
+        self.job_manager.start_step(job_id, 1)
+        self.job_manager._write_changes()
+        self.assertTrue(os.path.exists(log_path))
+        self.assertTrue(self.job_manager.flush())
+        self.assertFalse(os.path.exists(log_path))
+
+        reloaded = self.manager_class(jobs_dir=self.test_dir)
+        self.assertEqual(reloaded.get_job(job_id), self.job_manager.get_job(job_id))
+        reloaded.close()
+
     def test_delete_job(self):
         """Test deleting a job."""
         job_id = self.job_manager.create_job("Test delete")
@@ -153,5 +379,66 @@ class TestJobManager(unittest.TestCase):
         job_file = os.path.join(self.test_dir, f"{job_id}.json")
         self.assertFalse(os.path.exists(job_file))
 
+class TestSqliteJobManager(TestJobManager):
+    """Run the JobManager test cases against the SQLite-backed job store."""
+
+    manager_class = SqliteJobManager
+
+    def test_index_file(self):
+        """The SQLite store keeps its index in the database instead of an index file."""
+        job_id = self.job_manager.create_job("Test index")
+        self.job_manager.flush()
+        self.assertFalse(os.path.exists(os.path.join(self.test_dir, "_index.json")))
+
+        reloaded = SqliteJobManager(jobs_dir=self.test_dir)
+        self.assertEqual(reloaded.peek_status(job_id), JobStatus.PENDING.value)
+        reloaded.close()
+
+    def test_change_log(self):
+        """The SQLite store writes changed rows in a transaction instead of a log."""
+        job_id = self.job_manager.create_job("Test change log")
+        self.job_manager.set_metadata(job_id, "key", "value")
+        self.job_manager._write_changes()
+        self.assertFalse(os.path.exists(os.path.join(self.test_dir, f"{job_id}.json.log")))
+
+        reloaded = SqliteJobManager(jobs_dir=self.test_dir)
+        self.assertEqual(reloaded.get_job(job_id)["metadata"], {"key": "value"})
+        reloaded.close()
+
+    def test_list_jobs_from_other_manager(self):
+        """Test that listings include jobs created or changed by another process."""
+        job_id = self.job_manager.create_job("Known job")
+        self.job_manager.flush()
+
+        other = SqliteJobManager(jobs_dir=self.test_dir)
+        other.abort_job(job_id)
+        new_id = other.create_job("Job from elsewhere")
+        other.close()
+
+        jobs = self.job_manager.list_jobs()
+        self.assertEqual([(j["id"], j["status"]) for j in jobs],
+                         [(new_id, JobStatus.PENDING.value), (job_id, JobStatus.ABORTED.value)])
+        aborted = self.job_manager.list_jobs(status=JobStatus.ABORTED)
+        self.assertEqual([(j["id"], j["status"]) for j in aborted], [(job_id, JobStatus.ABORTED.value)])
+        self.assertEqual(self.job_manager.get_job(new_id)["task"], "Job from elsewhere")
+        self.assertEqual(self.job_manager.get_job(job_id)["status"], JobStatus.ABORTED.value)
+
+    def test_import_json_jobs(self):
+        """Test that jobs left by the JSON-backed manager are imported once."""
+        self.job_manager.close()
+        shutil.rmtree(self.test_dir)
+        os.makedirs(self.test_dir)
+
+        json_manager = JobManager(jobs_dir=self.test_dir)
+        job_id = json_manager.create_job("Legacy job")
+        json_manager.set_job_plan(job_id, ["Step 1"])
+        json_manager.close()
+
+        self.job_manager = SqliteJobManager(jobs_dir=self.test_dir)
+        job = self.job_manager.get_job(job_id)
+        self.assertEqual(job["task"], "Legacy job")
+        self.assertEqual(job["plan"], ["Step 1"])
+        self.assertEqual([j["id"] for j in self.job_manager.list_jobs()], [job_id])
+
 if __name__ == "__main__":
     unittest.main()
@@ -7,6 +7,9 @@ from .git_tools import register_git_tools
 from .web_tools import register_web_tools
 from .db_tools import register_db_tools
 import subprocess
+import asyncio
+import shlex
+import shutil
 import os
 import json
 
@@ -32,13 +35,50 @@ registry.register(
     "Write content to a file at the specified path"
 )
 
+# Characters only /bin/sh can interpret (pipes, redirects, variables, globs, ...);
+# commands without them are run directly, saving the extra shell process
+SHELL_METACHARACTERS = frozenset("|&;<>()$`*?[]{}~#!\n")
+
+# Commands that only exist inside the shell, so they can't be run directly
+SHELL_BUILTINS = frozenset((
+    ".", ":", "alias", "bg", "bind", "break", "builtin", "caller", "case", "cd",
+    "command", "compgen", "complete", "continue", "declare", "dirs", "disown",
+    "do", "done", "elif", "else", "enable", "esac", "eval", "exec", "exit",
+    "export", "fc", "fg", "fi", "for", "function", "getopts", "hash", "help",
+    "history", "if", "jobs", "let", "local", "logout", "mapfile", "popd",
+    "pushd", "read", "readarray", "readonly", "return", "select", "set",
+    "shift", "shopt", "source", "then", "time", "times", "trap", "type",
+    "typeset", "ulimit", "umask", "unalias", "unset", "until", "wait", "while"
+))
+
+def _command_args(command):
+    """Split a command into its arguments, or return None if it needs a shell"""
+    if any(char in SHELL_METACHARACTERS for char in command):
+        return None
+    try:
+        args = shlex.split(command)
+    except ValueError:
+        return None
+    # A leading VAR=value assignment is shell syntax too
+    if not args or "=" in args[0]:
+        return None
+    # Builtins, and names the shell may resolve differently or report as not found
+    if args[0] in SHELL_BUILTINS or shutil.which(args[0]) is None:
+        return None
+    return args
+
+def _command_not_found(name):
+    # Same result the shell gives for an unknown command
+    return {"stdout": "", "stderr": f"{name}: command not found", "returncode": 127}
+
 # Add shell command execution tool
 def run_shell(command, timeout=30):
     """Run a shell command and return its output"""
+    args = _command_args(command)
     try:
         result = subprocess.run(
-            command,
-            shell=True,
+            args or command,
+            shell=args is None,
             capture_output=True,
             text=True,
             timeout=timeout
@@ -50,6 +90,8 @@ def run_shell(command, timeout=30):
         }
     except subprocess.TimeoutExpired:
         return {"error": "Command execution timed out"}
+    except FileNotFoundError:
+        return _command_not_found(args[0]) if args else {"error": "Shell not found"}
     except Exception as e:
         return {"error": str(e)}
 
@@ -59,6 +101,42 @@ registry.register(
     "Execute a shell command and return stdout, stderr, and return code"
 )
 
+async def run_shell_async(command, timeout=30):
+    """Run a shell command without blocking the event loop and return its output"""
+    args = _command_args(command)
+    try:
+        if args:
+            process = await asyncio.create_subprocess_exec(
+                *args, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+            )
+        else:
+            process = await asyncio.create_subprocess_shell(
+                command, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+            )
+    except FileNotFoundError:
+        return _command_not_found(args[0]) if args else {"error": "Shell not found"}
+    except Exception as e:
+        return {"error": str(e)}
+
+    try:
+        stdout, stderr = await asyncio.wait_for(process.communicate(), timeout)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+        return {"error": "Command execution timed out"}
+
+    return {
+        "stdout": stdout.decode(errors="replace"),
+        "stderr": stderr.decode(errors="replace"),
+        "returncode": process.returncode
+    }
+
+registry.register(
+    "run_shell_async",
+    run_shell_async,
+    "Async version of run_shell; returns a coroutine to await"
+)
+
 # Add file listing tool
 def list_files(path="."):
     """List all files in a directory"""
@@ -124,6 +202,9 @@ register_web_tools(registry)
 # Register Database tools
 register_db_tools(registry)
 
+# Everything is registered; cache the listings and reject late registrations
+registry.freeze()
+
 # Function to get all registered tools
 def get_registry():
     """Get the tool registry"""
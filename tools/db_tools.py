@@ -5,6 +5,7 @@ import csv
 import json
 import os
 import tempfile
+from itertools import chain, islice
 from contextlib import contextmanager
 
 @contextmanager
@@ -18,14 +19,24 @@ def sqlite_connection(db_path):
     Yields:
         sqlite3.Connection: The database connection
     """
-    conn = sqlite3.connect(db_path)
+    # Autocommit mode: callers that need a transaction issue BEGIN/COMMIT themselves
+    conn = sqlite3.connect(db_path, isolation_level=None, cached_statements=256)
     conn.row_factory = sqlite3.Row  # This enables accessing columns by name
     try:
         yield conn
     finally:
         conn.close()
 
-def execute_query(db_path, query, parameters=None):
+IMPORT_BATCH_SIZE = 10000  # CSV rows inserted per executemany() call
+EXPORT_BATCH_SIZE = 1000  # rows fetched per fetchmany() call when exporting
+MEMORY_FTS_PATH = "workspace/memory_fts.db"  # keyword index kept by memory.KeywordIndex
+COUNT_BATCH_SIZE = 400  # tables counted per UNION ALL query (SQLite caps compound selects at 500)
+
+def _quote_identifier(name):
+    """Quote a table or column name for use in SQL."""
+    return '"' + name.replace('"', '""') + '"'
+
+def execute_query(db_path, query, parameters=None, columnar=False):
     """
     Execute a SQL query on a SQLite database.
 
@@ -33,6 +44,8 @@ def execute_query(db_path, query, parameters=None):
         db_path (str): Path to the SQLite database file
         query (str): SQL query to execute
         parameters (tuple, optional): Parameters for the query. Defaults to None.
+        columnar (bool, optional): Return SELECT results as a column list plus
+            row lists instead of one dict per row. Defaults to False.
 
     Returns:
         dict: Results of the query execution
@@ -49,8 +62,18 @@ def execute_query(db_path, query, parameters=None):
             # Check if this is a SELECT query
             if query.strip().upper().startswith("SELECT"):
                 rows = cursor.fetchall()
-                # Convert rows to list of dicts
-                results = [dict(row) for row in rows]
+                cols = [d[0] for d in cursor.description]
+
+                if columnar:
+                    return {
+                        "success": True,
+                        "row_count": len(rows),
+                        "columns": cols,
+                        "data": [list(row) for row in rows]
+                    }
+
+                # Convert rows to list of dicts sharing one list of column names
+                results = [dict(zip(cols, row)) for row in rows]
 
                 return {
                     "success": True,
@@ -126,15 +149,19 @@ def import_csv_to_db(db_path, csv_path, table_name, delimiter=',', has_header=Tr
             if has_header:
                 headers = next(reader)
                 column_names = [f'"{h.strip().replace(" ", "_")}"' for h in headers]
+                rows = reader
             else:
-                # Read the first row to determine number of columns
+                # Read the first row to determine number of columns, then put it back
                 first_row = next(reader)
                 column_names = [f'"column{i}"' for i in range(len(first_row))]
-                # Reset file pointer to start
-                csvfile.seek(0)
+                rows = chain([first_row], reader)
 
             # Create the table
             with sqlite_connection(db_path) as conn:
+                # WAL with relaxed syncing keeps bulk loads from fsyncing per page
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                conn.execute("PRAGMA temp_store=MEMORY")
                 cursor = conn.cursor()
 
                 # Create table with appropriate columns
@@ -147,17 +174,14 @@ def import_csv_to_db(db_path, csv_path, table_name, delimiter=',', has_header=Tr
                 placeholders = ', '.join(['?' for _ in column_names])
                 insert_sql = f'''INSERT INTO "{table_name}" VALUES ({placeholders})'''
 
-                # Insert data
+                # Insert data in batches within a single transaction
                 row_count = 0
-                csvfile.seek(0)
-                if has_header:
-                    next(reader)  # Skip header row for insertion
+                cursor.execute("BEGIN IMMEDIATE")
+                while batch := list(islice(rows, IMPORT_BATCH_SIZE)):
+                    cursor.executemany(insert_sql, batch)
+                    row_count += len(batch)
 
-                for row in reader:
-                    cursor.execute(insert_sql, row)
-                    row_count += 1
-
-                conn.commit()
+                cursor.execute("COMMIT")
 
                 return {
                     "success": True,
@@ -193,9 +217,10 @@ def export_query_to_csv(db_path, query, output_path, parameters=None):
             else:
                 cursor.execute(query)
 
-            rows = cursor.fetchall()
+            cursor.arraysize = EXPORT_BATCH_SIZE
+            chunk = cursor.fetchmany() if cursor.description else []
 
-            if not rows:
+            if not chunk:
                 return {
                     "success": True,
                     "rows_exported": 0,
@@ -203,20 +228,23 @@ def export_query_to_csv(db_path, query, output_path, parameters=None):
                     "message": "Query returned no rows"
                 }
 
-            # Get column names from the first row
-            column_names = rows[0].keys()
+            column_names = [c[0] for c in cursor.description]
 
-            # Write to CSV
+            # Stream rows to the CSV a chunk at a time
+            row_count = 0
             with open(output_path, 'w', newline='') as csvfile:
-                writer = csv.DictWriter(csvfile, fieldnames=column_names)
-                writer.writeheader()
-                writer.writerows([dict(row) for row in rows])
+                writer = csv.writer(csvfile)
+                writer.writerow(column_names)
+                while chunk:
+                    writer.writerows(chunk)
+                    row_count += len(chunk)
+                    chunk = cursor.fetchmany()
 
             return {
                 "success": True,
-                "rows_exported": len(rows),
+                "rows_exported": row_count,
                 "file_path": output_path,
-                "columns": list(column_names)
+                "columns": column_names
             }
     except Exception as e:
         return {
@@ -292,34 +320,76 @@ def list_tables(db_path):
         with sqlite_connection(db_path) as conn:
             cursor = conn.cursor()
 
-            # Get table names
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
+            # Get table names and column counts, skipping SQLite internal tables
+            cursor.execute(
+                "SELECT m.name AS name, COUNT(p.cid) AS column_count "
+                "FROM sqlite_master m JOIN pragma_table_info(m.name) p "
+                "WHERE m.type = 'table' AND m.name NOT LIKE 'sqlite\\_%' ESCAPE '\\' "
+                "GROUP BY m.name ORDER BY m.rowid"
+            )
             tables = cursor.fetchall()
 
-            table_info = []
-            for table in tables:
-                table_name = table["name"]
-                # Skip SQLite internal tables
-                if table_name.startswith("sqlite_"):
-                    continue
+            # Get all row counts in one query per batch of tables
+            row_counts = {}
+            for start in range(0, len(tables), COUNT_BATCH_SIZE):
+                batch = [table["name"] for table in tables[start:start + COUNT_BATCH_SIZE]]
+                counts_sql = " UNION ALL ".join(
+                    f"SELECT ? AS name, COUNT(*) AS count FROM {_quote_identifier(name)}"
+                    for name in batch
+                )
+                row_counts.update(cursor.execute(counts_sql, batch).fetchall())
+
+            table_info = [
+                {
+                    "name": table["name"],
+                    "row_count": row_counts[table["name"]],
+                    "column_count": table["column_count"]
+                }
+                for table in tables
+            ]
 
-                # Get row count for this table
-                row_count = cursor.execute(f"SELECT COUNT(*) as count FROM '{table_name}'").fetchone()["count"]
+            return {
+                "success": True,
+                "tables": table_info,
+                "count": len(table_info)
+            }
+    except Exception as e:
+        return {
+            "success": False,
+            "error": str(e)
+        }
 
-                # Get column count
-                cursor.execute(f"PRAGMA table_info('{table_name}')")
-                columns = cursor.fetchall()
+def search_memory(query, top_k=5, db_path=MEMORY_FTS_PATH):
+    """
+    Search the agent's memory for entries matching keywords, ranked with BM25.
 
-                table_info.append({
-                    "name": table_name,
-                    "row_count": row_count,
-                    "column_count": len(columns)
-                })
+    Args:
+        query (str): FTS5 query, e.g. 'scraper' or 'csv AND sqlite'
+        top_k (int, optional): Maximum number of entries to return. Defaults to 5.
+        db_path (str, optional): Path to the memory keyword index. Defaults to MEMORY_FTS_PATH.
+
+    Returns:
+        dict: Matching entries with their BM25 scores (lower is more relevant)
+    """
+    try:
+        if not os.path.exists(db_path):
+            return {
+                "success": False,
+                "error": f"Memory index not found at {db_path}"
+            }
+
+        with sqlite_connection(db_path) as conn:
+            rows = conn.execute(
+                "SELECT m.text AS text, bm25(memories_fts) AS score FROM memories_fts "
+                "JOIN memories m ON m.id = memories_fts.rowid "
+                "WHERE memories_fts MATCH ? ORDER BY score LIMIT ?",
+                (query, int(top_k))
+            ).fetchall()
 
             return {
                 "success": True,
-                "tables": table_info,
-                "count": len(table_info)
+                "row_count": len(rows),
+                "results": [{"text": text, "score": score} for text, score in rows]
             }
     except Exception as e:
         return {
@@ -327,42 +397,18 @@ def list_tables(db_path):
             "error": str(e)
         }
 
+# (name, function, description) of each tool, registered in one call
+DB_TOOLS = (
+    ("execute_query", execute_query, "Execute a SQL query on a SQLite database"),
+    ("create_database", create_database, "Create a new SQLite database"),
+    ("import_csv_to_db", import_csv_to_db, "Import a CSV file into a SQLite database"),
+    ("export_query_to_csv", export_query_to_csv, "Export the results of a SQL query to a CSV file"),
+    ("get_table_schema", get_table_schema, "Get the schema of a table in a SQLite database"),
+    ("list_tables", list_tables, "List all tables in a SQLite database"),
+    ("search_memory", search_memory, "Search the agent's memory by keywords (FTS5 query syntax, BM25-ranked)"),
+)
+
 def register_db_tools(registry):
     """Register all database tools with the given registry."""
-    registry.register(
-        "execute_query",
-        execute_query,
-        "Execute a SQL query on a SQLite database"
-    )
-
-    registry.register(
-        "create_database",
-        create_database,
-        "Create a new SQLite database"
-    )
-
-    registry.register(
-        "import_csv_to_db",
-        import_csv_to_db,
-        "Import a CSV file into a SQLite database"
-    )
-
-    registry.register(
-        "export_query_to_csv",
-        export_query_to_csv,
-        "Export the results of a SQL query to a CSV file"
-    )
-
-    registry.register(
-        "get_table_schema",
-        get_table_schema,
-        "Get the schema of a table in a SQLite database"
-    )
-
-    registry.register(
-        "list_tables",
-        list_tables,
-        "List all tables in a SQLite database"
-    )
-
+    registry.register_many(DB_TOOLS)
     return registry
@@ -1,14 +1,168 @@
 # tools/exec.py
 
-import subprocess
+import os
+import sys
+import atexit
+import select
 import tempfile
+import threading
+import subprocess
+from .exec_worker import DONE, TIMED_OUT, write_frame
+
+EXEC_TIMEOUT = 30  # seconds a code block may run before it is stopped
+EXEC_KILL_GRACE = 2  # further seconds to wait before killing a worker that didn't stop the code itself
+EXEC_POOL_SIZE = 4  # idle workers kept for reuse; steps running in parallel each need one
+WORKER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "exec_worker.py")
+
 
-def run_code(code):
-    with tempfile.NamedTemporaryFile(mode="w", suffix=".py", delete=False) as temp:
-        temp.write(code)
-        temp.flush()
+class _Worker:
+    """A tools/exec_worker.py process and the pipes to talk to it."""
+
+    def __init__(self):
+        requests_read, self._requests = os.pipe()
+        self._replies, replies_write = os.pipe()
         try:
-            result = subprocess.run(["python3", temp.name], capture_output=True, text=True, timeout=30)
-            return result.stdout or result.stderr
+            self.process = subprocess.Popen(
+                [sys.executable, WORKER_PATH, str(requests_read), str(replies_write)],
+                pass_fds=(requests_read, replies_write),
+                stdin=subprocess.DEVNULL
+            )
+        except Exception:
+            os.close(self._requests)
+            os.close(self._replies)
+            raise
+        finally:
+            os.close(requests_read)
+            os.close(replies_write)
+
+    def alive(self):
+        return self.process.poll() is None
+
+    def run(self, code, stdout_path, stderr_path, timeout):
+        """
+        Run code in the worker.
+
+        The worker stops the code itself after timeout seconds and stays
+        usable; if it doesn't answer within the grace period after that
+        (e.g. the code is stuck in a C call), the run counts as hung.
+
+        Returns:
+            DONE, TIMED_OUT if the worker stopped the code, or None if it hung
+
+        Raises:
+            EOFError: If the worker exited before finishing
+        """
+        write_frame(self._requests, {
+            "code": code,
+            "stdout": stdout_path,
+            "stderr": stderr_path,
+            "timeout": timeout,
+            "cpu_limit": timeout
+        })
+        ready, _, _ = select.select([self._replies], [], [], timeout + EXEC_KILL_GRACE)
+        if not ready:
+            return None
+        reply = os.read(self._replies, len(DONE))
+        if reply not in (DONE, TIMED_OUT):
+            raise EOFError(f"exec worker exited with code {self.process.wait()}")
+        return reply
+
+    def close(self, kill=False):
+        """Stop the worker; kill it if it may still be running code."""
+        if kill:
+            self.process.kill()
+        # Closing the request pipe ends an idle worker's loop
+        for fd in (self._requests, self._replies):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+        try:
+            self.process.wait(timeout=1)
         except subprocess.TimeoutExpired:
-            return "Execution timed out."
+            self.process.kill()
+            self.process.wait()
+
+
+# Idle workers, reused so a code block doesn't pay for interpreter startup and imports
+_idle_workers = []
+_pool_lock = threading.Lock()
+
+
+def _acquire_worker():
+    with _pool_lock:
+        while _idle_workers:
+            worker = _idle_workers.pop()
+            if worker.alive():
+                return worker
+            worker.close(kill=True)
+    return _Worker()
+
+
+def _release_worker(worker):
+    with _pool_lock:
+        if len(_idle_workers) < EXEC_POOL_SIZE:
+            _idle_workers.append(worker)
+            return
+    worker.close()
+
+
+@atexit.register
+def _close_workers():
+    with _pool_lock:
+        workers = _idle_workers[:]
+        _idle_workers.clear()
+    for worker in workers:
+        worker.close()
+
+
+def _read_output(path):
+    try:
+        with open(path, "rb") as f:
+            return f.read().decode("utf-8", errors="replace")
+    finally:
+        os.remove(path)
+
+
+def run_code(code, timeout=EXEC_TIMEOUT):
+    """
+    Run a block of Python code as a script and return its output.
+
+    The code runs in a persistent worker process from a small pool with a
+    fresh __main__ namespace, so only the first run pays for starting the
+    interpreter. The worker resets the environment, sys.path and modules
+    imported from the workspace after each run, as a new interpreter would. Code that runs too long is stopped inside the worker; a
+    worker that doesn't stop in time or crashes is discarded.
+
+    Args:
+        code: Python source to run
+        timeout: Seconds to wait before giving up on the code
+
+    Returns:
+        The code's stdout, or its stderr if it printed nothing to stdout
+    """
+    stdout_fd, stdout_path = tempfile.mkstemp(suffix=".out")
+    stderr_fd, stderr_path = tempfile.mkstemp(suffix=".err")
+    os.close(stdout_fd)
+    os.close(stderr_fd)
+
+    worker = None
+    reply = exit_error = None
+    try:
+        worker = _acquire_worker()
+        reply = worker.run(code, stdout_path, stderr_path, timeout)
+    except Exception as e:
+        exit_error = e
+    finally:
+        if worker is not None:
+            if reply is not None:
+                _release_worker(worker)
+            else:
+                worker.close(kill=True)
+        stdout, stderr = _read_output(stdout_path), _read_output(stderr_path)
+
+    if reply == TIMED_OUT or (reply is None and exit_error is None):
+        return "Execution timed out."
+    if exit_error is not None and not (stdout or stderr):
+        return f"Execution failed: {exit_error}"
+    return stdout or stderr
@@ -0,0 +1,205 @@
+# tools/exec_worker.py
+
+"""
+Long-lived Python interpreter that runs code blocks for tools.exec.run_code.
+
+The worker is started with the file descriptors of a request pipe and a
+reply pipe. Each request holds the code to run and the paths of two files
+for its output. File descriptors 1 and 2 point at those files while the code
+runs, so output written by C extensions and child processes is captured too.
+Every run gets a fresh namespace, and the working directory, sys.argv, the
+standard streams, os.environ and sys.path are restored afterwards, so a run
+sees the same state a fresh interpreter would. Modules imported from installed
+packages stay loaded, which is what makes later runs cheap; modules imported
+from anywhere else, like the workspace, are unloaded so the next run imports
+their current code.
+"""
+
+import os
+import sys
+import json
+import site
+import struct
+import builtins
+import importlib
+import linecache
+import sysconfig
+import signal
+import resource
+import traceback
+
+HEADER = struct.Struct(">I")  # length prefix of a request frame
+DONE = b"\0"  # reply written after each run
+TIMED_OUT = b"\1"  # reply written instead when the run was stopped by its timeout
+CODE_NAME = "<step>"  # file name tracebacks show for the code
+
+
+def _installed_paths():
+    paths = sysconfig.get_paths()
+    dirs = [paths[name] for name in ("stdlib", "platstdlib", "purelib", "platlib") if name in paths]
+    dirs.append(site.getusersitepackages())
+    return tuple({os.path.join(os.path.realpath(path), "") for path in dirs})
+
+
+# Directories of the standard library and installed packages; modules imported
+# from them are kept loaded between runs
+INSTALLED_PATHS = _installed_paths()
+
+
+def write_frame(fd, message):
+    """Write a JSON message to a pipe as one length-prefixed frame."""
+    data = json.dumps(message).encode("utf-8")
+    view = memoryview(HEADER.pack(len(data)) + data)
+    while view:
+        view = view[os.write(fd, view):]
+
+
+def read_frame(fd):
+    """Read one frame written by write_frame, or return None at end of file."""
+    header = _read_exactly(fd, HEADER.size)
+    if header is None:
+        return None
+    data = _read_exactly(fd, HEADER.unpack(header)[0])
+    return None if data is None else json.loads(data)
+
+
+def _read_exactly(fd, size):
+    data = b""
+    while len(data) < size:
+        chunk = os.read(fd, size - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return data
+
+
+class _Timeout(BaseException):
+    """Raised in the running code when its time is up; user code catching Exception won't swallow it."""
+
+
+_alarm_armed = False
+
+
+def _on_alarm(signum, frame):
+    if _alarm_armed:
+        raise _Timeout
+
+
+def _set_alarm(seconds):
+    global _alarm_armed
+    if seconds:
+        # Installed every run, since earlier code may have replaced the handler
+        signal.signal(signal.SIGALRM, _on_alarm)
+    _alarm_armed = bool(seconds)
+    signal.setitimer(signal.ITIMER_REAL, seconds or 0)
+
+
+def _limit_cpu(seconds):
+    # RLIMIT_CPU counts the whole life of the process, so the limit is moved
+    # to the CPU time used so far plus this run's allowance
+    if not seconds:
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    soft = int(usage.ru_utime + usage.ru_stime) + int(seconds) + 1
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+def _restore_environ(saved):
+    for name in [name for name in os.environ if name not in saved]:
+        del os.environ[name]
+    for name, value in saved.items():
+        if os.environ.get(name) != value:
+            os.environ[name] = value
+
+
+def _unload_new_modules(loaded):
+    """Unload the modules imported since loaded was taken, except installed ones."""
+    for name in [name for name in sys.modules if name not in loaded]:
+        path = getattr(sys.modules[name], "__file__", None)
+        if path and not os.path.realpath(path).startswith(INSTALLED_PATHS):
+            del sys.modules[name]
+
+
+def run(request):
+    """
+    Run one code block with its output sent to the request's files.
+
+    Returns:
+        True if the code was stopped by the request's timeout
+    """
+    code = request["code"]
+    cwd = os.getcwd()
+    argv = sys.argv
+    environ = dict(os.environ)
+    sys_path = sys.path[:]
+    loaded = set(sys.modules)
+    streams = sys.stdout, sys.stderr
+    saved_stdout, saved_stderr = os.dup(1), os.dup(2)
+
+    _limit_cpu(request.get("cpu_limit"))
+    sys.stdout.flush()
+    sys.stderr.flush()
+    for fd, path in ((1, request["stdout"]), (2, request["stderr"])):
+        target = os.open(path, os.O_WRONLY | os.O_TRUNC)
+        os.dup2(target, fd)
+        os.close(target)
+
+    # Run as a script would: a fresh __main__ namespace, with source lines in tracebacks
+    linecache.cache[CODE_NAME] = (len(code), None, code.splitlines(True), CODE_NAME)
+    namespace = {"__name__": "__main__", "__builtins__": builtins}
+    sys.argv = [CODE_NAME]
+    # Files written by earlier runs must be importable
+    importlib.invalidate_caches()
+    timed_out = False
+    try:
+        # Stop the code from inside once its time is up, so this worker can be
+        # reused instead of being killed
+        _set_alarm(request.get("timeout"))
+        try:
+            exec(compile(code, CODE_NAME, "exec"), namespace)
+        finally:
+            _set_alarm(None)
+    except _Timeout:
+        timed_out = True
+    except SystemExit as e:
+        if e.code is not None and not isinstance(e.code, int):
+            print(e.code, file=sys.stderr)
+    except BaseException as e:
+        # Leave this function's frame out, like the interpreter does for a script
+        traceback.print_exception(type(e), e, e.__traceback__.tb_next)
+    finally:
+        sys.stdout, sys.stderr = streams
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os.dup2(saved_stdout, 1)
+        os.dup2(saved_stderr, 2)
+        os.close(saved_stdout)
+        os.close(saved_stderr)
+        sys.argv = argv
+        os.chdir(cwd)
+        _restore_environ(environ)
+        sys.path[:] = sys_path
+        _unload_new_modules(loaded)
+    return timed_out
+
+
+def main():
+    requests_fd, replies_fd = int(sys.argv[1]), int(sys.argv[2])
+    # Imports in the code resolve against the working directory, not this package
+    sys.path[0] = os.getcwd()
+    # A workspace module rewritten within a second of its last import keeps its
+    # size and mtime, which would make a cached .pyc of the old code look current
+    sys.dont_write_bytecode = True
+
+    while True:
+        request = read_frame(requests_fd)
+        if request is None:
+            break
+        os.write(replies_fd, TIMED_OUT if run(request) else DONE)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,160 +2,400 @@
 
 import subprocess
 import os
+import functools
+import shlex
+import shutil
+import atexit
+import asyncio
+import threading
 from .registry import ToolRegistry
 
+# Resolved once, so each call skips the PATH search; an absolute path plus
+# close_fds=False also lets subprocess start git with posix_spawn instead of fork
+GIT_PATH = shutil.which("git") or "git"
+
+# Subcommands git_batch may run; they only read the repository, so running them concurrently is safe
+READ_ONLY_GIT_COMMANDS = frozenset((
+    "status", "diff", "log", "show", "blame",
+    "rev-parse", "ls-files", "ls-tree", "describe", "shortlog"
+))
+LISTING_GIT_COMMANDS = frozenset(("branch", "tag"))  # read-only only when given no arguments
+
+
+class _CatFile:
+    """
+    A long-lived `git cat-file --batch` process for reading objects.
+
+    Each lookup is one line written to the process and one framed reply read
+    back, instead of a new git process. The process belongs to the repository
+    of the working directory it was started in, and is restarted if the
+    working directory changes or the process exits.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._proc = None
+        self._cwd = None
+
+    def _start(self):
+        self.close()
+        self._cwd = os.getcwd()
+        self._proc = subprocess.Popen(
+            [GIT_PATH, "cat-file", "--batch"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL
+        )
+
+    def get(self, rev, path):
+        """
+        Read the contents of a file at a revision.
+
+        Args:
+            rev (str): Commit, branch or tag; an empty string reads the staged version
+            path (str): Path of the file in the repository
+
+        Returns:
+            bytes: The contents of the file
+
+        Raises:
+            KeyError: If there is no such file at that revision (or it is a directory)
+        """
+        name = f"{rev}:{path}"
+        if "\n" in name:
+            raise KeyError(name)
+
+        with self._lock:
+            for attempt in range(2):
+                if self._proc is None or self._proc.poll() is not None or self._cwd != os.getcwd():
+                    self._start()
+                try:
+                    self._proc.stdin.write(name.encode("utf-8") + b"\n")
+                    self._proc.stdin.flush()
+                    header = self._proc.stdout.readline()
+                    if not header:
+                        raise BrokenPipeError("git cat-file exited")
+                except OSError:
+                    # The process died (e.g. it was started outside a repository); retry once
+                    self.close()
+                    if attempt:
+                        raise
+                    continue
+
+                # "<sha> <type> <size>", or "<name> missing" / "<name> ambiguous"
+                fields = header.split()
+                if len(fields) != 3 or not fields[2].isdigit():
+                    raise KeyError(name)
+                data = self._proc.stdout.read(int(fields[2]) + 1)
+                if fields[1] != b"blob":
+                    raise KeyError(name)
+                return data[:-1]
+
+    def close(self):
+        if self._proc is not None:
+            try:
+                self._proc.stdin.close()
+                self._proc.wait(timeout=1)
+            except Exception:
+                self._proc.kill()
+            self._proc = None
+
+
+_cat_file = _CatFile()
+atexit.register(_cat_file.close)
+
+
+# pygit2 (libgit2) is optional: when it is installed, git_log and git_branch
+# read the repository in-process instead of starting git
+_pygit2 = None  # the module once imported, False if it isn't installed
+_repositories = {}  # working directory -> pygit2.Repository
+_repository_lock = threading.Lock()  # a Repository isn't safe to use from several threads at once
+
+
+def _from_repository(read, *args):
+    """
+    Run read(pygit2, repository, *args) on the working directory's repository.
+
+    Returns:
+        The result, or None if pygit2 is unavailable or the read failed,
+        in which case the caller falls back to the git command
+    """
+    global _pygit2
+    if _pygit2 is None:
+        try:
+            import pygit2
+            _pygit2 = pygit2
+        except ImportError:
+            _pygit2 = False
+    if not _pygit2:
+        return None
+
+    cwd = os.getcwd()
+    with _repository_lock:
+        try:
+            repository = _repositories.get(cwd)
+            if repository is None:
+                path = _pygit2.discover_repository(cwd)
+                if path is None:
+                    return None
+                repository = _repositories[cwd] = _pygit2.Repository(path)
+            return read(_pygit2, repository, *args)
+        except Exception:
+            return None
+
+
+def _read_log(pygit2, repository, n):
+    lines = []
+    for commit in repository.walk(repository.head.target, pygit2.GIT_SORT_TIME):
+        if len(lines) >= int(n):
+            break
+        subject = commit.message.splitlines()[0] if commit.message else ""
+        lines.append(f"{commit.short_id} {subject}\n")
+    return "".join(lines)
+
+
+def _read_branches(pygit2, repository):
+    if repository.head_is_detached:
+        return None  # leave the "(HEAD detached at ...)" line to git
+    current = None if repository.head_is_unborn else repository.head.shorthand
+    return "".join(f"{'*' if name == current else ' '} {name}\n"
+                   for name in sorted(repository.branches.local))
+
+
+# Cached git_log and git_branch output: (function, args, working directory) -> (state, output)
+_memo = {}
+_git_dirs = {}  # working directory -> its .git directory, or None
+
+
+def _git_dir(cwd):
+    if cwd not in _git_dirs:
+        git_dir = None
+        path = cwd
+        while True:
+            candidate = os.path.join(path, ".git")
+            if os.path.exists(candidate):
+                # Worktrees and submodules (a .git file) aren't tracked; they just aren't cached
+                git_dir = candidate if os.path.isdir(candidate) else None
+                break
+            parent = os.path.dirname(path)
+            if parent == path:
+                break
+            path = parent
+        _git_dirs[cwd] = git_dir
+    return _git_dirs[cwd]
+
+
+def _decode(output):
+    # Output is captured as bytes and decoded in one pass, rather than through a text wrapper
+    return output.decode("utf-8", errors="replace")
+
+
+def _read_bytes(path):
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _repository_state(git_dir):
+    """
+    What git_log and git_branch output depends on, read with a few stats and reads.
+
+    Covers the index, HEAD and the commit of the branch it points at, packed
+    refs, and the branch directories (a branch being created or deleted).
+    """
+    head = _read_bytes(os.path.join(git_dir, "HEAD"))
+    ref = None
+    if head and head.startswith(b"ref: "):
+        ref = _read_bytes(os.path.join(git_dir, head[5:].strip().decode("utf-8", errors="replace")))
+
+    branch_dirs = []
+    for root, _, _ in os.walk(os.path.join(git_dir, "refs", "heads")):
+        branch_dirs.append((root, _mtime(root)))
+
+    return (
+        _mtime(os.path.join(git_dir, "index")),
+        head,
+        ref,
+        _mtime(os.path.join(git_dir, "packed-refs")),
+        tuple(branch_dirs)
+    )
+
+
+def _git_memo(function):
+    """
+    Cache a read-only git tool's output until the repository state changes.
+
+    A hit costs a few stats and small reads of the .git directory instead of
+    a git process. Outside a plain .git directory nothing is cached.
+    """
+    @functools.wraps(function)
+    def wrapper(*args):
+        cwd = os.getcwd()
+        git_dir = _git_dir(cwd)
+        if git_dir is None:
+            return function(*args)
+
+        key = (function.__name__, args, cwd)
+        state = _repository_state(git_dir)
+        cached = _memo.get(key)
+        if cached is not None and cached[0] == state:
+            return cached[1]
+
+        output = function(*args)
+        if not output.startswith("Error:"):
+            _memo[key] = (state, output)
+        return output
+    return wrapper
+
+
+def _git_command(*subcommand, report_stderr=False):
+    """
+    Turn a function that builds git arguments into a git tool.
+
+    The decorated function returns the arguments that follow the fixed
+    subcommand; running git, decoding its output and turning failures into
+    "Error: ..." strings happen here, once for every tool.
+
+    Args:
+        *subcommand: Fixed leading arguments, e.g. "log", "--oneline"
+        report_stderr: Return stderr instead of stdout when git wrote to it
+    """
+    argv = (GIT_PATH,) + subcommand
+
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            try:
+                result = subprocess.run(argv + tuple(function(*args, **kwargs)),
+                                        capture_output=True, close_fds=False)
+            except Exception as e:
+                return f"Error: {str(e)}"
+            return _decode(result.stderr if report_stderr and result.stderr else result.stdout)
+        return wrapper
+    return decorator
+
+@_git_command("status")
 def git_status():
     """Get the current Git repository status"""
-    try:
-        result = subprocess.run(
-            ["git", "status"],
-            capture_output=True,
-            text=True
-        )
-        return result.stdout
-    except Exception as e:
-        return f"Error: {str(e)}"
+    return ()
 
+@_git_command("diff")
 def git_diff(file_path=None):
     """Get the diff of changes in the repository or for a specific file"""
+    return (file_path,) if file_path else ()
+
+def git_show(rev, path):
+    """Get the contents of a file at a commit, branch or tag"""
     try:
-        cmd = ["git", "diff"]
-        if file_path:
-            cmd.append(file_path)
-
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True
-        )
-        return result.stdout
+        return _cat_file.get(rev, path).decode("utf-8", errors="replace")
+    except KeyError:
+        return f"Error: no file {path} at {rev}"
     except Exception as e:
         return f"Error: {str(e)}"
 
+@_git_command("add", report_stderr=True)
+def _git_add(file_path):
+    return (file_path,)
+
 def git_add(file_path="."):
     """Add files to Git staging area"""
-    try:
-        result = subprocess.run(
-            ["git", "add", file_path],
-            capture_output=True,
-            text=True
-        )
-        return f"Added {file_path} to staging area" if not result.stderr else result.stderr
-    except Exception as e:
-        return f"Error: {str(e)}"
+    return _git_add(file_path) or f"Added {file_path} to staging area"
 
+@_git_command("commit", "-m")
 def git_commit(message):
     """Commit staged changes to Git repository"""
-    try:
-        result = subprocess.run(
-            ["git", "commit", "-m", message],
-            capture_output=True,
-            text=True
-        )
-        return result.stdout
-    except Exception as e:
-        return f"Error: {str(e)}"
+    return (message,)
 
+@_git_command("log", "--oneline")
+def _git_log(n):
+    return (f"-{n}",)
+
+@_git_memo
 def git_log(n=5):
     """Get the Git commit history"""
-    try:
-        result = subprocess.run(
-            ["git", "log", f"-{n}", "--oneline"],
-            capture_output=True,
-            text=True
-        )
-        return result.stdout
-    except Exception as e:
-        return f"Error: {str(e)}"
+    output = _from_repository(_read_log, n)
+    return output if output is not None else _git_log(n)
 
+@_git_command("clone", report_stderr=True)
 def git_clone(repo_url, target_dir=None):
     """Clone a Git repository"""
-    try:
-        cmd = ["git", "clone", repo_url]
-        if target_dir:
-            cmd.append(target_dir)
-
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True
-        )
-        return result.stdout if not result.stderr else result.stderr
-    except Exception as e:
-        return f"Error: {str(e)}"
+    return (repo_url, target_dir) if target_dir else (repo_url,)
 
+@_git_command("checkout", report_stderr=True)
 def git_checkout(branch):
     """Checkout a Git branch"""
-    try:
-        result = subprocess.run(
-            ["git", "checkout", branch],
-            capture_output=True,
-            text=True
-        )
-        return result.stdout if not result.stderr else result.stderr
-    except Exception as e:
-        return f"Error: {str(e)}"
+    return (branch,)
 
+@_git_command("branch")
+def _git_branch():
+    return ()
+
+@_git_memo
 def git_branch():
     """List Git branches"""
-    try:
-        result = subprocess.run(
-            ["git", "branch"],
-            capture_output=True,
-            text=True
-        )
-        return result.stdout
-    except Exception as e:
-        return f"Error: {str(e)}"
-
-def register_git_tools(registry):
-    """Register all Git tools with the given registry"""
-    registry.register(
-        "git_status",
-        git_status,
-        "Get the current Git repository status"
-    )
+    output = _from_repository(_read_branches)
+    return output if output is not None else _git_branch()
 
-    registry.register(
-        "git_diff",
-        git_diff,
-        "Get the diff of changes in the repository or for a specific file"
-    )
+async def _run_git(args, limit):
+    async with limit:
+        process = await asyncio.create_subprocess_exec(
+            GIT_PATH, *args, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+        )
+        stdout, stderr = await process.communicate()
+    return (stdout or stderr).decode("utf-8", errors="replace")
 
-    registry.register(
-        "git_add",
-        git_add,
-        "Add files to Git staging area (defaults to all files)"
-    )
+async def _git_batch(commands):
+    # At most one git process per CPU at a time
+    limit = asyncio.Semaphore(os.cpu_count() or 1)
+    results = await asyncio.gather(*(_run_git(args, limit) for args in commands), return_exceptions=True)
+    return [f"Error: {str(r)}" if isinstance(r, Exception) else r for r in results]
 
-    registry.register(
-        "git_commit",
-        git_commit,
-        "Commit staged changes to Git repository with the specified message"
-    )
+def git_batch(commands):
+    """
+    Run several read-only git commands concurrently.
 
-    registry.register(
-        "git_log",
-        git_log,
-        "Get the Git commit history (defaults to last 5 commits)"
-    )
-
-    registry.register(
-        "git_clone",
-        git_clone,
-        "Clone a Git repository to the specified directory"
-    )
+    Args:
+        commands (list): Git commands without the leading "git", each a string
+                         (e.g. "log -5 --oneline") or a list of arguments
 
-    registry.register(
-        "git_checkout",
-        git_checkout,
-        "Checkout a Git branch"
-    )
+    Returns:
+        list: The output of each command, in the same order
+    """
+    try:
+        commands = [shlex.split(c) if isinstance(c, str) else list(c) for c in commands]
+        for args in commands:
+            if not args or not (args[0] in READ_ONLY_GIT_COMMANDS or
+                                (args[0] in LISTING_GIT_COMMANDS and len(args) == 1)):
+                allowed = ", ".join(sorted(READ_ONLY_GIT_COMMANDS | LISTING_GIT_COMMANDS))
+                return [f"Error: git_batch only runs read-only commands ({allowed}): {shlex.join(args)}"]
+        return asyncio.run(_git_batch(commands))
+    except Exception as e:
+        return [f"Error: {str(e)}"]
 
-    registry.register(
-        "git_branch",
-        git_branch,
-        "List Git branches"
-    )
+# (name, function, description) of each tool, registered in one call
+GIT_TOOLS = (
+    ("git_status", git_status, "Get the current Git repository status"),
+    ("git_diff", git_diff, "Get the diff of changes in the repository or for a specific file"),
+    ("git_show", git_show, "Get the contents of a file at a given commit, branch or tag"),
+    ("git_add", git_add, "Add files to Git staging area (defaults to all files)"),
+    ("git_commit", git_commit, "Commit staged changes to Git repository with the specified message"),
+    ("git_log", git_log, "Get the Git commit history (defaults to last 5 commits)"),
+    ("git_clone", git_clone, "Clone a Git repository to the specified directory"),
+    ("git_checkout", git_checkout, "Checkout a Git branch"),
+    ("git_branch", git_branch, "List Git branches"),
+    ("git_batch", git_batch, "Run several read-only Git commands (status, log, diff, ...) concurrently and return their outputs"),
+)
 
+def register_git_tools(registry):
+    """Register all Git tools with the given registry"""
+    registry.register_many(GIT_TOOLS)
     return registry
@@ -0,0 +1,286 @@
+# tools/html_select.py
+
+"""
+CSS selector matching on top of the standard library's HTML parser.
+
+Supports the selectors scraping usually needs: type, universal, #id, .class
+and [attribute] selectors (with =, ~=, ^=, $= and *=), compounds of those,
+descendant and child (>) combinators, and comma-separated groups. Each match
+is returned as the HTML source of the element.
+"""
+
+import re
+from html.parser import HTMLParser
+
+# Elements that never have content or an end tag
+VOID_ELEMENTS = frozenset((
+    "area", "base", "br", "col", "embed", "hr", "img", "input",
+    "link", "meta", "param", "source", "track", "wbr"
+))
+
+# Start tags that end the innermost open element when it is one of these,
+# e.g. a new <li> ends the previous unclosed <li>
+IMPLIED_END_TAGS = {
+    "li": frozenset(("li",)),
+    "p": frozenset(("p",)),
+    "option": frozenset(("option",)),
+    "dt": frozenset(("dt", "dd")),
+    "dd": frozenset(("dt", "dd")),
+    "tr": frozenset(("tr", "td", "th")),
+    "td": frozenset(("td", "th")),
+    "th": frozenset(("td", "th")),
+}
+
+# Inline elements an implied end tag reaches past, e.g. <li><a>one<li> ends
+# both the <a> and the first <li>
+INLINE_ELEMENTS = frozenset((
+    "a", "abbr", "b", "bdi", "bdo", "big", "cite", "code", "data", "dfn", "em",
+    "font", "i", "kbd", "label", "mark", "q", "s", "samp", "small", "span",
+    "strong", "sub", "sup", "time", "tt", "u", "var"
+))
+
+SELECTOR_TOKEN_PATTERN = re.compile(r"""
+    \s*(?P<combinator>[>,])\s*
+  | (?P<space>\s+)
+  | (?P<tag>\*|[a-zA-Z][\w-]*)
+  | \#(?P<id>[\w-]+)
+  | \.(?P<cls>[\w-]+)
+  | \[\s*(?P<attr>[\w-]+)\s*(?:(?P<op>[~^$*]?=)\s*(?:"(?P<dq>[^"]*)"|'(?P<sq>[^']*)'|(?P<bare>[^\]\s]+))\s*)?\]
+""", re.VERBOSE)
+
+ATTRIBUTE_TESTS = {
+    None: lambda actual, expected: True,
+    "=": lambda actual, expected: actual == expected,
+    "~=": lambda actual, expected: expected in actual.split(),
+    "^=": lambda actual, expected: bool(expected) and actual.startswith(expected),
+    "$=": lambda actual, expected: bool(expected) and actual.endswith(expected),
+    "*=": lambda actual, expected: bool(expected) and expected in actual,
+}
+
+
+class _Compound:
+    """One compound selector, e.g. div.note[data-id]."""
+
+    __slots__ = ("tag", "ids", "classes", "attributes")
+
+    def __init__(self):
+        self.tag = None
+        self.ids = []
+        self.classes = []
+        self.attributes = []  # (name, operator, value)
+
+    def empty(self):
+        return self.tag is None and not (self.ids or self.classes or self.attributes)
+
+    def matches(self, element):
+        if self.tag not in (None, "*") and self.tag != element.tag:
+            return False
+        if any(element.attrs.get("id") != element_id for element_id in self.ids):
+            return False
+        classes = element.attrs.get("class", "").split()
+        if any(cls not in classes for cls in self.classes):
+            return False
+        for name, op, value in self.attributes:
+            actual = element.attrs.get(name)
+            if actual is None or not ATTRIBUTE_TESTS[op](actual, value):
+                return False
+        return True
+
+
+class _Element:
+    __slots__ = ("tag", "attrs", "parent")
+
+    def __init__(self, tag, attrs, parent):
+        self.tag = tag
+        self.attrs = {name: value or "" for name, value in attrs}
+        self.parent = parent
+
+
+def parse_selector(selector):
+    """
+    Parse a selector group into its selectors.
+
+    Returns:
+        List of selectors, each a list of (combinator, compound) pairs from
+        left to right; the combinator is " " or ">" (None for the first)
+
+    Raises:
+        ValueError: If the selector uses unsupported syntax
+    """
+    selectors = []
+    parts = []
+    compound = _Compound()
+    combinator = None
+    pos = 0
+    selector = selector.strip()
+
+    def finish(next_combinator):
+        nonlocal compound, combinator
+        if compound.empty():
+            raise ValueError(f"Invalid selector: {selector!r}")
+        parts.append((combinator, compound))
+        compound = _Compound()
+        combinator = next_combinator
+
+    while pos < len(selector):
+        match = SELECTOR_TOKEN_PATTERN.match(selector, pos)
+        if not match:
+            raise ValueError(f"Unsupported selector syntax at {selector[pos:]!r}")
+        pos = match.end()
+
+        if match.group("combinator") == ",":
+            finish(None)
+            selectors.append(parts)
+            parts = []
+        elif match.group("combinator") or match.group("space"):
+            finish(match.group("combinator") or " ")
+        elif match.group("tag"):
+            if not compound.empty():
+                raise ValueError(f"Invalid selector: {selector!r}")
+            compound.tag = match.group("tag").lower()
+        elif match.group("id"):
+            compound.ids.append(match.group("id"))
+        elif match.group("cls"):
+            compound.classes.append(match.group("cls"))
+        else:
+            value = next((v for v in match.group("dq", "sq", "bare") if v is not None), None)
+            compound.attributes.append((match.group("attr").lower(), match.group("op"), value))
+
+    finish(None)
+    selectors.append(parts)
+    return selectors
+
+
+def _matches(parts, element):
+    """Match a selector against an element, right to left."""
+    combinator, compound = parts[-1]
+    if not compound.matches(element):
+        return False
+    if combinator is None:
+        return True
+
+    rest = parts[:-1]
+    ancestor = element.parent
+    if combinator == ">":
+        return ancestor is not None and _matches(rest, ancestor)
+    while ancestor is not None:
+        if _matches(rest, ancestor):
+            return True
+        ancestor = ancestor.parent
+    return False
+
+
+class SelectorParser(HTMLParser):
+    """
+    Incremental parser that collects the HTML of every element matching a selector.
+
+    Feed it the document in pieces with feed() and call close() at the end;
+    the matches, in document order, are then in the matches attribute.
+    """
+
+    def __init__(self, selector):
+        super().__init__(convert_charrefs=False)
+        self.selectors = parse_selector(selector)
+        self.matches = []
+        self._open = []  # elements whose end tag hasn't been seen yet
+        self._captures = {}  # depth in _open -> (index in matches, source chunks)
+
+    def _emit(self, text):
+        for _, chunks in self._captures.values():
+            chunks.append(text)
+
+    def _start(self, tag, attrs, closed):
+        implied = IMPLIED_END_TAGS.get(tag)
+        depth = len(self._open)
+        while implied and depth:
+            top = depth
+            while top and self._open[top - 1].tag in INLINE_ELEMENTS:
+                top -= 1
+            if not top or self._open[top - 1].tag not in implied:
+                break
+            depth = top - 1
+        self._close_to(depth)
+
+        parent = self._open[-1] if self._open else None
+        element = _Element(tag, attrs, parent)
+        matched = any(_matches(parts, element) for parts in self.selectors)
+        source = self.get_starttag_text()
+
+        if tag in VOID_ELEMENTS or closed:
+            self._emit(source)
+            if matched:
+                self.matches.append(source)
+            return
+
+        self._open.append(element)
+        if matched:
+            self.matches.append(None)
+            self._captures[len(self._open)] = (len(self.matches) - 1, [])
+        self._emit(source)
+
+    def handle_starttag(self, tag, attrs):
+        self._start(tag, attrs, closed=False)
+
+    def handle_startendtag(self, tag, attrs):
+        self._start(tag, attrs, closed=True)
+
+    def handle_endtag(self, tag):
+        # Unclosed elements (like <p> or <li>) end with their nearest open ancestor
+        for depth in range(len(self._open), 0, -1):
+            if self._open[depth - 1].tag == tag:
+                break
+        else:
+            return
+
+        self._close_to(depth)
+        self._emit(f"</{tag}>")
+        self._close_to(depth - 1)
+
+    def _close_to(self, depth):
+        """End the open elements deeper than depth, innermost first."""
+        while len(self._open) > depth:
+            self._finish_capture(len(self._open))
+            self._open.pop()
+
+    def _finish_capture(self, depth):
+        capture = self._captures.pop(depth, None)
+        if capture is not None:
+            index, chunks = capture
+            self.matches[index] = "".join(chunks)
+
+    def handle_data(self, data):
+        self._emit(data)
+
+    def handle_entityref(self, name):
+        self._emit(f"&{name};")
+
+    def handle_charref(self, name):
+        self._emit(f"&#{name};")
+
+    def handle_comment(self, data):
+        self._emit(f"<!--{data}-->")
+
+    def close(self):
+        super().close()
+        # Elements still open at the end of the document end there
+        self._close_to(0)
+
+
+def select(html, selector):
+    """
+    Find the elements of a document that match a CSS selector.
+
+    Args:
+        html (str): The document
+        selector (str): CSS selector, e.g. "div.article > h2 a[href]"
+
+    Returns:
+        list: The HTML of each matching element, in document order
+
+    Raises:
+        ValueError: If the selector uses unsupported syntax
+    """
+    parser = SelectorParser(selector)
+    parser.feed(html)
+    parser.close()
+    return parser.matches
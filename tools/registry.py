@@ -1,14 +1,38 @@
 # tools/registry.py
 
+from types import MappingProxyType
+
+
+class _Entry:
+    """A registered tool: its function, optional description and prompt line."""
+
+    __slots__ = ("function", "description", "line")
+
+    def __init__(self, name, function, description):
+        self.function = function
+        self.description = description or None
+        # Built once here rather than on every prompt
+        self.line = f"- {name}: {description}" if description else None
+
+
 class ToolRegistry:
     """
     A registry for all available tools that can be used by the agent.
     Allows for dynamic tool discovery and execution.
+
+    Tools are registered at import time, and the listings built from them
+    are cached until the next registration. freeze() builds them all and
+    rejects further registrations. The tools and descriptions properties
+    are read-only views.
     """
 
     def __init__(self):
-        self.tools = {}
-        self.descriptions = {}
+        self._entries = {}  # name -> _Entry, in registration order
+        self._frozen = False
+        # Cached listings, reset by register()
+        self._views = None
+        self._listing = None
+        self._formatted = None
 
     def register(self, name, function, description=None):
         """
@@ -18,10 +42,52 @@ class ToolRegistry:
             name (str): The name of the tool
             function (callable): The function to call when tool is invoked
             description (str, optional): A description of what the tool does
+
+        Raises:
+            RuntimeError: If the registry has been frozen
+        """
+        if self.frozen:
+            raise RuntimeError(f"Cannot register tool '{name}' after the registry is frozen")
+        self._entries[name] = _Entry(name, function, description)
+        self._views = self._listing = self._formatted = None
+
+    def register_many(self, tools):
+        """
+        Register several tools at once.
+
+        Args:
+            tools: Iterable of (name, function, description) tuples; the
+                   description may be None
+
+        Raises:
+            RuntimeError: If the registry has been frozen
         """
-        self.tools[name] = function
-        if description:
-            self.descriptions[name] = description
+        if self.frozen:
+            raise RuntimeError("Cannot register tools after the registry is frozen")
+        self._entries.update((name, _Entry(name, function, description))
+                             for name, function, description in tools)
+        self._views = self._listing = self._formatted = None
+
+    @property
+    def frozen(self):
+        return self._frozen
+
+    def freeze(self):
+        """Stop accepting registrations and build the cached tool listings."""
+        self._frozen = True
+        self._get_views()
+        self.list_tools()
+        self.get_tool_descriptions_formatted()
+
+    @property
+    def tools(self):
+        """Read-only mapping of tool names to their functions."""
+        return self._get_views()[0]
+
+    @property
+    def descriptions(self):
+        """Read-only mapping of tool names to their descriptions, for tools that have one."""
+        return self._get_views()[1]
 
     def get_tool(self, name):
         """
@@ -36,9 +102,10 @@ class ToolRegistry:
         Raises:
             KeyError: If the tool doesn't exist
         """
-        if name not in self.tools:
-            raise KeyError(f"Tool '{name}' not found in registry")
-        return self.tools[name]
+        try:
+            return self._entries[name].function
+        except KeyError:
+            raise KeyError(f"Tool '{name}' not found in registry") from None
 
     def execute(self, name, *args, **kwargs):
         """
@@ -55,8 +122,11 @@ class ToolRegistry:
         Raises:
             KeyError: If the tool doesn't exist
         """
-        tool = self.get_tool(name)
-        return tool(*args, **kwargs)
+        try:
+            entry = self._entries[name]
+        except KeyError:
+            raise KeyError(f"Tool '{name}' not found in registry") from None
+        return entry.function(*args, **kwargs)
 
     def list_tools(self):
         """
@@ -65,11 +135,9 @@ class ToolRegistry:
         Returns:
             dict: A dictionary of tool names and their descriptions
         """
-        result = {}
-        for name in self.tools:
-            desc = self.descriptions.get(name, "No description available")
-            result[name] = desc
-        return result
+        if self._listing is None:
+            self._listing = MappingProxyType(self._build_listing())
+        return dict(self._listing)
 
     def get_tool_descriptions_formatted(self):
         """
@@ -78,7 +146,23 @@ class ToolRegistry:
         Returns:
             str: A formatted string of tool names and descriptions
         """
-        lines = []
-        for name, desc in self.descriptions.items():
-            lines.append(f"- {name}: {desc}")
-        return "\n".join(lines)
+        if self._formatted is None:
+            self._formatted = self._build_formatted()
+        return self._formatted
+
+    def _get_views(self):
+        if self._views is None:
+            self._views = self._build_views()
+        return self._views
+
+    def _build_views(self):
+        tools = {name: entry.function for name, entry in self._entries.items()}
+        descriptions = {name: entry.description for name, entry in self._entries.items() if entry.description}
+        return MappingProxyType(tools), MappingProxyType(descriptions)
+
+    def _build_listing(self):
+        return {name: entry.description or "No description available"
+                for name, entry in self._entries.items()}
+
+    def _build_formatted(self):
+        return "\n".join(entry.line for entry in self._entries.values() if entry.line)
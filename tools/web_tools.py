@@ -1,13 +1,88 @@
 # tools/web_tools.py
 
+import os
 import json
-import subprocess
-import tempfile
-from urllib.parse import urlparse
+import shutil
+import socket
+from functools import lru_cache
+from typing import Mapping, NamedTuple
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+from .html_select import SelectorParser
+
+FETCH_TIMEOUT = (5, 30)  # seconds to connect, and to wait between bytes of the response
+DOWNLOAD_TIMEOUT = (5, 60)  # same, for downloads, which may stall longer between chunks
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024  # bytes copied to the file at a time
+SCRAPE_CHUNK_SIZE = 64 * 1024  # bytes of a scraped page decoded and parsed at a time
+POOL_CONNECTIONS = 16  # hosts whose connections are kept
+POOL_MAXSIZE = 64  # connections kept per host, for tools called from parallel steps
+# Environment variables requests reads on every call when trust_env is set
+REQUESTS_ENV_VARS = ("http_proxy", "https_proxy", "all_proxy", "no_proxy",
+                     "REQUESTS_CA_BUNDLE", "CURL_CA_BUNDLE", "NETRC")
+URL_CACHE_SIZE = 1024  # parsed URLs kept for validate_url, which sees the same URLs repeatedly
+
+
+class _PooledAdapter(HTTPAdapter):
+    """HTTPAdapter whose connections stay open and skip Nagle's algorithm."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        # urllib3's defaults already set TCP_NODELAY; add keep-alive probes so
+        # idle pooled connections that died are noticed
+        kwargs["socket_options"] = HTTPConnection.default_socket_options + [
+            (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        ]
+        super().init_poolmanager(*args, **kwargs)
+
+
+def _make_session():
+    session = requests.Session()
+    adapter = _PooledAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE, max_retries=0)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    # Without proxy, CA bundle or netrc settings in the environment, skip the
+    # lookups requests would otherwise repeat on every request
+    session.trust_env = any(os.environ.get(name) or os.environ.get(name.upper())
+                            for name in REQUESTS_ENV_VARS) or os.path.exists(os.path.expanduser("~/.netrc"))
+    return session
+
+
+# Keep-alive connection pool shared by every web tool call, so repeated
+# requests to a host skip the TCP and TLS handshakes
+_SESSION = _make_session()
+
+
+class Response(NamedTuple):
+    """A fetched HTTP response."""
+    code: int
+    message: str
+    headers: Mapping[str, str]  # case-insensitive
+    body: str
+
+    def as_dict(self):
+        """The response in the dict form fetch_url returns."""
+        return {
+            "status": {
+                "code": self.code,
+                "message": self.message
+            },
+            "headers": dict(self.headers),
+            "body": self.body
+        }
+
+
+def _fetch(url, method="GET", headers=None, data=None):
+    """Fetch a URL through the shared session; raises on connection errors."""
+    # Redirects are returned as they are, like other responses
+    response = _SESSION.request(method, url, headers=headers, data=data or None,
+                                timeout=FETCH_TIMEOUT, allow_redirects=False)
+    return Response(response.status_code, response.reason, response.headers, response.text)
+
 
 def fetch_url(url, method="GET", headers=None, data=None):
     """
-    Fetch content from a URL using curl.
+    Fetch content from a URL.
 
     Args:
         url (str): The URL to fetch
@@ -18,64 +93,8 @@ def fetch_url(url, method="GET", headers=None, data=None):
     Returns:
         dict: A dictionary containing response status, headers, and body
     """
-    cmd = ["curl", "-s", "-i", "-X", method]
-
-    # Add headers if provided
-    if headers:
-        for key, value in headers.items():
-            cmd.extend(["-H", f"{key}: {value}"])
-
-    # Add data if provided
-    if data:
-        with tempfile.NamedTemporaryFile(mode="w", delete=False) as temp:
-            temp.write(data)
-            temp.flush()
-            cmd.extend(["--data-binary", f"@{temp.name}"])
-
-    # Add URL and execute
-    cmd.append(url)
-
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        output = result.stdout
-
-        # Parse response
-        headers_end = output.find("\r\n\r\n")
-        if headers_end == -1:
-            # Try Unix-style line endings
-            headers_end = output.find("\n\n")
-            header_text = output[:headers_end].strip()
-            body = output[headers_end+2:].strip()
-        else:
-            header_text = output[:headers_end].strip()
-            body = output[headers_end+4:].strip()
-
-        # Parse status line
-        status_line = header_text.split("\n")[0]
-        status_parts = status_line.split(" ", 2)
-        if len(status_parts) >= 3:
-            status_code = int(status_parts[1])
-            status_message = status_parts[2]
-        else:
-            status_code = 0
-            status_message = "Unknown"
-
-        # Parse headers
-        header_lines = header_text.split("\n")[1:]
-        headers = {}
-        for line in header_lines:
-            if ":" in line:
-                key, value = line.split(":", 1)
-                headers[key.strip()] = value.strip()
-
-        return {
-            "status": {
-                "code": status_code,
-                "message": status_message
-            },
-            "headers": headers,
-            "body": body
-        }
+        return _fetch(url, method, headers, data).as_dict()
     except Exception as e:
         return {
             "error": str(e)
@@ -90,27 +109,23 @@ def download_file(url, output_path):
         output_path (str): The local path to save the file
 
     Returns:
-        dict: A dictionary containing status and file info
+        dict: A dictionary containing status and the size of the file in bytes
     """
     try:
-        cmd = ["curl", "-s", "-L", "-o", output_path, url]
-        result = subprocess.run(cmd, capture_output=True, text=True)
-
-        if result.returncode != 0:
-            return {
-                "success": False,
-                "error": result.stderr
-            }
-
-        # Get file size
-        file_info_cmd = ["ls", "-l", output_path]
-        file_info = subprocess.run(file_info_cmd, capture_output=True, text=True)
+        # Ask for the file as it is, so nothing has to be decompressed on the way
+        with _SESSION.get(url, stream=True, timeout=DOWNLOAD_TIMEOUT,
+                          headers={"Accept-Encoding": "identity"}) as response:
+            response.raise_for_status()
+            # Servers may compress anyway; undo that while copying
+            response.raw.decode_content = True
+            with open(output_path, "wb") as f:
+                shutil.copyfileobj(response.raw, f, length=DOWNLOAD_CHUNK_SIZE)
 
         return {
             "success": True,
             "path": output_path,
             "url": url,
-            "file_info": file_info.stdout.strip() if file_info.returncode == 0 else "Unknown"
+            "size": os.stat(output_path).st_size
         }
     except Exception as e:
         return {
@@ -120,53 +135,46 @@ def download_file(url, output_path):
 
 def scrape_page(url, selector=None):
     """
-    Scrape content from a webpage using curl and optional CSS selector.
+    Scrape content from a webpage with an optional CSS selector.
 
     Args:
         url (str): The URL to scrape
-        selector (str, optional): CSS selector to extract specific content.
-                                 If None, returns the full page.
+        selector (str, optional): CSS selector to extract specific content, e.g.
+                                 "div.post > h2 a[href]". If None, returns the full page.
 
     Returns:
         dict: A dictionary containing the scraped content
     """
-    # First, fetch the page
-    response = fetch_url(url)
-
-    if "error" in response:
-        return {
-            "success": False,
-            "error": response["error"]
-        }
-
-    html_content = response["body"]
-
     # If no selector is provided, return the full HTML
     if not selector:
+        try:
+            body = _fetch(url).body
+        except Exception as e:
+            return {
+                "success": False,
+                "error": str(e)
+            }
         return {
             "success": True,
-            "content": html_content
+            "content": body
         }
 
-    # For selector-based extraction, use grep and sed for simple cases
-    # This is a basic implementation and won't work for complex selectors
     try:
-        # Create a temporary file with the HTML content
-        with tempfile.NamedTemporaryFile(mode="w", delete=False) as temp:
-            temp.write(html_content)
-            temp.flush()
-
-            # Use grep to find the selector, very basic implementation
-            # Note: This is not a proper HTML parser and will only work for simple cases
-            grep_cmd = ["grep", "-A", "10", "-B", "10", selector, temp.name]
-            grep_result = subprocess.run(grep_cmd, capture_output=True, text=True)
-
-            extracted = grep_result.stdout.strip()
-
-            return {
-                "success": True,
-                "content": extracted if extracted else "No content found matching the selector"
-            }
+        # The page is parsed as it arrives, without holding the whole body;
+        # an unsupported selector fails before anything is fetched
+        parser = SelectorParser(selector)
+        with _SESSION.get(url, stream=True, timeout=FETCH_TIMEOUT, allow_redirects=False) as response:
+            if response.encoding is None:
+                response.encoding = "utf-8"
+            for chunk in response.iter_content(SCRAPE_CHUNK_SIZE, decode_unicode=True):
+                parser.feed(chunk)
+        parser.close()
+
+        extracted = "\n".join(parser.matches)
+        return {
+            "success": True,
+            "content": extracted if extracted else "No content found matching the selector"
+        }
     except Exception as e:
         return {
             "success": False,
@@ -184,7 +192,11 @@ def validate_url(url):
         dict: A dictionary with validation results
     """
     try:
-        result = urlparse(url)
+        # Without a scheme and a netloc the URL can't be valid, so skip parsing
+        if "://" not in url:
+            return {"valid": False, "parsed": {}}
+
+        result = _split_url(url)
         valid = all([result.scheme, result.netloc])
 
         return {
@@ -193,7 +205,7 @@ def validate_url(url):
                 "scheme": result.scheme,
                 "netloc": result.netloc,
                 "path": result.path,
-                "params": result.params,
+                "params": "",  # kept for callers of the old urlparse result; urlsplit leaves ;params in the path
                 "query": result.query,
                 "fragment": result.fragment
             } if valid else {}
@@ -204,30 +216,19 @@ def validate_url(url):
             "error": str(e)
         }
 
+@lru_cache(maxsize=URL_CACHE_SIZE)
+def _split_url(url):
+    return urlsplit(url)
+
+# (name, function, description) of each tool, registered in one call
+WEB_TOOLS = (
+    ("fetch_url", fetch_url, "Fetch content from a URL with optional method, headers, and data"),
+    ("download_file", download_file, "Download a file from a URL to a specified local path"),
+    ("scrape_page", scrape_page, "Scrape content from a webpage, optionally with a selector"),
+    ("validate_url", validate_url, "Validate if a string is a properly formatted URL"),
+)
+
 def register_web_tools(registry):
     """Register all web tools with the given registry."""
-    registry.register(
-        "fetch_url",
-        fetch_url,
-        "Fetch content from a URL with optional method, headers, and data"
-    )
-
-    registry.register(
-        "download_file",
-        download_file,
-        "Download a file from a URL to a specified local path"
-    )
-
-    registry.register(
-        "scrape_page",
-        scrape_page,
-        "Scrape content from a webpage, optionally with a selector"
-    )
-
-    registry.register(
-        "validate_url",
-        validate_url,
-        "Validate if a string is a properly formatted URL"
-    )
-
+    registry.register_many(WEB_TOOLS)
     return registry